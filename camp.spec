@@ -1,12 +1,15 @@
 # -*- mode: python ; coding: utf-8 -*-
+from PyInstaller.utils.hooks import collect_submodules
 
+# pydcs is imported through lazy_import, the import analysis does not see it
 
 a = Analysis(
     ['tauntaun_live_editor\\camp.py'],
     pathex=[],
     binaries=[],
-    datas=[],
-    hiddenimports=[],
+    # Generated by scripts/build.py with the .gz/.br variants and the pydcs fingerprint they are keyed by
+    datas=[('tauntaun_live_editor\\data\\static_data', 'tauntaun_live_editor\\data\\static_data')],
+    hiddenimports=collect_submodules('dcs'),
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -6,11 +6,12 @@ import {
   AppStateContainer,
   DcsStaticDataStateContainer,
   MissionStateContainer,
+  PresenceStateContainer,
   SelectionStateContainer,
   SessionStateContainer
 } from '../models';
 import { findGroupById, getGroupOfUnit } from '../models/dcs_util';
-import { gameService } from '../services';
+import { gameService, presenceService } from '../services';
 import { ModeContext, ModeContextType } from './contexts';
 import { AddFlightForm, RoleSelectionForm, EditWaypointForm, LoadoutEditor } from './window/forms';
 import { MenuBar } from './menu';
@@ -41,8 +42,9 @@ export const App: React.FunctionComponent = () => {
   } = AppStateContainer.useContainer();
 
   const { mission, initialize: initializeMission } = MissionStateContainer.useContainer();
-  const { initialize: initializeDcsStaticData } = DcsStaticDataStateContainer.useContainer();
+  const { initialize: initializeDcsStaticData, loadMissionTypes } = DcsStaticDataStateContainer.useContainer();
   const { sessions, sessionId, initialize: initializeSession } = SessionStateContainer.useContainer();
+  const { connect: connectPresence } = PresenceStateContainer.useContainer();
   const {
     selectedWaypoint,
     selectedGroupId: selectedGroupIdCommanderMode,
@@ -88,6 +90,23 @@ export const App: React.FunctionComponent = () => {
     initApp();
   }, []);
 
+  useEffect(() => {
+    // Cursors and selections go over their own socket, tied to the session id
+    if (sessionId === -1) return;
+
+    const port = location.port ? location.port : '80';
+    connectPresence(+port, sessionId);
+  }, [sessionId]);
+
+  useEffect(() => {
+    presenceService.sendSelection(selectedUnitIdCommanderMode);
+  }, [selectedUnitIdCommanderMode]);
+
+  useEffect(() => {
+    // Fetch the static data of unit types added to the mission
+    loadMissionTypes(mission);
+  }, [mission]);
+
   const groupMarkerOnClick = (event: GroupClickEventType): void => {
     if (!commanderMode) return;
 
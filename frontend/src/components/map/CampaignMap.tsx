@@ -10,7 +10,8 @@ import { LatLng, LeafletMouseEvent } from 'leaflet';
 import { ClickPosition, PointXY } from '../contextmenu';
 import { LegendContext } from './contexts';
 import { MapContextMenu } from './MapContextMenu';
-import { AirportLayer, CoalitionLayer } from './layers';
+import { AirportLayer, CoalitionLayer, PresenceLayer } from './layers';
+import { presenceService } from '../../services';
 import { Legend } from './Legend';
 import { Ruler } from './layers/lines/Ruler';
 import { CampaignMapEventHandler } from './CampaignMapEventHandler';
@@ -33,6 +34,10 @@ export const CampaignMap = (props: CampaignMapProps): JSX.Element => {
   const [position, setPosition] = useState(null as ClickPosition | null);
   const center = new LatLng(props.lat, props.lng);
 
+  const onMouseMove = (event: LeafletMouseEvent) => {
+    presenceService.sendCursor(event.latlng.lat, event.latlng.lng);
+  };
+
   const onContextMenuClick = (event: LeafletMouseEvent) => {
     event.originalEvent.preventDefault();
     setPosition({
@@ -64,7 +69,8 @@ export const CampaignMap = (props: CampaignMapProps): JSX.Element => {
           {showLabels && <BasemapLayer key={labelLayerName} name={labelLayerName} />}
           <CampaignMapEventHandler
             eventHandlers={{
-              contextmenu: onContextMenuClick
+              contextmenu: onContextMenuClick,
+              mousemove: onMouseMove
             }}
           />
           {sessionCoalition && (
@@ -75,6 +81,7 @@ export const CampaignMap = (props: CampaignMapProps): JSX.Element => {
               ))}
             </React.Fragment>
           )}
+          <PresenceLayer />
           {position && <MapContextMenu position={position} />}
           {showRuler && <Ruler />}
         </MapContainer>
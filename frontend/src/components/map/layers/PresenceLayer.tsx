@@ -0,0 +1,35 @@
+import React from 'react';
+
+import { CircleMarker, Tooltip } from 'react-leaflet';
+import { LatLng } from 'leaflet';
+
+import { PresenceStateContainer, SessionStateContainer } from '../../../models';
+
+export function PresenceLayer() {
+  const { presences } = PresenceStateContainer.useContainer();
+  const { sessionId, sessions } = SessionStateContainer.useContainer();
+  const coalition = sessions[sessionId] ? sessions[sessionId].coalition : '';
+
+  return (
+    <React.Fragment>
+      {Object.keys(presences)
+        .filter(
+          id => +id !== sessionId && sessions[id] && sessions[id].coalition === coalition && !isNaN(presences[id].lat)
+        )
+        .map(id => (
+          <CircleMarker
+            key={`presence_${id}`}
+            interactive={false}
+            center={new LatLng(presences[id].lat, presences[id].lon)}
+            radius={4}
+            color="orange"
+            weight={2}
+          >
+            <Tooltip direction="right" offset={[6, 0]} permanent={true}>
+              {sessions[id].name}
+            </Tooltip>
+          </CircleMarker>
+        ))}
+    </React.Fragment>
+  );
+}
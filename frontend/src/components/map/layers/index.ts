@@ -2,3 +2,4 @@ export * from './AirportLayer';
 export * from './CoalitionLayer';
 export * from './CountryLayer';
 export * from './GroupLayer';
+export * from './PresenceLayer';
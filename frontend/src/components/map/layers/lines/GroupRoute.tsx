@@ -32,7 +32,7 @@ export function GroupRoute(props: GroupRouteProps) {
   const handlePositionInserted = (index: number, pos: LatLng) => {
     const oldPoint = group.points[index];
 
-    gameService.sendRouteInsertAt(group, oldPoint.position, {
+    gameService.sendRouteInsertAt(group, oldPoint, {
       lat: pos.lat,
       lon: pos.lng
     });
@@ -43,7 +43,7 @@ export function GroupRoute(props: GroupRouteProps) {
   const handlePositionModified = (index: number, pos: LatLng) => {
     const oldPoint = group.points[index];
 
-    gameService.sendRouteModify(group, oldPoint.position, {
+    gameService.sendRouteModify(group, oldPoint, {
       ...oldPoint,
       position: {
         lat: pos.lat,
@@ -57,7 +57,7 @@ export function GroupRoute(props: GroupRouteProps) {
   const handlePositionRemoved = (index: number) => {
     const oldPoint = group.points[index];
 
-    gameService.sendRouteRemove(group, oldPoint.position);
+    gameService.sendRouteRemove(group, oldPoint);
 
     console.log(`Point removed ${index}`);
   };
@@ -1,5 +1,5 @@
 import React, { ChangeEvent } from 'react';
-import { gameService } from '../../services';
+import { gameService, roomPrefix } from '../../services';
 import { AppStateContainer, MapStateContainer } from '../../models';
 import { Checkbox, FormControlLabel } from '@mui/material';
 
@@ -21,7 +21,7 @@ export function AdminMenuBar() {
     console.log('Downloading mission.');
     // Create a temporary link to trigger the download
     const link = document.createElement('a');
-    link.href = '/game/download_mission';
+    link.href = `${roomPrefix}/game/download_mission`;
     link.download = 'mission.miz';
     document.body.appendChild(link);
     link.click();
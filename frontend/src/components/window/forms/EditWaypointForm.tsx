@@ -48,7 +48,7 @@ export function EditWaypointForm(props: EditWaypointFormProps) {
 
   const saveWaypointOnClick = () => {
     // TODO validate
-    gameService.sendRouteModify(group, point.position, {
+    gameService.sendRouteModify(group, point, {
       ...point,
       alt: alt,
       alt_type: altType,
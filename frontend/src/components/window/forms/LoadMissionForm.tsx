@@ -1,43 +1,81 @@
 import { List, ListItem, ListItemText } from '@mui/material';
 import React, { useEffect, useState } from 'react';
 import { AppStateContainer } from '../../../models/appState';
-import { gameService } from '../../../services/gameService';
+import { gameService, MissionLibraryEntry } from '../../../services/gameService';
+
+const pageSize = 50;
+
+function describeMission(mission: MissionLibraryEntry): string {
+  const info = mission.info;
+  if (!info) {
+    return 'Reading mission...';
+  }
+
+  if (info.error) {
+    return `Unreadable: ${info.error}`;
+  }
+
+  const coalitions = Object.entries(info.coalitions || {})
+    .map(([side, counts]) => `${side} ${counts.groups} groups / ${counts.units} units`)
+    .join(', ');
+  return [info.theatre, info.date, coalitions, `${(mission.size / (1024 * 1024)).toFixed(1)} MB`]
+    .filter((part) => part)
+    .join(' - ');
+}
 
 export function LoadMissionForm() {
   const { setShowLoadMissionForm } = AppStateContainer.useContainer();
-  const [missionDir, setMissionDir] = useState([] as Array<string>);
+  const [missions, setMissions] = useState([] as Array<MissionLibraryEntry>);
+  const [page, setPage] = useState(0);
+  const [total, setTotal] = useState(0);
 
   useEffect(() => {
     const init = async () => {
       try {
-        const fetchedMissionDir = await gameService.getMissionDir();
+        const fetchedPage = await gameService.getMissions(page, pageSize);
 
         console.info('LoadMissionForm initialized successfully.');
-        setMissionDir(fetchedMissionDir);
+        setMissions(fetchedPage.missions);
+        setTotal(fetchedPage.total);
       } catch (error) {
         console.info('Failed to initialize LoadMissionForm.');
       }
     };
 
     init();
-  }, []);
+  }, [page]);
 
   const onClick = (index: number) => {
-    gameService.sendLoadMission(missionDir[index]);
-    console.log(`Loading mission ${missionDir[index]}`);
+    gameService.sendLoadMission(missions[index].path);
+    console.log(`Loading mission ${missions[index].path}`);
     setShowLoadMissionForm(false);
   };
 
+  const pageCount = Math.max(1, Math.ceil(total / pageSize));
+
   return (
     <div className="PopupBig">
-      <List dense={true} style={{ height: '80vh', overflow: 'auto' }}>
-        {missionDir.map((dir, index) => (
-          <ListItem key={`dir-${index}`} button={true} onClick={() => onClick(index)}>
-            <ListItemText primary={dir} />
+      <List dense={true} style={{ height: '75vh', overflow: 'auto' }}>
+        {missions.map((mission, index) => (
+          <ListItem key={`mission-${mission.source}-${mission.name}`} button={true} onClick={() => onClick(index)}>
+            <ListItemText
+              primary={mission.source === 'uploads' ? `${mission.name} (uploaded)` : mission.name}
+              secondary={describeMission(mission)}
+            />
           </ListItem>
         ))}
       </List>
 
+      <button disabled={page === 0} onClick={() => setPage(page - 1)}>
+        Previous
+      </button>
+      <span>
+        {' '}
+        Page {page + 1} of {pageCount}{' '}
+      </span>
+      <button disabled={page + 1 >= pageCount} onClick={() => setPage(page + 1)}>
+        Next
+      </button>
       <button onClick={() => setShowLoadMissionForm(false)}>Close</button>
     </div>
   );
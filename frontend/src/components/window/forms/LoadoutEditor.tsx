@@ -1,6 +1,6 @@
 import './LoadoutEditor.css';
 
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { SelectChangeEvent, Slider } from '@mui/material';
 import { Select } from '@mui/material';
 import { MenuItem } from '@mui/material';
@@ -27,6 +27,23 @@ export interface LoadoutEditorProps {
 }
 
 export function LoadoutEditor(props: LoadoutEditorProps) {
+  const { loadAirframe } = DcsStaticDataStateContainer.useContainer();
+  const [isLoaded, setIsLoaded] = useState(false);
+
+  useEffect(() => {
+    // Pylon and weapon data is fetched when the editor opens, not with the initial page load
+    setIsLoaded(false);
+    loadAirframe(props.unit.type).then(() => setIsLoaded(true));
+  }, [props.unit.type]);
+
+  if (!isLoaded) {
+    return <div>Loading unit data for {props.unit.type}...</div>;
+  }
+
+  return <LoadoutEditorForm {...props} />;
+}
+
+function LoadoutEditorForm(props: LoadoutEditorProps) {
   const { dcsStaticData } = DcsStaticDataStateContainer.useContainer();
   const { setShowLoadoutEditor } = AppStateContainer.useContainer();
   const { mission } = MissionStateContainer.useContainer();
@@ -14,6 +14,7 @@ import {
   MissionStateContainer,
   SelectionStateContainer,
   SessionStateContainer,
+  PresenceStateContainer,
   DcsStaticDataStateContainer
 } from './models';
 import * as serviceWorker from './serviceWorker';
@@ -26,9 +27,11 @@ root.render(
       <MissionStateContainer.Provider>
         <SelectionStateContainer.Provider>
           <SessionStateContainer.Provider>
-            <DcsStaticDataStateContainer.Provider>
-              <App />
-            </DcsStaticDataStateContainer.Provider>
+            <PresenceStateContainer.Provider>
+              <DcsStaticDataStateContainer.Provider>
+                <App />
+              </DcsStaticDataStateContainer.Provider>
+            </PresenceStateContainer.Provider>
           </SessionStateContainer.Provider>
         </SelectionStateContainer.Provider>
       </MissionStateContainer.Provider>
@@ -41,6 +41,7 @@ export type Point = {
 };
 
 export type StaticPoint = {
+  index: number;
   alt: number;
   type: string;
   name: string;
@@ -81,6 +82,7 @@ export type Group = {
   name: string;
   units: Array<Unit | FlyingUnit>;
   points: Array<MovingPoint | StaticPoint>;
+  route_revision: number;
   task: string;
   hidden: string; // boolean as string
   dead: string; // boolean as string
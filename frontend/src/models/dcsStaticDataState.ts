@@ -1,6 +1,6 @@
-import { useState } from 'react';
+import { useRef, useState } from 'react';
 
-import { DcsStaticData, emptyDcsStaticData } from '.';
+import { DcsStaticData, emptyDcsStaticData, getMissionUnitTypes, Mission, Plane, Ship, Vehicle, Weapon } from '.';
 import { gameService } from '../services';
 import { createContainer } from 'unstated-next';
 
@@ -18,10 +18,11 @@ export function useDcsStaticDataState(initialState = defaultState) {
   const [state, setState] = useState(initialState);
 
   const refresh = async (): Promise<void> => {
-    const staticData = await gameService.getStaticData();
+    // Only the symbols are needed up front, unit and loadout data is fetched as it is used
+    const sidc = await gameService.getStaticSection<string>('sidc');
     setState(state => ({
       ...state,
-      dcsStaticData: staticData
+      dcsStaticData: { ...state.dcsStaticData, sidc: sidc }
     }));
   };
 
@@ -44,9 +45,64 @@ export function useDcsStaticDataState(initialState = defaultState) {
     }
   };
 
+  // DCS types of vehicles and ships already requested, vehicles are keyed by pydcs class name in
+  // the static data so it cannot be checked by type. A ref, the mission effect holds an old state.
+  const requestedTypes = useRef({ vehicles: new Set<string>(), ships: new Set<string>() });
+
+  const loadMissionTypes = async (mission: Mission): Promise<void> => {
+    const requested = requestedTypes.current;
+    const vehicleTypes = getMissionUnitTypes(mission, 'vehicle_group').filter(type => !requested.vehicles.has(type));
+    const shipTypes = getMissionUnitTypes(mission, 'ship_group').filter(type => !requested.ships.has(type));
+    if (!vehicleTypes.length && !shipTypes.length) {
+      return;
+    }
+
+    vehicleTypes.forEach(type => requested.vehicles.add(type));
+    shipTypes.forEach(type => requested.ships.add(type));
+    const [vehicles, ships] = await Promise.all([
+      vehicleTypes.length ? gameService.getStaticSection<Vehicle>('vehicles', vehicleTypes) : Promise.resolve({}),
+      shipTypes.length ? gameService.getStaticSection<Ship>('ships', shipTypes) : Promise.resolve({})
+    ]);
+    // getStaticSection answers a failed request with nothing, those types are asked for again
+    if (!Object.keys(vehicles).length) {
+      vehicleTypes.forEach(type => requested.vehicles.delete(type));
+    }
+    if (!Object.keys(ships).length) {
+      shipTypes.forEach(type => requested.ships.delete(type));
+    }
+
+    setState(state => ({
+      ...state,
+      dcsStaticData: {
+        ...state.dcsStaticData,
+        vehicles: { ...state.dcsStaticData.vehicles, ...vehicles },
+        ships: { ...state.dcsStaticData.ships, ...ships }
+      }
+    }));
+  };
+
+  const loadAirframe = async (type: string): Promise<void> => {
+    const needsWeapons = Object.keys(state.dcsStaticData.weapons).length === 0;
+    const [plane, weapons] = await Promise.all([
+      type in state.dcsStaticData.planes ? Promise.resolve(undefined) : gameService.getStaticType<Plane>('planes', type),
+      needsWeapons ? gameService.getStaticSection<Weapon>('weapons') : Promise.resolve({})
+    ]);
+
+    setState(state => ({
+      ...state,
+      dcsStaticData: {
+        ...state.dcsStaticData,
+        planes: plane ? { ...state.dcsStaticData.planes, [type]: plane } : state.dcsStaticData.planes,
+        weapons: needsWeapons ? weapons : state.dcsStaticData.weapons
+      }
+    }));
+  };
+
   return {
     ...state,
-    initialize
+    initialize,
+    loadMissionTypes,
+    loadAirframe
   };
 }
 
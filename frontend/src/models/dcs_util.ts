@@ -37,6 +37,17 @@ export function* getGroups(mission: Mission) {
   }
 }
 
+export function getMissionUnitTypes(mission: Mission, groupCategory: string): Array<string> {
+  const types = new Set<string>();
+  for (const groupArray of getGroupArrays(mission)) {
+    groupArray
+      .filter(g => g.groupCategory === groupCategory)
+      .forEach(g => g.group.units.forEach(u => types.add(u.type)));
+  }
+
+  return Array.from(types);
+}
+
 export function findGroupById(mission: Mission, groupId: number): Group | undefined {
   for (const groupArray of getGroupArrays(mission)) {
     const group = groupArray.find(g => g.group.id === groupId);
@@ -9,3 +9,4 @@ export * from './missionState';
 export * from './selectionState';
 export * from './sessionState';
 export * from './dcsStaticDataState';
+export * from './presenceState';
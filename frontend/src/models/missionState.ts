@@ -50,6 +50,7 @@ export function useMissionState(initialState = defaultState) {
         }
 
         group.points = message.points;
+        group.route_revision = message.route_revision;
 
         return {
           ...state,
@@ -88,6 +89,42 @@ export function useMissionState(initialState = defaultState) {
         };
       });
 
+    } else if (message.key === 'flights_added') {
+      setState(state => {
+        const updatedMission = { ...state.mission };
+
+        message.flights.forEach(flight => {
+          const country = updatedMission.coalition[flight.coalition]?.countries[flight.country];
+          if (country === undefined) {
+            console.error(`flights_added, country not found! ${flight.coalition} ${flight.country}`);
+            return;
+          }
+
+          country.plane_group = [...country.plane_group, flight.group];
+        });
+
+        return {
+          ...state,
+          mission: updatedMission
+        };
+      });
+
+    } else if (message.key === 'add_flights_result') {
+      if (message.error) {
+        console.warn(`add_flights failed: ${message.error}`);
+      }
+      message.value
+        .filter(result => !result.success)
+        .forEach(result => console.warn(`add_flights, flight ${result.index} failed: ${result.error}`));
+
+    } else if (message.key === 'load_progress') {
+      const { filename, stage, error } = message.value;
+      if (stage === 'failed') {
+        console.error(`Loading mission ${filename} failed: ${error}`);
+      } else {
+        console.info(`Loading mission ${filename}: ${stage}`);
+      }
+
     } else {
       console.info(`unhandled generic update`);
     }
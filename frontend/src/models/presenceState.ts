@@ -0,0 +1,44 @@
+import { useState } from 'react';
+import { createContainer } from 'unstated-next';
+
+import { presenceService, Presence } from '../services';
+import { Dictionary } from './util';
+
+export interface PresenceState {
+  presences: Dictionary<Presence>;
+}
+
+const defaultState: PresenceState = {
+  presences: {}
+};
+
+export function usePresenceState(initialState = defaultState) {
+  const [state, setState] = useState(initialState);
+
+  const onPresenceUpdate = (updates: Dictionary<Presence | null>) => {
+    setState(state => {
+      const presences = { ...state.presences };
+      Object.keys(updates).forEach(sessionId => {
+        const presence = updates[sessionId];
+        if (presence) {
+          presences[sessionId] = presence;
+        } else {
+          delete presences[sessionId];
+        }
+      });
+      return { ...state, presences: presences };
+    });
+  };
+
+  const connect = (port: number, sessionId: number) => {
+    setState(defaultState);
+    presenceService.openPresenceSocket(port, sessionId, onPresenceUpdate);
+  };
+
+  return {
+    ...state,
+    connect
+  };
+}
+
+export const PresenceStateContainer = createContainer(usePresenceState);
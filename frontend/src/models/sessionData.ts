@@ -7,3 +7,15 @@ export type SessionData = {
 };
 
 export type Sessions = Dictionary<SessionData>;
+
+export interface SessionsSnapshot {
+  version: number;
+  sessions: Sessions;
+}
+
+export type SessionDelta =
+  | { key: 'session_joined'; version: number; id: number; value: SessionData }
+  | { key: 'session_changed'; version: number; id: number; value: SessionData }
+  | { key: 'session_left'; version: number; id: number }
+  | { key: 'session_rejected'; id: number; value: SessionData }
+  | { key: 'session_resync' };
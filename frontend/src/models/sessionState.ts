@@ -1,8 +1,8 @@
-import { useState } from 'react';
+import { useRef, useState } from 'react';
 import { createContainer } from 'unstated-next';
 
 import { gameService } from '../services';
-import { Sessions } from './sessionData';
+import { Sessions, SessionData, SessionDelta } from './sessionData';
 
 export interface SessionState {
   isInitialized: boolean;
@@ -19,35 +19,68 @@ const defaultState: SessionState = {
 
 export function useSessionState(initialState = defaultState) {
   const [state, setState] = useState(initialState);
+  const version = useRef(-1);
 
   const refreshSessions = async (): Promise<void> => {
-    const sessions = await gameService.getSessions();
+    const snapshot = await gameService.getSessions();
+    if (snapshot.version < version.current) {
+      return;
+    }
+
+    version.current = snapshot.version;
     setState(state => ({
       ...state,
-      sessions: sessions
+      sessions: snapshot.sessions
     }));
   };
 
-  const onSessionIdUpdateReceived = (sessionId: number) => {
+  const setSession = (id: number, session: SessionData | null) => {
     setState(state => {
+      const sessions = { ...state.sessions };
+      if (session) {
+        sessions[id] = session;
+      } else {
+        delete sessions[id];
+      }
       return {
         ...state,
-        sessionId: sessionId
+        sessions: sessions
       };
     });
-
-    console.info(`SessionId received.`);
   };
 
-  const onSessionsUpdateReceived = (sessions: Sessions) => {
+  const onSessionIdUpdateReceived = (sessionId: number) => {
     setState(state => {
       return {
         ...state,
-        sessions: sessions
+        sessionId: sessionId
       };
     });
 
-    console.info(`got sessions update`);
+    console.info(`SessionId received.`);
+  };
+
+  const onSessionDeltaReceived = (delta: SessionDelta) => {
+    if (delta.key === 'session_resync') {
+      refreshSessions();
+      return;
+    }
+    if (delta.key === 'session_rejected') {
+      setSession(delta.id, delta.value);
+      return;
+    }
+
+    if (delta.version <= version.current) {
+      return;
+    }
+    if (delta.version !== version.current + 1) {
+      // Missed a delta, start over from a snapshot
+      refreshSessions();
+      return;
+    }
+
+    version.current = delta.version;
+    setSession(delta.id, delta.key === 'session_left' ? null : delta.value);
   };
 
   const initialize = async (): Promise<void> => {
@@ -57,7 +90,7 @@ export function useSessionState(initialState = defaultState) {
       }
 
       await refreshSessions();
-      gameService.registerForSessionsUpdate(onSessionsUpdateReceived);
+      gameService.registerForSessionsUpdate(onSessionDeltaReceived);
 
       gameService.registerForSessionIdUpdate(onSessionIdUpdateReceived);
       gameService.requestSessionId();
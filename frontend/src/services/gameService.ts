@@ -4,15 +4,17 @@ import { v4 as uuidv4 } from 'uuid';
 import { Dictionary, Point, Mission, Group, emptyMission, MovingPoint, Unit, StaticPoint } from '../models';
 import { LatLng } from 'leaflet';
 
-import { Sessions, SessionData } from '../models/sessionData';
+import { Sessions, SessionData, SessionDelta, SessionsSnapshot } from '../models/sessionData';
 import { inflate } from 'pako';
 import { DcsStaticData, emptyDcsStaticData } from '../models/dcs_static';
 import { Buffer } from 'buffer';
 import { Coalition } from '../models/dcs';
+import { roomPrefix } from './room';
 
 interface RouteUpdateMesage {
   key: "route_update";
   points: Array<MovingPoint | StaticPoint>;
+  route_revision: number;
   group_id: number;
 }
 
@@ -28,9 +30,62 @@ interface UnitUpdateMessage {
   id: number;
 }
 
-export type GenericUpdateMessage = RouteUpdateMesage | BullseyeUpdateMessage | UnitUpdateMessage;
+interface FlightsAddedMessage {
+  key: "flights_added";
+  flights: Array<{ coalition: string; country: string; group: Group }>;
+}
+
+interface AddFlightsResultMessage {
+  key: "add_flights_result";
+  value: Array<{ index: number; success: boolean; group_id?: number; error?: string }>;
+  error?: string;
+}
+
+interface LoadProgressMessage {
+  key: "load_progress";
+  value: { filename: string; stage: string; error?: string };
+}
+
+export interface FlightSpec {
+  coalition: string;
+  country: string;
+  location: LatLng;
+  airport: number;
+  plane: string;
+  numberOfPlanes: number;
+}
+
+export interface MissionLibraryEntry {
+  name: string;
+  source: 'missions' | 'uploads';
+  path: string;
+  size: number;
+  mtime: number;
+  info: {
+    theatre?: string | null;
+    start_time?: number | null;
+    date?: string | null;
+    coalitions?: Dictionary<{ groups: number; units: number }>;
+    error?: string;
+  } | null;
+}
+
+export interface MissionLibraryPage {
+  total: number;
+  page: number;
+  page_size: number;
+  missions: Array<MissionLibraryEntry>;
+}
+
+export type GenericUpdateMessage =
+  | RouteUpdateMesage
+  | BullseyeUpdateMessage
+  | UnitUpdateMessage
+  | FlightsAddedMessage
+  | AddFlightsResultMessage
+  | LoadProgressMessage;
 export type MissionUpdateListener = (updatedMission: Mission) => void;
-export type SessionsUpdateListener = (updatedSessions: Sessions) => void;
+export type SessionsUpdateListener = (delta: SessionDelta) => void;
 export type SessionIdUpdateListener = (id: number) => void;
 export type GenericUpdateListener = (message: GenericUpdateMessage) => void;
 export type OnCloseListener = (ev: CloseEvent) => void;
@@ -38,9 +93,9 @@ export type OnCloseListener = (ev: CloseEvent) => void;
 export interface GameService {
   openSocket(port: number): Promise<void>;
 
-  sendRouteInsertAt(group: Group, atWp: Point, newWp: Point): void;
-  sendRouteRemove(group: Group, wp: Point): void;
-  sendRouteModify(group: Group, oldWp: Point, newWp: StaticPoint | MovingPoint): void;
+  sendRouteInsertAt(group: Group, atWp: StaticPoint | MovingPoint, newWp: Point): void;
+  sendRouteRemove(group: Group, wp: StaticPoint | MovingPoint): void;
+  sendRouteModify(group: Group, oldWp: StaticPoint | MovingPoint, newWp: StaticPoint | MovingPoint): void;
   sendSaveMission(missionName?: string): void;
   sendLoadMission(missionName: string): void;
   sendAddFlight(
@@ -51,6 +106,7 @@ export interface GameService {
     plane: string,
     numberOfPlanes: number
   ): void;
+  sendAddFlights(flights: Array<FlightSpec>): void;
   sendAddJTAC(coalition: string, country: string, location: LatLng): void;
   requestSessionId(): void;
   sendUnitLoadoutUpdate(
@@ -65,10 +121,14 @@ export interface GameService {
   sendSessionDataUpdate(sessionId: number, sessionData: SessionData): void;
 
   getMission(): Promise<Mission>;
-  getSessions(): Promise<Sessions>;
+  getSessions(): Promise<SessionsSnapshot>;
   getStaticData(): Promise<DcsStaticData>;
+  getStaticSection<T>(category: string, ids?: Array<string>): Promise<Dictionary<T>>;
+  getStaticType<T>(category: string, id: string): Promise<T | undefined>;
   authAdminPassword(password: string): Promise<boolean>;
+  getResumeToken(): string | null;
   getMissionDir(): Promise<Array<string>>;
+  getMissions(page: number, pageSize: number): Promise<MissionLibraryPage>;
 
   registerForMissionUpdates(listener: MissionUpdateListener): string;
   unregisterMissionUpdateListener(id: string): void;
@@ -93,6 +153,13 @@ const sessionIdUpdateListeners: Dictionary<SessionIdUpdateListener> = {};
 const genericUpdateListeners: Dictionary<GenericUpdateListener> = {};
 const onCloseListeners: Dictionary<OnCloseListener> = {};
 let time_start: number | null = null;
+const gameUrl = `http://localhost:8080${roomPrefix}/game`;
+
+// Resuming after a dropped connection: the server replays the broadcasts after lastSeq
+const MAX_RECONNECT_ATTEMPTS = 10;
+let resumeToken: string | null = null;
+let lastSeq: number | null = null;
+let reconnectAttempts = 0;
 
 function sendMessage<ValueType>(name: string, value: ValueType) {
   if (!socket || socket.readyState !== WebSocket.OPEN) {
@@ -106,7 +173,7 @@ function sendMessage<ValueType>(name: string, value: ValueType) {
 
 async function getMission(): Promise<Mission> {
   try {
-    const response = await fetch('http://localhost:8080/game/mission');
+    const response = await fetch(`${gameUrl}/mission`);
     if (!response.ok) {
       throw new Error('Response is not OK');
     }
@@ -121,7 +188,7 @@ async function getMission(): Promise<Mission> {
 
 async function getMissionDir(): Promise<Array<string>> {
   try {
-    const response = await fetch('http://localhost:8080/game/mission_dir');
+    const response = await fetch(`${gameUrl}/mission_dir`);
     if (!response.ok) {
       throw new Error('Response is not OK');
     }
@@ -134,24 +201,39 @@ async function getMissionDir(): Promise<Array<string>> {
   }
 }
 
-async function getSessions(): Promise<Sessions> {
+async function getMissions(page: number, pageSize: number): Promise<MissionLibraryPage> {
+  try {
+    const response = await fetch(`${gameUrl}/missions?page=${page}&page_size=${pageSize}`);
+    if (!response.ok) {
+      throw new Error('Response is not OK');
+    }
+
+    return (await response.json()) as MissionLibraryPage;
+  } catch (error) {
+    console.error(`Couldn't fetch missions`, error);
+    return { total: 0, page: page, page_size: pageSize, missions: [] };
+  }
+}
+
+async function getSessions(): Promise<SessionsSnapshot> {
   try {
-    const response = await fetch('http://localhost:8080/game/sessions');
+    const response = await fetch(`${gameUrl}/sessions`);
     if (!response.ok) {
       throw new Error('Response is not OK');
     }
 
+    const version = Number(response.headers.get('X-Sessions-Version') || 0);
     const sessions = (await response.json()) as Sessions;
-    return sessions;
+    return { version: version, sessions: sessions };
   } catch (error) {
     console.error(`Couldn't fetch sessions`, error);
-    return {};
+    return { version: -1, sessions: {} };
   }
 }
 
 async function getStaticData(): Promise<DcsStaticData> {
   try {
-    const response = await fetch('http://localhost:8080/game/static_data');
+    const response = await fetch(`${gameUrl}/static_data`);
     if (!response.ok) {
       throw new Error('Response is not OK');
     }
@@ -164,9 +246,41 @@ async function getStaticData(): Promise<DcsStaticData> {
   }
 }
 
+async function getStaticSection<T>(category: string, ids?: Array<string>): Promise<Dictionary<T>> {
+  try {
+    const query = ids ? `?ids=${ids.map(id => encodeURIComponent(id)).join(',')}` : '';
+    const response = await fetch(`${gameUrl}/static_data/${category}${query}`);
+    if (!response.ok) {
+      throw new Error('Response is not OK');
+    }
+
+    return (await response.json()) as Dictionary<T>;
+  } catch (error) {
+    console.error(`Couldn't fetch static_data ${category}`, error);
+    return {};
+  }
+}
+
+async function getStaticType<T>(category: string, id: string): Promise<T | undefined> {
+  try {
+    const response = await fetch(`${gameUrl}/static_data/${category}/${encodeURIComponent(id)}`);
+    if (response.status === 404) {
+      return undefined;
+    }
+    if (!response.ok) {
+      throw new Error('Response is not OK');
+    }
+
+    return (await response.json()) as T;
+  } catch (error) {
+    console.error(`Couldn't fetch static_data ${category}/${id}`, error);
+    return undefined;
+  }
+}
+
 async function authAdminPassword(password: string): Promise<boolean> {
   try {
-    const response = await fetch(`http://localhost:8080/game/auth_admin/${password}`);
+    const response = await fetch(`${gameUrl}/auth_admin/${password}`);
     const result = await response.text();
     return result === 'true';
   } catch (error) {
@@ -188,63 +302,126 @@ async function receiveUpdateMessage(event: MessageEvent) {
   const unzipped_data = await inflateAsync(data);
 
   const message = JSON.parse(unzipped_data as unknown as string);
+  if (message.key === 'welcome') {
+    resumeToken = message.resume_token;
+    lastSeq = message.seq;
+    Object.keys(sessionIdUpdateListeners).forEach(key => sessionIdUpdateListeners[key](message.id));
+    if (message.resync) {
+      Object.keys(sessionsUpdateListeners).forEach(key => sessionsUpdateListeners[key]({ key: 'session_resync' }));
+    }
+    return;
+  }
+  if (message.seq !== undefined) {
+    if (lastSeq !== null && message.seq <= lastSeq) {
+      // Already seen, replayed and broadcast at the same time
+      return;
+    }
+    lastSeq = message.seq;
+  }
+
   if (message.key === 'mission_updated') {
     Object.keys(missionUpdateListeners).forEach(key => missionUpdateListeners[key](message.value));
   } else if (message.key === 'sessionid') {
     Object.keys(sessionIdUpdateListeners).forEach(key => sessionIdUpdateListeners[key](message.value));
-  } else if (message.key === 'sessions_updated') {
-    Object.keys(sessionsUpdateListeners).forEach(key => sessionsUpdateListeners[key](message.value));
+  } else if (message.key.startsWith('session_')) {
+    Object.keys(sessionsUpdateListeners).forEach(key => sessionsUpdateListeners[key](message));
   } else {
     Object.keys(genericUpdateListeners).forEach(key => genericUpdateListeners[key](message));
   }
 }
 
-async function openSocket(port: number): Promise<void> {
+function getResumeToken(): string | null {
+  // Also proves the session to the presence socket
+  return resumeToken;
+}
+
+function onSocketClosed(port: number, ev: CloseEvent): void {
+  if (resumeToken !== null && reconnectAttempts < MAX_RECONNECT_ATTEMPTS) {
+    const delay = Math.min(500 * 2 ** reconnectAttempts, 5000);
+    reconnectAttempts++;
+    setTimeout(() => connectSocket(port).catch(() => console.warn('Reconnect failed')), delay);
+    return;
+  }
+
+  Object.keys(onCloseListeners).forEach(key => onCloseListeners[key](ev));
+}
+
+async function getEdgePort(): Promise<number | null> {
+  // Large events spread the connections over edge workers on their own ports
+  try {
+    const response = await fetch(`${gameUrl}/edge`);
+    if (!response.ok) {
+      return null;
+    }
+
+    return (await response.json()).port;
+  } catch (error) {
+    return null;
+  }
+}
+
+async function connectSocket(port: number): Promise<void> {
+  const edgePort = await getEdgePort();
   return new Promise((resolve, reject) => {
     try {
-      const url = new URL('/ws/message', window.location.href);
+      const url = new URL(`${roomPrefix}/ws/message`, window.location.href);
       url.protocol = url.protocol.replace('http', 'ws');
       const isDevServer = process.env.NODE_ENV === 'development';
       const isUsingDevDefaultPort = port === 3000;
-      if (isDevServer && isUsingDevDefaultPort) {
+      if (edgePort !== null) {
+        url.port = edgePort.toString();
+      } else if (isDevServer && isUsingDevDefaultPort) {
         // ugly hack to forward to 8080 for development...
         url.port = '8080';
       } else {
         url.port = port.toString();
       }
+      if (resumeToken !== null && lastSeq !== null) {
+        url.searchParams.set('resume', resumeToken);
+        url.searchParams.set('seq', lastSeq.toString());
+      }
       socket = new WebSocket(url.toString());
       socket.binaryType = 'arraybuffer';
-      socket.onopen = () => resolve();
+      socket.onopen = () => {
+        reconnectAttempts = 0;
+        resolve();
+      };
       socket.onerror = () => reject();
       socket.onmessage = receiveUpdateMessage;
-      socket.onclose = (ev: CloseEvent) => {
-        Object.keys(onCloseListeners).forEach(key => onCloseListeners[key](ev));
-      };
+      socket.onclose = (ev: CloseEvent) => onSocketClosed(port, ev);
     } catch (error) {
       reject(error);
     }
   });
 }
 
-function sendRouteInsertAt(group: Group, atWp: Point, newWp: Point): void {
+async function openSocket(port: number): Promise<void> {
+  return connectSocket(port);
+}
+
+function waypointRef(group: Group, wp: StaticPoint | MovingPoint) {
+  return { index: wp.index, revision: group.route_revision };
+}
+
+function sendRouteInsertAt(group: Group, atWp: StaticPoint | MovingPoint, newWp: Point): void {
   sendMessage('group_route_insert_at', {
     ...pick(group, ['id']),
     new: pick(newWp, ['lat', 'lon']),
-    at: pick(atWp, ['lat', 'lon'])
+    at: waypointRef(group, atWp)
   });
 }
 
-function sendRouteRemove(group: Group, wp: Point): void {
+function sendRouteRemove(group: Group, wp: StaticPoint | MovingPoint): void {
   sendMessage('group_route_remove', {
     ...pick(group, ['id']),
-    point: pick(wp, ['lat', 'lon'])
+    point: waypointRef(group, wp)
   });
 }
 
-function sendRouteModify(group: Group, oldWp: Point, newWp: StaticPoint | MovingPoint): void {
+function sendRouteModify(group: Group, oldWp: StaticPoint | MovingPoint, newWp: StaticPoint | MovingPoint): void {
   sendMessage('group_route_modify', {
     ...pick(group, ['id']),
-    old: pick(oldWp, ['lat', 'lon']),
+    old: waypointRef(group, oldWp),
     new: newWp
   });
 }
@@ -271,6 +448,20 @@ function sendAddFlight(
   });
 }
 
+function sendAddFlights(flights: Array<FlightSpec>): void {
+  sendMessage(
+    'add_flights',
+    flights.map(flight => ({
+      coalition: flight.coalition,
+      country: flight.country,
+      location: { lat: flight.location.lat, lon: flight.location.lng },
+      airport: flight.airport,
+      plane: flight.plane,
+      number_of_planes: flight.numberOfPlanes
+    }))
+  );
+}
+
 function sendAddJTAC(coalition: string, country: string, location: LatLng): void {
   sendMessage('add_jtac', {
     coalition: coalition,
@@ -390,13 +581,18 @@ export const gameService: GameService = {
   sendSaveMission,
   sendLoadMission,
   sendAddFlight,
+  sendAddFlights,
   sendAddJTAC,
   requestSessionId,
   getMission,
   getMissionDir,
+  getMissions,
   getSessions,
   getStaticData,
+  getStaticSection,
+  getStaticType,
   authAdminPassword,
+  getResumeToken,
   registerForMissionUpdates,
   unregisterMissionUpdateListener,
   registerForSessionsUpdate,
@@ -1 +1,3 @@
 export * from './gameService';
+export * from './presenceService';
+export * from './room';
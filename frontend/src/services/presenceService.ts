@@ -0,0 +1,116 @@
+import { Dictionary } from '../models/util';
+import { gameService } from './gameService';
+import { roomPrefix } from './room';
+
+// Fixed little-endian records, see tauntaun_live_editor/presence.py
+// client to server: lat f32, lon f32, selected unit i32
+// server to client: session id u32 followed by the client record
+const CLIENT_RECORD_SIZE = 12;
+const PRESENCE_RECORD_SIZE = 16;
+const SEND_INTERVAL_MS = 50;
+const RECONNECT_DELAY_MS = 2000;
+
+export interface Presence {
+  lat: number;
+  lon: number;
+  selectedUnitId: number;
+}
+
+export type PresenceListener = (updates: Dictionary<Presence | null>) => void;
+
+let socket: WebSocket | null = null;
+let listener: PresenceListener | null = null;
+const own: Presence = { lat: NaN, lon: NaN, selectedUnitId: -1 };
+let dirty = false;
+let sendTimer: ReturnType<typeof setTimeout> | null = null;
+
+function flush(): void {
+  sendTimer = null;
+  if (!dirty || !socket || socket.readyState !== WebSocket.OPEN) {
+    return;
+  }
+  if (socket.bufferedAmount > 0) {
+    // Still sending, the newest value goes out once the socket drained
+    scheduleSend();
+    return;
+  }
+
+  const view = new DataView(new ArrayBuffer(CLIENT_RECORD_SIZE));
+  view.setFloat32(0, own.lat, true);
+  view.setFloat32(4, own.lon, true);
+  view.setInt32(8, own.selectedUnitId, true);
+  socket.send(view.buffer);
+  dirty = false;
+}
+
+function scheduleSend(): void {
+  dirty = true;
+  if (sendTimer === null) {
+    sendTimer = setTimeout(flush, SEND_INTERVAL_MS);
+  }
+}
+
+function receivePresence(event: MessageEvent): void {
+  const view = new DataView(event.data as ArrayBuffer);
+  const updates: Dictionary<Presence | null> = {};
+  for (let offset = 0; offset + PRESENCE_RECORD_SIZE <= view.byteLength; offset += PRESENCE_RECORD_SIZE) {
+    const sessionId = view.getUint32(offset, true);
+    const presence = {
+      lat: view.getFloat32(offset + 4, true),
+      lon: view.getFloat32(offset + 8, true),
+      selectedUnitId: view.getInt32(offset + 12, true)
+    };
+    updates[sessionId] = isNaN(presence.lat) && presence.selectedUnitId === -1 ? null : presence;
+  }
+
+  if (listener) {
+    listener(updates);
+  }
+}
+
+function openPresenceSocket(port: number, sessionId: number, onUpdate: PresenceListener): void {
+  const url = new URL(`${roomPrefix}/ws/presence/${sessionId}`, window.location.href);
+  url.protocol = url.protocol.replace('http', 'ws');
+  const isDevServer = process.env.NODE_ENV === 'development';
+  url.port = isDevServer && port === 3000 ? '8080' : port.toString();
+  const token = gameService.getResumeToken();
+  if (token !== null) {
+    url.searchParams.set('token', token);
+  }
+
+  if (socket) {
+    socket.onclose = null;
+    socket.close();
+  }
+  listener = onUpdate;
+  const presenceSocket = new WebSocket(url.toString());
+  presenceSocket.binaryType = 'arraybuffer';
+  presenceSocket.onmessage = receivePresence;
+  presenceSocket.onopen = () => scheduleSend();
+  presenceSocket.onclose = () => {
+    // The session survives short disconnects, so does its presence
+    setTimeout(() => {
+      if (socket === presenceSocket) {
+        openPresenceSocket(port, sessionId, onUpdate);
+      }
+    }, RECONNECT_DELAY_MS);
+  };
+  socket = presenceSocket;
+}
+
+function sendCursor(lat: number, lon: number): void {
+  own.lat = lat;
+  own.lon = lon;
+  scheduleSend();
+}
+
+function sendSelection(unitId: number | undefined): void {
+  own.selectedUnitId = unitId === undefined ? -1 : unitId;
+  scheduleSend();
+}
+
+export const presenceService = {
+  openPresenceSocket,
+  sendCursor,
+  sendSelection
+};
@@ -0,0 +1,2 @@
+// Pages served under /room/<id>/ talk to that room, any other page to the default room
+export const roomPrefix = (window.location.pathname.match(/^\/room\/[^/]+/) || [''])[0];
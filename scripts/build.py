@@ -1,6 +1,7 @@
 import subprocess as sp
 import os
 import shutil
+import sys
 
 
 def run_cmd(cmd, *args, **kwargs):
@@ -38,6 +39,11 @@ def main():
     cpdst = os.path.join(root, 'tauntaun_live_editor', 'data', 'client')
     print(f'Copying from {cpsrc} to {cpdst}.')
     shutil.copytree(cpsrc, cpdst, dirs_exist_ok=True)
+    # Ship the static data of the installed pydcs, the server then skips generating it on first start
+    os.chdir(root)
+    run_cmd([sys.executable, '-m', 'tauntaun_live_editor.static_data'])
+    # Brotli and gzip variants of the web UI, sent as they are to browsers accepting them
+    run_cmd([sys.executable, '-m', 'tauntaun_live_editor.web_assets'])
     run_possible_bat_command('poetry install', 'bat')
     run_possible_bat_command('poetry build', 'bat')
 
@@ -1,11 +1,20 @@
+from __future__ import annotations
+
 import os
 import os.path
 import itertools
 import argparse
+import asyncio
 import logging
 import sys
 import contextlib
 import io
+import json
+import multiprocessing
+import shutil
+import time
+
+from tauntaun_live_editor.startup import timeline, lazy_import
 
 # Set DCS path environment variables before importing pydcs
 # This might prevent the "Couldn't detect" warnings
@@ -20,28 +29,35 @@ if local_dcs_dir and os.path.exists(local_dcs_dir):
 
 sys.path.append(f"{os.path.dirname(os.path.realpath(__file__))}/dcs")
 
-# Temporarily suppress both stdout and stderr during pydcs import to catch all warnings
-with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
-    import dcs
-    from dcs.flyingunit import FlyingUnit
-    from dcs.point import PointAction, MovingPoint
-    from dcs.translation import String
-    from dcs.unit import Skill
-    from dcs.weapons_data import weapon_ids
-    from dcs import terrain
-    from dcs.terrain.terrain import NoParkingSlotError
-    import dcs.mapping as mapping
-    import dcs.task
+# Importing pydcs scans the DCS installation for liveries and loads every terrain. It is
+# registered lazily so the server can bind first, _import_pydcs loads it afterwards.
+dcs = lazy_import('dcs')
 
 import tauntaun_live_editor.server as server
 import tauntaun_live_editor.config as config
 from tauntaun_live_editor.util import get_dcs_dir, get_data_path, is_posix, Timer, get_miz_path
 from tauntaun_live_editor.coord import lat_lon_to_xz
 from tauntaun_live_editor.sessions import SessionManager
+from tauntaun_live_editor.spatial import SpatialGrid
+from tauntaun_live_editor.parking import ParkingAllocator
+from tauntaun_live_editor.miz import save_incremental
+from tauntaun_live_editor.mission_cache import MissionCache
+from tauntaun_live_editor.journal import Journal
+from tauntaun_live_editor.static_data import get_static_data
+from tauntaun_live_editor.terrain_cache import terrain_cache
+from tauntaun_live_editor.metrics import registry
+import tauntaun_live_editor.mission_loader as mission_loader
+from tauntaun_live_editor.mission_loader import parse_mission_file, parse_mission_in_worker
 from tauntaun_live_editor.first_time_setup import run_first_time_setup_if_needed
 
+mission_parse_seconds = registry.histogram('tauntaun_mission_parse_seconds', 'Time to parse a mission file.')
+mission_load_seconds = registry.histogram('tauntaun_mission_load_seconds',
+                                          'Time to load a mission, parsing and the journal replay included.')
+mission_save_seconds = registry.histogram('tauntaun_mission_save_seconds', 'Time to save a mission, autosaves included.')
+
 # Run first-time setup if needed
-run_first_time_setup_if_needed()
+with timeline.phase('first time setup'):
+    run_first_time_setup_if_needed()
 
 # Suppress noisy livery parsing errors from pydcs
 logging.getLogger('dcs.liveries.livery').setLevel(logging.ERROR)
@@ -64,6 +80,13 @@ logging.getLogger('dcs.vehicles').setLevel(logging.ERROR)
 logging.getLogger('dcs.ships').setLevel(logging.ERROR)
 logging.getLogger('dcs.weapons').setLevel(logging.ERROR)
 
+
+def _import_pydcs():
+    # Temporarily suppress both stdout and stderr during pydcs import to catch all warnings
+    with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+        dcs.Mission
+
+
 _data_dir = get_data_path()
 _build_in_default_mission = os.path.join(_data_dir, 'Missions/default.miz')
 
@@ -71,11 +94,18 @@ def _convert_point(terrain, p):
     lat = float(p['lat'])
     lon = float(p['lon'])
     x, z = lat_lon_to_xz(terrain.name, lat, lon)
-    return mapping.Point(x, z, terrain)
+    return dcs.mapping.Point(x, z, terrain)
+
+
+def route_revision(group):
+    """Number of waypoint inserts and removes applied to group's route since the mission was loaded."""
+    return getattr(group, 'route_revision', 0)
+
 
 class GameService:
     def __init__(self, campaign):
         self.campaign: Campaign = campaign                
+        self._plane_types = {}
         self.group_route_request_handler = GameService.GroupRouteRequestHandler(campaign)
 
     def add_jtac(self, coalition, countryName, location):
@@ -94,42 +124,95 @@ class GameService:
 
         jtac.units[0].player_can_drive = True
         jtac.points[0].tasks.append(dcs.task.SetInvisibleCommand())
+        self.campaign.index_group(jtac, coalition)
 
-    def add_flight(self, coalition, countryName, location, airport, plane, number_of_planes):
-        logging.debug(f"add_flight {location} {airport} {plane} {number_of_planes}")
+    def _plane_type(self, country, plane_id):
+        plane_types = self._plane_types.get(country.name)
+        if plane_types is None:
+            plane_types = self._plane_types[country.name] = {p.id: p for p in country.planes}
 
-        # TODO validate values
+        return plane_types.get(plane_id)
 
+    def _create_flight(self, coalition, countryName, location, airport, plane, number_of_planes):
         location = _convert_point(self.campaign.mission.terrain, location)
-        country = self.campaign.get_countries(coalition)[countryName]
+        country = self.campaign.get_countries(coalition).get(countryName)
+        if country is None:
+            raise ValueError(f"country {countryName} not found")
 
         airport = self.campaign.mission.terrain.airport_by_id(airport)
         if not airport:
-            logging.warning("add_flight airport not found")
-            return
+            raise ValueError("airport not found")
 
-        planeFinder = (p for p in country.planes if p.id == plane)
-        try:
-            plane = next(iter(planeFinder))
-        except StopIteration:
-            logging.warning("add_flight plane not found")
-            return
+        plane = self._plane_type(country, plane)
+        if plane is None:
+            raise ValueError("plane not found")
+
+        group_size = min(number_of_planes, plane.group_size_max)
+        parking_slots = self.campaign.parking.allocate(airport, plane, group_size)
 
         try:
             new_flight = self.campaign.mission.flight_group_from_airport(country,
                                                                          'DefaultName',
                                                                          aircraft_type=plane,
                                                                          airport=airport,
-                                                                         group_size=number_of_planes)
-        except NoParkingSlotError as e:
-            logging.warning(f"add_flight failed error: {e}")
-            return
+                                                                         group_size=group_size,
+                                                                         parking_slots=list(parking_slots))
+        except Exception:
+            self.campaign.parking.release(airport, parking_slots)
+            raise
 
         new_flight.add_waypoint(location, altitude=5000)
-        new_flight.set_skill(Skill.Client)
+        new_flight.set_skill(dcs.unit.Skill.Client)
+        self.campaign.index_group(new_flight, coalition)
+
+        return new_flight
+
+    def add_flight(self, coalition, countryName, location, airport, plane, number_of_planes):
+        logging.debug(f"add_flight {location} {airport} {plane} {number_of_planes}")
+
+        # TODO validate values
+
+        try:
+            new_flight = self._create_flight(coalition, countryName, location, airport, plane, number_of_planes)
+        except (ValueError, dcs.terrain.NoParkingSlotError) as e:
+            logging.warning(f"add_flight failed error: {e}")
+            return
 
         logging.info("add_flight success")
 
+        return new_flight
+
+    def add_flights(self, flights):
+        """Creates every flight it can, returns one result dict per requested flight."""
+        logging.debug(f"add_flights {len(flights)} flights")
+
+        results = []
+        for flight in flights:
+            if not isinstance(flight, dict):
+                results.append({'success': False, 'error': "flight must be an object"})
+                continue
+            try:
+                new_flight = self._create_flight(flight['coalition'],
+                                                 flight['country'],
+                                                 flight['location'],
+                                                 flight['airport'],
+                                                 flight['plane'],
+                                                 flight['number_of_planes'])
+            except KeyError as e:
+                results.append({'success': False, 'error': f"missing field {e}"})
+            except (ValueError, dcs.terrain.NoParkingSlotError) as e:
+                logging.warning(f"add_flights failed error: {e}")
+                results.append({'success': False, 'error': str(e)})
+            else:
+                results.append({'success': True,
+                                'coalition': flight['coalition'],
+                                'country': flight['country'],
+                                'group': new_flight})
+
+        logging.info(f"add_flights {sum(r['success'] for r in results)}/{len(flights)} added")
+
+        return results
+
     def update_unit_loadout(self, unit_id, pylons, chaff, flare, gun, fuel):
         logging.info(f"update_unit_loadout {unit_id} {pylons} {chaff} {flare} {gun} {fuel}")
 
@@ -137,11 +220,11 @@ class GameService:
         # unit attributes and can corrupt the mission file
         # ("good enough for mvp" :tm:)
 
-        unit: FlyingUnit = self.campaign.lookup_unit(unit_id)
+        unit: dcs.flyingunit.FlyingUnit = self.campaign.lookup_unit(unit_id)
 
         mapped_pylons = {}
         for k in pylons:
-            clsid = weapon_ids[pylons[k]]['clsid']
+            clsid = dcs.weapons_data.weapon_ids[pylons[k]]['clsid']
             assert(clsid is not None)
             mapped_pylons[int(k)] = {
                 'CLSID': clsid
@@ -176,22 +259,26 @@ class GameService:
             self.campaign = campaign
 
         @staticmethod
-        def _is_same_point(a, b):
-            # For now the position uniquely identifies the waypoint
-            coord_drift_threshold = 1  # meter
-            return a.distance_to_point(b) < coord_drift_threshold
+        def _waypoint_index(group, wp):
+            # Indexes only hold for the route revision the client saw, a concurrent insert or remove shifts them
+            if wp.get('revision') != route_revision(group):
+                return None
+            index = wp.get('index')
+            if isinstance(index, int) and 0 <= index < len(group.points):
+                return index
+            return None
 
         def remove(self, group_id, wp):
             group = self.campaign.lookup_group(group_id)
             if group is None:
                 raise ValueError(f"no group found with id {group_id}")
 
-            converted_wp = _convert_point(self.campaign.mission.terrain, wp)
-            wp_index = [u_index for u_index, u in enumerate(group.points) if self._is_same_point(u.position, converted_wp)]
+            wp_index = self._waypoint_index(group, wp)
 
-            if wp_index:
+            if wp_index is not None:
                 logging.info(f"Removing waypoint {wp_index}")
-                group.points.pop(wp_index[0])
+                group.points.pop(wp_index)
+                group.route_revision = route_revision(group) + 1
             else:
                 logging.warning("Failed to remove waypoint")
 
@@ -202,13 +289,11 @@ class GameService:
             if group is None:
                 raise ValueError(f"no group found with id {group_id}")
 
-            converted_at_wp = _convert_point(self.campaign.mission.terrain, at_wp)
-            at_index = [u_index for u_index, u in enumerate(group.points) if self._is_same_point(u.position, converted_at_wp)]
+            at_index = self._waypoint_index(group, at_wp)
 
-            if at_index:
+            if at_index is not None:
                 converted_new_wp = _convert_point(self.campaign.mission.terrain, new_wp)
                 logging.info(f"New waypoint added at position {at_index}")
-                at_index = at_index[0]
                 if issubclass(group.__class__, dcs.unitgroup.FlyingGroup):
                     prev_waypoints_altitude = group.points[at_index - 1].alt
                     wp = group.add_waypoint(converted_new_wp, altitude=prev_waypoints_altitude)
@@ -216,6 +301,7 @@ class GameService:
                     wp = group.add_waypoint(converted_new_wp)
                 group.points.pop()
                 group.points.insert(at_index, wp)
+                group.route_revision = route_revision(group) + 1
             else:
                 logging.warning("Failed to add new waypoint")
 
@@ -226,19 +312,18 @@ class GameService:
             if group is None:
                 raise ValueError(f"no group found with id {group_id}")
 
-            converted_old_wp = _convert_point(self.campaign.mission.terrain, old_wp)
-            old_wp_index = [u_index for u_index, u in enumerate(group.points) if self._is_same_point(u.position, converted_old_wp)]
+            old_wp_index = self._waypoint_index(group, old_wp)
 
-            if old_wp_index:
-                wp = group.points[old_wp_index[0]]
+            if old_wp_index is not None:
+                wp = group.points[old_wp_index]
                 wp.alt = new_wp['alt']
                 wp.type = new_wp['type']
                 wp.name = new_wp['name']
 
                 wp.position = _convert_point(self.campaign.mission.terrain, new_wp['position'])
                 wp.speed = new_wp['speed']
-                wp.action = PointAction[new_wp['action']]
-                if isinstance(wp, MovingPoint):
+                wp.action = dcs.point.PointAction[new_wp['action']]
+                if isinstance(wp, dcs.point.MovingPoint):
                     wp.alt_type = new_wp['alt_type']
 
                 logging.info(f"Waypoint {old_wp_index} modified")
@@ -247,20 +332,61 @@ class GameService:
 
             return group
 
+# Mission edits sent by clients, applied live and replayed from the journal after a restart
+_OPERATIONS = {
+    'group_route_insert_at': lambda gs, v: gs.group_route_request_handler.insert_at(v['id'], v['new'], v['at']),
+    'group_route_remove': lambda gs, v: gs.group_route_request_handler.remove(v['id'], v['point']),
+    'group_route_modify': lambda gs, v: gs.group_route_request_handler.modify(v['id'], v['old'], v['new']),
+    'add_flight': lambda gs, v: gs.add_flight(v['coalition'], v['country'], v['location'], v['airport'], v['plane'],
+                                              v['number_of_planes']),
+    'add_flights': lambda gs, v: gs.add_flights(v),
+    'add_jtac': lambda gs, v: gs.add_jtac(v['coalition'], v['country'], v['location']),
+    'unit_loadout_update': lambda gs, v: gs.update_unit_loadout(v['id'], v['pylons'], v['chaff'], v['flare'],
+                                                                v['gun'], v['fuel']),
+    'set_bullseye': lambda gs, v: gs.set_bullseye(v['coalition'], v['bullseye']),
+}
+
 class Campaign():
     def __init__(self):
-        self.mission: dcs.Mission = None
+        self._mission: dcs.Mission = None
+        self._group_index = {}
+        self._group_side = {}
+        self._unit_index = {}
+        self._spatial = {}
+        self.parking = ParkingAllocator()
         self.game_service = GameService(self)
         self.autosave_timer = Timer(15, self.create_autosave_callback(), True)
         self.loaded_mission_path = None
+        self.mission_cache: MissionCache = None
+        self.journal: Journal = None
+        # Set for rooms, their missions are edited as a copy in here
+        self.working_dir = None
+        # Bumped on every change to the mission, lets derived data be cached per revision
+        self.revision = 0
+        self._load_generation = 0
+        self._load_started = None
 
     def create_autosave_callback(self):
         async def autosave_callback():
+            # With a journal every edit is already on disk, the .miz is only rewritten to compact it
+            if self.journal is not None and not self.journal.needs_snapshot():
+                return
+
             self.save_mission()
             logging.debug("Autosave: mission saved.")
 
         return autosave_callback
 
+    @property
+    def mission(self) -> dcs.Mission:
+        return self._mission
+
+    @mission.setter
+    def mission(self, mission: dcs.Mission):
+        self._mission = mission
+        self.revision += 1
+        self.rebuild_indexes()
+
     def get_countries(self, side):
         return self.mission.coalition[side].countries
 
@@ -286,50 +412,102 @@ class Campaign():
         countries = self.get_countries(side)
         return itertools.chain(*(countries[cname].vehicle_group for cname in countries))
 
-    def lookup_unit(self, unit_id):
-        # TODO
-        for unit in self.get_plane_group_units('blue'):
-            if unit_id == unit.id:
-                return unit
-
-        for unit in self.get_plane_group_units('red'):
-            if unit_id == unit.id:
-                return unit
-
-    def lookup_group(self, group_id):
-
-        # TODO
-        for group in self.get_plane_groups('blue'):
-            if group_id == group.id:
-                return group
-
-        for group in self.get_ship_groups('blue'):
-            if group_id == group.id:
-                return group
-
-        for group in self.get_helicopter_groups('blue'):
-            if group_id == group.id:
-                return group
-
-        for group in self.get_vehicle_groups('blue'):
-            if group_id == group.id:
-                return group
-
-        for group in self.get_plane_groups('red'):
-            if group_id == group.id:
-                return group
+    def get_groups(self, side):
+        countries = self.get_countries(side)
+        for cname in countries:
+            country = countries[cname]
+            yield from country.plane_group
+            yield from country.ship_group
+            yield from country.helicopter_group
+            yield from country.vehicle_group
+
+    def _spatial_grid(self, side, kind):
+        return self._spatial.setdefault((side, kind), SpatialGrid())
+
+    def index_group(self, group, side):
+        self._group_index[group.id] = group
+        self._group_side[group.id] = side
+        for unit in group.units:
+            self._unit_index[unit.id] = unit
+
+        self.update_spatial(group)
+
+    def update_spatial(self, group):
+        side = self._group_side[group.id]
+        if group.units:
+            position = group.position
+            self._spatial_grid(side, 'group').insert(group.id, position.x, position.y, group)
+
+        unit_grid = self._spatial_grid(side, 'unit')
+        for unit in group.units:
+            unit_grid.insert(unit.id, unit.position.x, unit.position.y, unit)
+
+    def rebuild_indexes(self):
+        self._group_index = {}
+        self._group_side = {}
+        self._unit_index = {}
+        self._spatial = {}
+        self.parking.reset()
+        if self._mission is None:
+            return
 
-        for group in self.get_ship_groups('red'):
-            if group_id == group.id:
-                return group
+        for side in self.mission.coalition:
+            for group in self.get_groups(side):
+                self.index_group(group, side)
+
+        for airport in self.mission.terrain.airports.values():
+            self.index_airport(airport)
+
+    def index_airport(self, airport):
+        for side in ('blue', 'red', 'neutrals'):
+            self._spatial_grid(side, 'airport').remove(airport.id)
+        side = 'neutrals' if airport.coalition == 'NEUTRAL' else airport.coalition.lower()
+        self._spatial_grid(side, 'airport').insert(airport.id, airport.position.x, airport.position.y, airport)
+
+    def set_airport_coalition(self, airport, side):
+        airport.set_coalition(side)
+        self.index_airport(airport)
+
+    def check_indexes(self):
+        """Compare the id indexes against a full scan of the mission, returns a list of mismatches."""
+        errors = []
+        groups = {}
+        if self._mission is not None:
+            groups = {g.id: g for side in self.mission.coalition for g in self.get_groups(side)}
+        units = {u.id: u for g in groups.values() for u in g.units}
+
+        for name, index, expected in (('group', self._group_index, groups), ('unit', self._unit_index, units)):
+            for id in expected.keys() - index.keys():
+                errors.append(f"{name} {id} missing from index")
+            for id in index.keys() - expected.keys():
+                errors.append(f"{name} {id} is stale in index")
+            for id in expected.keys() & index.keys():
+                if index[id] is not expected[id]:
+                    errors.append(f"{name} {id} indexed to a different object")
+
+        for group in groups.values():
+            grid = self._spatial.get((self._group_side.get(group.id), 'unit'))
+            for unit in group.units:
+                if grid is None or unit.id not in grid:
+                    errors.append(f"unit {unit.id} missing from spatial index")
+
+        return errors
+
+    def query_nearby(self, x, y, radius, kind=None, side=None):
+        """Returns (side, kind, object, distance) tuples within radius meters of x/y, nearest first."""
+        result = []
+        for (grid_side, grid_kind), grid in self._spatial.items():
+            if (kind is None or grid_kind == kind) and (side is None or grid_side == side):
+                result.extend((grid_side, grid_kind, item, distance) for _, item, distance in grid.query(x, y, radius))
+
+        result.sort(key=lambda r: r[3])
+        return result
 
-        for group in self.get_helicopter_groups('red'):
-            if group_id == group.id:
-                return group
+    def lookup_unit(self, unit_id):
+        return self._unit_index.get(unit_id)
 
-        for group in self.get_vehicle_groups('red'):
-            if group_id == group.id:
-                return group
+    def lookup_group(self, group_id):
+        return self._group_index.get(group_id)
 
     def update_unit_route(self, unit_id, points):
         group = self.lookup_group(unit_id)
@@ -339,9 +517,90 @@ class Campaign():
             lat = float(new_pos['lat'])
             lon = float(new_pos['lon'])
             x, z = lat_lon_to_xz(self.mission.terrain.name, lat, lon)
-            point.position = mapping.Point(x, z, self.mission.terrain)
+            point.position = dcs.mapping.Point(x, z, self.mission.terrain)
+
+    def apply_operation(self, key, value):
+        """Applies a client edit to the mission and appends it to the journal."""
+        result = _OPERATIONS[key](self.game_service, value)
+        self.revision += 1
+        if self.journal is not None:
+            self.journal.append(key, value)
+        return result
+
+    def _open_journal(self, filename):
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+
+        if filename == _build_in_default_mission or not config.config.journal:
+            return
+
+        self.journal = Journal(filename)
+        records = self.journal.open()
+        for record in records:
+            try:
+                _OPERATIONS[record['key']](self.game_service, record['value'])
+            except Exception as e:
+                logging.warning(f"Unable to replay journaled {record['key']}: {e}")
+
+        if records:
+            logging.info(f"Replayed {len(records)} journaled edits on {filename}")
 
-    def load_mission(self, filename):
+    def parse_mission(self, filename):
+        with mission_parse_seconds.time():
+            return parse_mission_file(filename, self.mission_cache)
+
+    async def load_mission_async(self, filename, on_progress=None):
+        """Parses filename in a worker process and swaps it in only if parsing succeeded.
+
+        on_progress is awaited with a dict holding the filename and the stage
+        (parsing, done, failed or superseded when a newer load finished first).
+        """
+        async def progress(stage, **kwargs):
+            if on_progress:
+                await on_progress({'filename': os.path.basename(filename), 'stage': stage, **kwargs})
+
+        if not os.path.isfile(filename):
+            logging.warning(f"Unable to load mission file not found {filename}")
+            await progress('failed', error='file not found')
+            return False
+
+        generation = self.begin_load()
+
+        await progress('parsing')
+        try:
+            with mission_parse_seconds.time():
+                mission = await parse_mission_in_worker(filename, self.mission_cache)
+        except Exception as e:
+            logging.error(f"Failed to load mission {filename}: {e}")
+            await progress('failed', error=str(e))
+            return False
+
+        if not self.finish_load(generation, filename, mission):
+            await progress('superseded')
+            return False
+
+        await progress('done')
+        return True
+
+    def begin_load(self):
+        """Starts loading a mission parsed elsewhere, returns the generation to pass to finish_load."""
+        self._load_generation += 1
+        self._load_started = time.perf_counter()
+        return self._load_generation
+
+    def finish_load(self, generation, filename, mission):
+        """Swaps in mission unless a load begun later was requested, returns whether it did."""
+        if generation != self._load_generation:
+            logging.info(f"Discarding {filename}, a newer mission load was requested")
+            return False
+
+        self.load_mission(filename, mission)
+        # Only the latest load can finish, its parse is timed along
+        mission_load_seconds.observe(time.perf_counter() - self._load_started)
+        return True
+
+    def load_mission(self, filename, mission=None):
         if self.autosave_timer.is_running():
             self.autosave_timer.cancel()
 
@@ -349,10 +608,14 @@ class Campaign():
             logging.warning(f"Unable to load mission file not found {filename}")
             return
         
-        self.mission.load_file(filename, True)
+        self.mission = mission if mission is not None else self.parse_mission(filename)
+        filename = self._working_copy(filename)
         self.loaded_mission_path = filename
+        self._remember_mission()
         logging.info(f"Mission loaded from {filename}")
 
+        self._open_journal(filename)
+
         if _build_in_default_mission != filename:
             if config.config.autosave:
                 logging.debug("Autosave enabled: starting timer.")
@@ -371,13 +634,66 @@ class Campaign():
                 logging.error("No filename given, unable to save mission.")
                 return
 
-        self.mission.save(filename)
+        with mission_save_seconds.time():
+            save_incremental(self.mission, self.loaded_mission_path, filename)
+
+        # The saved file holds every journaled edit, continue with an empty journal next to it
+        if self.journal is not None:
+            if filename == self.journal.mission_path:
+                self.journal.reset()
+            else:
+                self.journal.remove()
+                self._open_journal(filename)
 
         if filename != self.loaded_mission_path:
             self.loaded_mission_path = filename
+            self._remember_mission()
 
         logging.info(f"Mission saved to {filename}")
 
+    def _working_copy(self, filename):
+        # Rooms loading the same mission must not autosave over each other
+        if self.working_dir is None or os.path.dirname(os.path.abspath(filename)) == os.path.abspath(self.working_dir):
+            return filename
+
+        os.makedirs(self.working_dir, exist_ok=True)
+        working_copy = os.path.join(self.working_dir, os.path.basename(filename))
+        shutil.copyfile(filename, working_copy)
+        return working_copy
+
+    def _remember_mission(self):
+        if self.working_dir is None:
+            return
+
+        try:
+            with open(os.path.join(self.working_dir, 'room.json'), 'w') as fp:
+                json.dump({'mission': self.loaded_mission_path}, fp)
+        except OSError as e:
+            logging.warning(f"Unable to record the mission of room {self.working_dir}: {e}")
+
+    def remembered_mission(self):
+        """The mission a room had loaded when it was last unloaded, None if there is none."""
+        if self.working_dir is None:
+            return None
+
+        try:
+            with open(os.path.join(self.working_dir, 'room.json'), 'r') as fp:
+                filename = json.load(fp).get('mission')
+        except (OSError, ValueError):
+            return None
+        return filename if filename and os.path.isfile(filename) else None
+
+    def close(self):
+        """Stops autosaving, edits not yet in the mission file stay in the journal or are saved now."""
+        if self.autosave_timer.is_running():
+            self.autosave_timer.cancel()
+
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
+        elif self.loaded_mission_path is not None and self.loaded_mission_path != _build_in_default_mission:
+            self.save_mission()
+
 def _setup_logging(log_path = None):
     rootLogger = logging.getLogger()
     logFormatter = logging.Formatter("%(asctime)s.%(msecs)03d [%(levelname)-5.5s]  %(message)s",
@@ -395,29 +711,32 @@ def main():
     parser = argparse.ArgumentParser(description='Tauntaun live editor server.')
     parser.add_argument('--config', help="path to config.json", type=str)
     parser.add_argument('--log', help="path to tauntaun.log", type=str)
+    parser.add_argument('--profile-startup', help="log the duration of every startup phase", action='store_true')
 
     args = parser.parse_args()
 
     _setup_logging(args.log)
     logging.info("--------------------------------------------------")
     logging.info("Tauntaun started.")
+    timeline.verbose = args.profile_startup
 
     try:
-        config.load_config(args.config)
+        with timeline.phase('load config'):
+            config.load_config(args.config)
 
         # Check DCS directory before creating mission to suppress warnings
-        dcs_dir = get_dcs_dir()
+        with timeline.phase('detect DCS directory'):
+            dcs_dir = get_dcs_dir()
         if dcs_dir:
             logging.info(f"DCS directory detected: {dcs_dir}")
         else:
             logging.warning("DCS directory not found - some features may be limited")
 
         c = Campaign()
-        
-        # Suppress stderr during mission creation to catch pydcs warnings
-        with contextlib.redirect_stderr(io.StringIO()):
-            c.mission = dcs.Mission(terrain.Caucasus())
-        
+        if config.config.mission_cache_size_mb > 0:
+            c.mission_cache = MissionCache(config.get_datadir() / "mission_cache",
+                                           config.config.mission_cache_size_mb * 1024 * 1024)
+
         session_manager = SessionManager()
 
         if config.config.default_mission:
@@ -426,17 +745,52 @@ def main():
         else:
             defualt_miz_path = _build_in_default_mission
 
-        if os.path.isfile(defualt_miz_path):
-            c.load_mission(defualt_miz_path)
-        else:
-            logging.warning("Unable to load default mission, using empty mission!")
-            batumi = next(a for a in c.mission.terrain.airports.values() if a.name == 'Batumi')
-            if batumi is None:
-                logging.error("Batumi airport not found in terrain.airports")
-            else:
-                batumi.set_blue()
-
-        server.run(c, session_manager, config.config.port)
+        async def load_default_mission(campaign):
+            if not (os.path.isfile(defualt_miz_path) and await campaign.load_mission_async(defualt_miz_path)):
+                logging.warning("Unable to load default mission, using empty mission!")
+                # Suppress stderr during mission creation to catch pydcs warnings
+                with contextlib.redirect_stderr(io.StringIO()):
+                    campaign.mission = dcs.Mission(terrain_cache.checkout('Caucasus'))
+                batumi = next(a for a in campaign.mission.terrain.airports.values() if a.name == 'Batumi')
+                if batumi is None:
+                    logging.error("Batumi airport not found in terrain.airports")
+                else:
+                    campaign.set_airport_coalition(batumi, 'blue')
+
+        async def create_room_campaign(room_id):
+            # Rooms share the mission cache, terrains and static data with the default room
+            room = Campaign()
+            room.mission_cache = c.mission_cache
+            room.working_dir = str(config.get_datadir() / "rooms" / room_id)
+            remembered = room.remembered_mission()
+            if remembered is None or not await room.load_mission_async(remembered):
+                await load_default_mission(room)
+            return room
+
+        async def load_startup_mission():
+            # Runs after the port is bound, requests needing the mission wait for it
+            try:
+                with timeline.phase('import pydcs'):
+                    await asyncio.get_event_loop().run_in_executor(None, _import_pydcs)
+
+                with timeline.phase('load static data'):
+                    await asyncio.get_event_loop().run_in_executor(None, get_static_data)
+
+                if config.config.prewarm_terrains:
+                    with timeline.phase('prewarm terrains'):
+                        await asyncio.get_event_loop().run_in_executor(None, terrain_cache.prewarm,
+                                                                       config.config.prewarm_terrains)
+
+                with timeline.phase('load default mission'):
+                    await load_default_mission(c)
+            except Exception:
+                logging.exception('Unable to load the startup mission')
+
+            timeline.report()
+
+        server.run(c, session_manager, config.config.port, on_startup=load_startup_mission,
+                   create_room_campaign=create_room_campaign)
+        mission_loader.shutdown()
 
     except Exception as e:
         logging.exception('Got exception on main handler')
@@ -446,4 +800,6 @@ def main():
 
 
 if __name__ == '__main__':
+    # Mission parsing runs in a worker process, needed for frozen Windows builds
+    multiprocessing.freeze_support()
     main()
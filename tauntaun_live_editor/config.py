@@ -1,7 +1,8 @@
 import sys
 import os
 import pathlib
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import List
 from dataclasses_json import dataclass_json
 
 @dataclass_json
@@ -14,6 +15,13 @@ class Config:
     missions_directory: str = ""
     port: int = 8080
     dcs_directory: str = ""
+    mission_cache_size_mb: int = 512
+    max_upload_size_mb: int = 100
+    journal: bool = True
+    prewarm_terrains: List[str] = field(default_factory=list)
+    max_rooms: int = 16
+    room_idle_timeout_minutes: int = 10
+    edge_workers: int = 0
 
 def _get_datadir() -> pathlib.Path:
 
@@ -73,6 +81,9 @@ class _ConfigFileManager:
             config_json = config.to_json()
             fp.write(config_json)
 
+def get_datadir() -> pathlib.Path:
+    return _ConfigFileManager.datadir
+
 config = None
 
 def load_config(config_path_str = None):
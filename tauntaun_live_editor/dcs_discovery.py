@@ -0,0 +1,260 @@
+"""
+Discovery of DCS installations and DCS Saved Games directories, shared by the first
+time setup, setup-dcs-path.py and util.get_dcs_dir.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import queue
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+import tauntaun_live_editor.config as config
+
+
+INSTALL = 'install'
+SAVED_GAMES = 'saved_games'
+
+_WINDOWS_INSTALL_DIRS = [
+    "Program Files/Eagle Dynamics/DCS World",
+    "Program Files/Eagle Dynamics/DCS World OpenBeta",
+    "Program Files (x86)/Eagle Dynamics/DCS World",
+    "Program Files (x86)/Eagle Dynamics/DCS World OpenBeta",
+    "DCS World",
+    "DCS World OpenBeta",
+]
+
+
+def candidate_paths(platform: str = sys.platform) -> List[Tuple[str, str]]:
+    """Returns (kind, path) pairs to probe in order of preference, paths may contain wildcards."""
+    if platform == "win32":
+        drives = [chr(letter) for letter in range(ord('C'), ord('Z') + 1)]
+        installs = [f"{drive}:/{path}" for path in _WINDOWS_INSTALL_DIRS for drive in drives]
+        saved_games = os.path.join(os.environ.get('USERPROFILE', ''), 'Saved Games')
+        saved_games_paths = [
+            os.path.join(saved_games, "DCS"),
+            os.path.join(saved_games, "DCS.openbeta"),
+            os.path.join(saved_games, "DCS.openbeta_server")
+        ]
+    elif platform == "linux":
+        installs = [
+            "/opt/DCS World",
+            "/opt/DCS World OpenBeta",
+            "/usr/local/DCS World",
+            "/usr/local/DCS World OpenBeta",
+            "/home/*/DCS World",
+            "/home/*/DCS World OpenBeta",
+            "/home/*/Games/DCS World",
+            "/home/*/Games/DCS World OpenBeta",
+            "/home/*/.steam/steam/steamapps/common/DCSWorld",
+            "/home/*/.steam/steam/steamapps/common/DCSWorldOpenBeta"
+        ]
+        home = os.path.expanduser("~")
+        saved_games_paths = [
+            os.path.join(home, ".config/DCS"),
+            os.path.join(home, ".config/DCS.openbeta"),
+            os.path.join(home, ".local/share/DCS"),
+            os.path.join(home, ".local/share/DCS.openbeta")
+        ]
+    elif platform == "darwin":
+        installs = [
+            "/Applications/DCS World.app",
+            "/Applications/DCS World OpenBeta.app",
+            "/Users/*/Applications/DCS World.app",
+            "/Users/*/Applications/DCS World OpenBeta.app",
+            "/Users/*/Games/DCS World.app",
+            "/Users/*/Games/DCS World OpenBeta.app"
+        ]
+        home = os.path.expanduser("~")
+        saved_games_paths = [
+            os.path.join(home, "Library/Application Support/DCS"),
+            os.path.join(home, "Library/Application Support/DCS.openbeta"),
+            os.path.join(home, "Documents/DCS"),
+            os.path.join(home, "Documents/DCS.openbeta")
+        ]
+    else:
+        installs = []
+        saved_games_paths = []
+
+    return [(INSTALL, path) for path in installs] + [(SAVED_GAMES, path) for path in saved_games_paths]
+
+
+def _existing_paths(pattern: str) -> List[str]:
+    if "*" in pattern:
+        return [path for path in sorted(glob.glob(pattern)) if os.path.exists(path)]
+    return [pattern] if os.path.exists(pattern) else []
+
+
+def _anchor(pattern: str) -> str:
+    return pathlib.PurePath(pattern).anchor or pattern
+
+
+def probe_concurrently(items, probe, timeout: float, workers: int) -> Dict:
+    """Runs probe(item) for all items on a pool of daemon threads and returns item -> result.
+
+    Items whose probe runs longer than timeout are left out. The threads are daemons, a
+    probe stuck on a dead network drive neither delays the caller nor the interpreter exit.
+    """
+    items = list(dict.fromkeys(items))
+    if not items:
+        return {}
+
+    pending = queue.Queue()
+    for item in items:
+        pending.put(item)
+
+    results = {}
+    started = {}
+    condition = threading.Condition()
+
+    def worker():
+        while True:
+            try:
+                item = pending.get_nowait()
+            except queue.Empty:
+                return
+
+            with condition:
+                started[item] = time.monotonic()
+            try:
+                result = probe(item)
+            except OSError:
+                result = None
+            with condition:
+                results[item] = result
+                condition.notify_all()
+
+    worker_count = min(workers, len(items))
+    for _ in range(worker_count):
+        threading.Thread(target=worker, daemon=True, name='dcs-discovery').start()
+
+    # Every probe gets timeout from its own start, the waves of a busy pool add up
+    deadline = time.monotonic() + timeout * (-(-len(items) // worker_count))
+    with condition:
+        while True:
+            now = time.monotonic()
+            unresolved = [item for item in items if item not in results]
+            timed_out = [item for item in unresolved if item in started and now - started[item] >= timeout]
+            if len(unresolved) == len(timed_out) or now >= deadline:
+                break
+            condition.wait(0.05)
+
+        for item in unresolved:
+            if item not in results:
+                logging.warning(f"Gave up probing {item}, no answer within {timeout} s")
+        return dict(results)
+
+
+class DcsDiscovery:
+    """Finds DCS installations and Saved Games directories.
+
+    The anchors (drive letters) of the candidates are probed first, so a dead network
+    drive costs a single probe, then the candidates on the live ones. The found paths
+    are cached in cache_path and reused as long as the candidate list is unchanged, the
+    cache is younger than max_age and every cached path still exists.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None, probe_timeout: float = 2.0, workers: int = 32,
+                 max_age: float = 24 * 3600, platform: str = sys.platform):
+        self.cache_path = str(cache_path) if cache_path else None
+        self.probe_timeout = probe_timeout
+        self.workers = workers
+        self.max_age = max_age
+        self.platform = platform
+        self._found = None
+        self._lock = threading.Lock()
+
+    def _candidates_key(self, candidates) -> str:
+        return hashlib.sha256(json.dumps(candidates).encode('utf-8')).hexdigest()
+
+    def _load_cache(self, key: str) -> Optional[Dict[str, List[str]]]:
+        if not self.cache_path or not os.path.isfile(self.cache_path):
+            return None
+
+        try:
+            with open(self.cache_path, 'r') as fp:
+                cached = json.load(fp)
+        except (OSError, ValueError):
+            return None
+
+        if cached.get('candidates') != key or time.time() - cached.get('time', 0) > self.max_age:
+            return None
+
+        found = cached.get('found', {})
+        paths = [path for kind_paths in found.values() for path in kind_paths]
+        alive = probe_concurrently(paths, os.path.exists, self.probe_timeout, self.workers)
+        if not all(alive.get(path) for path in paths):
+            return None
+
+        return found
+
+    def _save_cache(self, key: str, found: Dict[str, List[str]]):
+        if not self.cache_path:
+            return
+
+        cache_dir = os.path.dirname(self.cache_path)
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=cache_dir)
+            with os.fdopen(fd, 'w') as fp:
+                json.dump({'candidates': key, 'time': time.time(), 'found': found}, fp)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logging.warning(f"Unable to write DCS discovery cache: {e}")
+
+    def _probe(self, candidates) -> Dict[str, List[str]]:
+        anchors = probe_concurrently([_anchor(path) for _, path in candidates], os.path.exists,
+                                     self.probe_timeout, self.workers)
+        live = [(kind, path) for kind, path in candidates if anchors.get(_anchor(path))]
+        existing = probe_concurrently([path for _, path in live], _existing_paths, self.probe_timeout, self.workers)
+
+        found = {INSTALL: [], SAVED_GAMES: []}
+        for kind, path in live:
+            for existing_path in existing.get(path) or []:
+                if existing_path not in found[kind]:
+                    found[kind].append(existing_path)
+        return found
+
+    def discover(self, refresh: bool = False) -> Dict[str, List[str]]:
+        """Returns the existing paths by kind, INSTALL and SAVED_GAMES, in order of preference."""
+        with self._lock:
+            if self._found is not None and not refresh:
+                return self._found
+
+            candidates = candidate_paths(self.platform)
+            key = self._candidates_key(candidates)
+            found = None if refresh else self._load_cache(key)
+            if found is None:
+                found = self._probe(candidates)
+                self._save_cache(key, found)
+
+            self._found = found
+            return found
+
+    def installations(self, refresh: bool = False) -> List[str]:
+        """Installation directories followed by Saved Games directories."""
+        found = self.discover(refresh)
+        return found[INSTALL] + found[SAVED_GAMES]
+
+    def dcs_dir(self) -> str:
+        """The Saved Games directory pydcs reads, or an installation directory if there is none."""
+        found = self.discover()
+        paths = found[SAVED_GAMES] + found[INSTALL]
+        return paths[0] if paths else ""
+
+
+_discovery = None
+
+
+def get_discovery() -> DcsDiscovery:
+    global _discovery
+    if _discovery is None:
+        _discovery = DcsDiscovery(config.get_datadir() / "dcs_installations.json")
+    return _discovery
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+
+
+class Journal:
+    """Append-only log of the edits applied since the mission file was last written.
+
+    The journal lives next to the mission as <mission>.journal. Its first line records
+    the size and mtime of the mission file it applies to, so a journal left behind by
+    a crash between writing a snapshot and resetting the journal is never replayed on
+    top of the snapshot that already contains its edits. Appends are batched and the
+    file is fsynced once per batch.
+    """
+
+    def __init__(self, mission_path, flush_delay=0.05):
+        self.mission_path = mission_path
+        self.path = mission_path + '.journal'
+        self.flush_delay = flush_delay
+        self.records = 0
+        self.first_record_time = None
+        self._fp = None
+        self._pending = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flush_task = None
+
+    def _base(self):
+        stat = os.stat(self.mission_path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    def _read(self):
+        if not os.path.isfile(self.path):
+            return []
+
+        records = []
+        with open(self.path, 'r', encoding='utf-8') as fp:
+            try:
+                header = json.loads(fp.readline())
+            except ValueError:
+                header = None
+
+            if not header or header.get('base') != self._base():
+                logging.info(f"Discarding journal {self.path}, the mission file changed since it was written")
+                return []
+
+            for line in fp:
+                try:
+                    records.append(json.loads(line))
+                except ValueError:
+                    # Torn write of the last batch before a crash
+                    logging.warning(f"Ignoring truncated record in journal {self.path}")
+                    break
+
+        return records
+
+    def _rewrite(self, records):
+        self.close()
+
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as fp:
+            fp.write(json.dumps({'base': self._base()}) + '\n')
+            for record in records:
+                fp.write(json.dumps(record) + '\n')
+            fp.flush()
+            os.fsync(fp.fileno())
+        os.replace(tmp_path, self.path)
+
+        self._fp = open(self.path, 'a', encoding='utf-8')
+        self.records = len(records)
+        self.first_record_time = time.monotonic() if records else None
+
+    def open(self):
+        """Returns the records journaled against the current mission file and appends after them."""
+        records = self._read()
+        self._rewrite(records)
+        return records
+
+    def reset(self):
+        """Starts an empty journal, called once the mission file contains every journaled edit."""
+        with self._lock:
+            self._pending = []
+        self._rewrite([])
+
+    def append(self, key, value):
+        line = json.dumps({'key': key, 'value': value}) + '\n'
+        with self._lock:
+            self._pending.append(line)
+
+        self.records += 1
+        if self.first_record_time is None:
+            self.first_record_time = time.monotonic()
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+
+        # Group commit, every append until the delay expires shares one fsync
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_delay)
+        await asyncio.get_running_loop().run_in_executor(None, self.flush)
+
+    def flush(self):
+        with self._write_lock:
+            with self._lock:
+                lines, self._pending = self._pending, []
+
+            if not lines or self._fp is None:
+                return
+
+            self._fp.write(''.join(lines))
+            self._fp.flush()
+            os.fsync(self._fp.fileno())
+
+    def needs_snapshot(self, max_records=1000, max_age=300):
+        if not self.records:
+            return False
+        return self.records >= max_records or time.monotonic() - self.first_record_time >= max_age
+
+    def close(self):
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            self._flush_task = None
+
+        if self._fp is not None:
+            self.flush()
+            with self._write_lock:
+                self._fp.close()
+                self._fp = None
+
+    def remove(self):
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
@@ -0,0 +1,164 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+
+from tauntaun_live_editor.mission_info import read_mission_info
+
+
+def _mission_summary(filename):
+    info = read_mission_info(filename)
+    del info['unit_types']
+    return info
+
+
+class MissionLibrary:
+    """Index of the .miz files under a set of named directories.
+
+    Refreshing only stats the files, metadata is read again for new files and for
+    files whose mtime or size changed. The index is kept in cache_path so a restart
+    does not read every mission again.
+    """
+
+    def __init__(self, roots, cache_path=None, exclude=()):
+        self.roots = roots
+        self.cache_path = str(cache_path) if cache_path else None
+        self.exclude = {os.path.abspath(path) for path in exclude}
+        self._entries = {}
+        self._sorted = []
+        self._load_cache()
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.isfile(self.cache_path):
+            return
+
+        try:
+            with open(self.cache_path, 'r') as fp:
+                self._entries = json.load(fp)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable mission library cache {self.cache_path}: {e}")
+            self._entries = {}
+
+        self._sort()
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+
+        cache_dir = os.path.dirname(self.cache_path)
+        os.makedirs(cache_dir, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=cache_dir)
+        try:
+            with os.fdopen(fd, 'w') as fp:
+                json.dump(self._entries, fp)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            logging.warning(f"Unable to write mission library cache: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _walk(self):
+        for source, root in self.roots.items():
+            if not root or not os.path.isdir(root):
+                continue
+
+            for dirpath, dirnames, filenames in os.walk(root):
+                dirnames[:] = [d for d in dirnames if os.path.abspath(os.path.join(dirpath, d)) not in self.exclude]
+                for filename in filenames:
+                    if filename.lower().endswith('.miz'):
+                        yield source, root, os.path.join(dirpath, filename)
+
+    def scan(self):
+        """Stats every file and returns the paths whose metadata has to be read."""
+        found = {}
+        stale = []
+        for source, root, path in self._walk():
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+
+            key = os.path.abspath(path)
+            entry = self._entries.get(key)
+            if entry is not None and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+                if entry['info'] is None:
+                    stale.append(key)
+            else:
+                entry = {
+                    'name': os.path.relpath(path, root),
+                    'source': source,
+                    # Value the load_mission message expects, relative to the missions directory
+                    'path': os.path.relpath(path, root) if source == 'missions' else key,
+                    'size': stat.st_size,
+                    'mtime_ns': stat.st_mtime_ns,
+                    'info': None,
+                }
+                stale.append(key)
+            found[key] = entry
+
+        # Swapped in together, listing requests on the event loop may run while a scan is in a thread
+        self._entries, self._sorted = found, self._sorted_entries(found)
+        return stale
+
+    @staticmethod
+    def _sorted_entries(entries):
+        return sorted(entries.values(), key=lambda e: (e['source'] != 'missions', e['name'].lower()))
+
+    def _sort(self):
+        self._sorted = self._sorted_entries(self._entries)
+
+    def read(self, path):
+        entry = self._entries.get(path)
+        if entry is None:
+            return
+
+        try:
+            entry['info'] = _mission_summary(path)
+        except Exception as e:
+            logging.warning(f"Unable to read mission metadata of {path}: {e}")
+            entry['info'] = {'error': str(e)}
+
+    async def refresh(self):
+        known = set(self._entries)
+        # Walking and stating a large or networked missions directory would stall the event loop
+        loop = asyncio.get_event_loop()
+        stale = await loop.run_in_executor(None, self.scan)
+        if stale:
+            logging.info(f"Reading metadata of {len(stale)} mission files")
+
+        # One file at a time in a thread, listing requests are served in between
+        for path in stale:
+            await loop.run_in_executor(None, self.read, path)
+
+        if stale or known != set(self._entries):
+            self._save_cache()
+
+    async def poll(self, interval=10):
+        while True:
+            try:
+                await self.refresh()
+            except Exception as e:
+                logging.error(f"Mission library refresh failed: {e}")
+            await asyncio.sleep(interval)
+
+    @staticmethod
+    def _public(entry):
+        public = {k: v for k, v in entry.items() if k != 'mtime_ns'}
+        public['mtime'] = entry['mtime_ns'] // 1000000000
+        return public
+
+    def page(self, page=0, page_size=50, source=None):
+        entries = self._sorted
+        if source:
+            entries = [e for e in entries if e['source'] == source]
+
+        start = page * page_size
+        return {
+            'total': len(entries),
+            'page': page,
+            'page_size': page_size,
+            'missions': [self._public(e) for e in entries[start:start + page_size]],
+        }
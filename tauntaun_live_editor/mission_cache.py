@@ -0,0 +1,168 @@
+import hashlib
+import importlib.util
+import json
+import logging
+import os
+import sys
+import tempfile
+from importlib import metadata
+
+from tauntaun_live_editor.terrain_cache import dump_mission, load_mission
+from tauntaun_live_editor.util import get_data_path
+
+FINGERPRINT_FILENAME = 'pydcs_fingerprint.txt'
+
+_pydcs_fingerprint = None
+
+
+def pydcs_version():
+    try:
+        return metadata.version('pydcs')
+    except metadata.PackageNotFoundError:
+        return 'unknown'
+
+
+def _package_files(directory):
+    for dir_path, dir_names, filenames in os.walk(directory):
+        dir_names[:] = sorted(name for name in dir_names if name != '__pycache__')
+        for filename in sorted(filenames):
+            path = os.path.join(dir_path, filename)
+            stat = os.stat(path)
+            yield os.path.relpath(path, directory), stat.st_size, stat.st_mtime_ns
+
+
+def _pydcs_commit():
+    # Recorded by pip and poetry for an install from git, the same on every machine
+    try:
+        direct_url = metadata.distribution('pydcs').read_text('direct_url.json')
+        return json.loads(direct_url)['vcs_info']['commit_id'] if direct_url else None
+    except (metadata.PackageNotFoundError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _bundled_fingerprint():
+    # Written at build time next to the static data, a frozen build can not hash the pydcs it bundles
+    try:
+        with open(os.path.join(get_data_path(), 'static_data', FINGERPRINT_FILENAME), encoding='utf-8') as fp:
+            return fp.read().strip() or None
+    except OSError:
+        return None
+
+
+def pydcs_fingerprint():
+    """Identifies the installed pydcs build, computed once per process.
+
+    pydcs is installed from git and keeps its version between commits. The commit is used
+    when the install recorded it, otherwise the names, sizes and modification times of the
+    package files are hashed. A frozen build uses the fingerprint written when it was built,
+    or its executable when that is missing.
+    """
+    global _pydcs_fingerprint
+    if _pydcs_fingerprint is None:
+        if getattr(sys, 'frozen', False):
+            _pydcs_fingerprint = _bundled_fingerprint()
+            if _pydcs_fingerprint is not None:
+                return _pydcs_fingerprint
+
+        commit = None if getattr(sys, 'frozen', False) else _pydcs_commit()
+        if commit is not None:
+            _pydcs_fingerprint = f"{pydcs_version()}-{commit[:16]}"
+            return _pydcs_fingerprint
+
+        sha = hashlib.sha256()
+        if getattr(sys, 'frozen', False):
+            stat = os.stat(sys.executable)
+            sha.update(f"{sys.executable}:{stat.st_size}:{stat.st_mtime_ns}".encode('utf-8'))
+        else:
+            # Found without importing it, the import of pydcs is deferred
+            spec = importlib.util.find_spec('dcs')
+            locations = spec.submodule_search_locations if spec is not None else None
+            for location in locations or []:
+                for entry in _package_files(location):
+                    sha.update(repr(entry).encode('utf-8'))
+        _pydcs_fingerprint = f"{pydcs_version()}-{sha.hexdigest()[:16]}"
+    return _pydcs_fingerprint
+
+
+def file_digest(filename):
+    sha = hashlib.sha256()
+    with open(filename, 'rb') as fp:
+        for chunk in iter(lambda: fp.read(1024 * 1024), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class MissionCache:
+    """On-disk cache of parsed dcs.Mission objects keyed by .miz content hash and pydcs build.
+
+    Least recently used entries are evicted once the directory grows past max_bytes.
+    Entries refer to their terrain by theatre name, loading attaches a cached terrain.
+    """
+
+    def __init__(self, cache_dir, max_bytes):
+        self.cache_dir = str(cache_dir)
+        self.max_bytes = max_bytes
+        self._pydcs_fingerprint = pydcs_fingerprint()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, filename):
+        return self.key_for_digest(file_digest(filename))
+
+    def key_for_digest(self, digest):
+        """Cache key for a .miz whose SHA-256 content digest is already known."""
+        return hashlib.sha256(f"{self._pydcs_fingerprint}:{digest}".encode('utf-8')).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key + '.pickle')
+
+    def get(self, key):
+        path = self._path(key)
+        if not os.path.isfile(path):
+            return None
+
+        try:
+            with open(path, 'rb') as fp:
+                mission = load_mission(fp)
+        except Exception as e:
+            logging.warning(f"Dropping unreadable mission cache entry {key}: {e}")
+            self._remove(path)
+            return None
+
+        # Bump the mtime, eviction removes the least recently used entries first
+        os.utime(path)
+        return mission
+
+    def put(self, key, mission):
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, 'wb') as fp:
+                dump_mission(mission, fp)
+            os.replace(tmp_path, self._path(key))
+        except Exception as e:
+            logging.warning(f"Unable to cache mission {key}: {e}")
+            self._remove(tmp_path)
+            return
+
+        self._evict()
+
+    def _evict(self):
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith('.pickle'):
+                stat = os.stat(os.path.join(self.cache_dir, name))
+                entries.append((stat.st_mtime, stat.st_size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(os.path.join(self.cache_dir, name))
+            total -= size
+            logging.debug(f"Evicted mission cache entry {name}")
+
+    @staticmethod
+    def _remove(path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
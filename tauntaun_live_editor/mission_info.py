@@ -0,0 +1,76 @@
+import re
+import zipfile
+
+
+_CATEGORIES = ('plane', 'helicopter', 'vehicle', 'ship', 'static')
+
+# Key/value pairs and braces of a serialized Lua table, string values are consumed whole
+_LUA_TOKEN = re.compile(
+    r'\[(?:"((?:[^"\\]|\\.)*)"|(-?\d+))\]\s*=\s*(?:"((?:[^"\\]|\\.)*)"|([^\s,{}]+))?|([{}])', re.S)
+
+
+def _number(value):
+    try:
+        return int(float(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def read_mission_info(filename):
+    """Summary of a .miz read from its mission member without building a dcs.Mission.
+
+    Returns a dict with the theatre, the start time in seconds, the date, the group
+    and unit counts per coalition and the unit types per category.
+    """
+    with zipfile.ZipFile(filename) as miz:
+        text = miz.read('mission').decode('utf-8', errors='replace')
+
+    info = {
+        'theatre': None,
+        'start_time': None,
+        'date': None,
+        'coalitions': {},
+        'unit_types': {category: set() for category in _CATEGORIES},
+    }
+
+    keys = []
+    tables = []
+    pending = None
+    for match in _LUA_TOKEN.finditer(text):
+        str_key, int_key, str_value, value, brace = match.groups()
+        if brace == '{':
+            keys.append(pending)
+            tables.append({})
+            pending = None
+        elif brace == '}':
+            if not tables:
+                break
+            values = tables.pop()
+            key = keys.pop()
+
+            # mission/coalition/<side>/country/<i>/<category>/group/<j>/units/<k>
+            if len(keys) in (7, 9) and keys[1] == 'coalition' and keys[5] in _CATEGORIES:
+                counts = info['coalitions'].setdefault(keys[2], {'groups': 0, 'units': 0})
+                if len(keys) == 7 and keys[6] == 'group':
+                    counts['groups'] += 1
+                elif len(keys) == 9 and keys[8] == 'units':
+                    counts['units'] += 1
+                    if 'type' in values:
+                        info['unit_types'][keys[5]].add(values['type'])
+            elif len(keys) == 1 and key == 'date':
+                year, month, day = (_number(values.get(k)) for k in ('Year', 'Month', 'Day'))
+                if year and month and day:
+                    info['date'] = f"{year:04d}-{month:02d}-{day:02d}"
+        else:
+            key = str_key if str_key is not None else int(int_key)
+            if str_value is None and value is None:
+                pending = key
+            elif tables:
+                tables[-1][key] = str_value if str_value is not None else value
+                if len(tables) == 1:
+                    if key == 'theatre':
+                        info['theatre'] = str_value
+                    elif key == 'start_time':
+                        info['start_time'] = _number(value)
+
+    return info
@@ -0,0 +1,68 @@
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+
+from tauntaun_live_editor.startup import lazy_import
+from tauntaun_live_editor.terrain_cache import dumps_mission, loads_mission
+
+dcs = lazy_import('dcs')
+
+_executor = None
+
+
+def parse_mission_file(filename, mission_cache=None, digest=None):
+    """Parses a .miz into a fresh dcs.Mission, going through mission_cache when given.
+
+    digest is the SHA-256 of the file content if the caller already computed it.
+    """
+    key = None
+    if mission_cache:
+        key = mission_cache.key_for_digest(digest) if digest else mission_cache.key(filename)
+    if key:
+        mission = mission_cache.get(key)
+        if mission is not None:
+            logging.info(f"Mission {filename} loaded from cache")
+            return mission
+
+    mission = dcs.Mission()
+    mission.load_file(filename, True)
+
+    if key:
+        mission_cache.put(key, mission)
+
+    return mission
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=1)
+    return _executor
+
+
+async def run_in_worker(func, *args):
+    """Runs func in the mission worker process so the event loop keeps serving clients."""
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(_get_executor(), func, *args)
+
+
+def _parse_mission_detached(filename, mission_cache=None, digest=None):
+    return dumps_mission(parse_mission_file(filename, mission_cache, digest))
+
+
+async def parse_mission_detached_in_worker(filename, mission_cache=None, digest=None):
+    """The mission parsed in the worker process as dumps_mission bytes, each loads_mission of
+    them is a mission of its own."""
+    return await run_in_worker(_parse_mission_detached, filename, mission_cache, digest)
+
+
+async def parse_mission_in_worker(filename, mission_cache=None, digest=None):
+    # The terrain stays behind in the worker, the mission gets one from the terrain cache of this process
+    return loads_mission(await parse_mission_detached_in_worker(filename, mission_cache, digest))
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False)
+        _executor = None
@@ -0,0 +1,185 @@
+import asyncio
+import copy
+import io
+import os
+import stat
+import struct
+import tempfile
+import zipfile
+
+from tauntaun_live_editor.startup import lazy_import
+
+dcs = lazy_import('dcs')
+
+
+_LOCAL_HEADER_SIZE = 30
+_ENCRYPTED_FLAG = 0x01
+_DATA_DESCRIPTOR_FLAG = 0x08
+
+
+def _copy_member_raw(src, info, dst):
+    """Appends a member of src to dst as stored, without decompressing it."""
+    src.fp.seek(info.header_offset)
+    header = src.fp.read(_LOCAL_HEADER_SIZE)
+    name_len, extra_len = struct.unpack('<HH', header[26:30])
+    src.fp.seek(info.header_offset + _LOCAL_HEADER_SIZE + name_len + extra_len)
+    data = src.fp.read(info.compress_size)
+
+    zinfo = copy.copy(info)
+    zinfo.header_offset = dst.fp.tell()
+    # Sizes and CRC are known, so they go into the local header instead of a trailing descriptor
+    zinfo.flag_bits &= ~_DATA_DESCRIPTOR_FLAG
+    dst.fp.write(zinfo.FileHeader())
+    dst.fp.write(data)
+    dst.start_dir = dst.fp.tell()
+    dst.filelist.append(zinfo)
+    dst.NameToInfo[zinfo.filename] = zinfo
+
+
+def _copy_or_write(src, dst, path, arcname):
+    if arcname in dst.NameToInfo:
+        return
+
+    info = src.NameToInfo.get(arcname) if src else None
+    if info is not None and not info.flag_bits & _ENCRYPTED_FLAG:
+        _copy_member_raw(src, info, dst)
+    else:
+        dst.write(path, arcname)
+
+
+def render(mission):
+    """Renders the generated members of mission.
+
+    Only this step reads the mission, so calling it on the event loop gives a consistent
+    snapshot that write() can turn into an archive on another thread.
+    """
+    map_resource = mission.map_resource
+    binary_files = [(f['path'], f['respath']) for f in map_resource.binary_files]
+
+    resources = {}
+    resource_files = []
+    for reskey, filepath in map_resource.files.get('DEFAULT', {}).items():
+        if os.path.isabs(filepath):
+            nameinzip = os.path.basename(filepath)
+            resource_files.append((filepath, f'l10n/DEFAULT/{nameinzip}'))
+            resources[reskey] = nameinzip
+
+    kneeboards = []
+    for unit_type, pages in mission.aircraft_kneeboards.items():
+        directory = f'KNEEBOARD/{unit_type.id}/IMAGES/'
+        kneeboards.extend((page, f'{directory}/{page.name}') for page in pages)
+
+    return {
+        'options': str(mission.options),
+        'warehouses': str(mission.warehouses),
+        'dictionary': dcs.lua.dumps(mission.translation.dict('DEFAULT'), "dictionary", 1),
+        'map_resource': dcs.lua.dumps(resources, "mapResource", 1),
+        'mission': str(mission),
+        'binary_files': binary_files,
+        'resource_files': resource_files,
+        'kneeboards': kneeboards,
+    }
+
+
+def write(rendered, source_path, fileobj):
+    """Writes a rendered mission as a .miz archive to fileobj, reusing members of source_path."""
+    src = zipfile.ZipFile(source_path, 'r') if source_path and os.path.isfile(source_path) else None
+    try:
+        with zipfile.ZipFile(fileobj, 'w', compression=zipfile.ZIP_DEFLATED) as dst:
+            dst.writestr('options', rendered['options'])
+            dst.writestr('warehouses', rendered['warehouses'])
+            dst.writestr('l10n/DEFAULT/dictionary', rendered['dictionary'])
+
+            # Same layout as MapResource.store
+            for path, arcname in rendered['binary_files'] + rendered['resource_files']:
+                _copy_or_write(src, dst, path, arcname)
+            dst.writestr('l10n/DEFAULT/mapResource', rendered['map_resource'])
+
+            for path, arcname in rendered['kneeboards']:
+                _copy_or_write(src, dst, path, arcname)
+
+            dst.writestr('mission', rendered['mission'])
+    finally:
+        if src:
+            src.close()
+
+
+def _file_mode(filename):
+    try:
+        return stat.S_IMODE(os.stat(filename).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def save_incremental(mission, source_path, filename):
+    """Saves mission to filename, reusing the unchanged members of the source_path archive.
+
+    Only the Lua tables (mission, options, warehouses and the l10n dictionary/mapResource) are
+    regenerated. Resources, kneeboards and other binary members present in the source archive
+    are copied as stored without recompression; anything new is read from disk like pydcs does.
+    The archive is written next to filename and moved into place, so source_path may equal filename.
+    """
+    mission.filename = filename
+    rendered = render(mission)
+
+    fd, tmp_path = tempfile.mkstemp(suffix='.miz', dir=os.path.dirname(os.path.abspath(filename)))
+    os.close(fd)
+
+    try:
+        write(rendered, source_path, tmp_path)
+        # mkstemp creates the file private, keep the mode DCS could read before
+        os.chmod(tmp_path, _file_mode(filename))
+        os.replace(tmp_path, filename)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    return True
+
+
+class MizExporter:
+    """In-memory .miz of a campaign's mission, built once per mission revision."""
+
+    def __init__(self, campaign):
+        self.campaign = campaign
+        self._revision = None
+        self._data = None
+        self._building = None
+
+    async def export(self):
+        revision = self.campaign.revision
+        if self._revision == revision and self._data is not None:
+            return self._data
+
+        if self._building is None or self._building[0] != revision:
+            building = (revision, asyncio.ensure_future(self._build(revision)))
+            building[1].add_done_callback(lambda task: self._build_done(building))
+            self._building = building
+
+        return await asyncio.shield(self._building[1])
+
+    def _build_done(self, building):
+        # A failed build is retried by the next export instead of failing every export of the revision
+        task = building[1]
+        if self._building is building and (task.cancelled() or task.exception() is not None):
+            self._building = None
+
+    async def _build(self, revision):
+        # Rendering stays on the event loop: a snapshot of the mission for another thread, e.g.
+        # dumps_mission, costs several times more than rendering it
+        rendered = render(self.campaign.mission)
+        source_path = self.campaign.loaded_mission_path
+
+        def build():
+            buffer = io.BytesIO()
+            write(rendered, source_path, buffer)
+            return buffer.getvalue()
+
+        data = await asyncio.get_event_loop().run_in_executor(None, build)
+        # A newer revision may have finished first
+        if self._revision is None or revision >= self._revision:
+            self._revision = revision
+            self._data = data
+        return data
@@ -0,0 +1,130 @@
+import heapq
+import itertools
+
+from tauntaun_live_editor.startup import lazy_import
+
+dcs = lazy_import('dcs')
+
+
+def slot_class(airport, slot):
+    if airport.slot_version == 1:
+        if slot.large:
+            return 'large'
+        if slot.helicopter:
+            return 'helicopter'
+        return 'airplane'
+
+    # Version 2 slots are only told apart by the helicopter flag, size decides the rest
+    return 'helicopter' if slot.helicopter else 'airplane'
+
+
+def _bucket_order(airport, aircraft_type):
+    # Same preference as Airport.free_parking_slots: smallest fitting slot class first
+    if airport.slot_version == 1:
+        if aircraft_type.large_parking_slot:
+            return ('large',)
+        if aircraft_type.helicopter:
+            return ('helicopter', 'large')
+        return ('airplane', 'helicopter', 'large')
+
+    if aircraft_type.helicopter:
+        return ('helicopter',)
+    return ('airplane', 'helicopter')
+
+
+def _slot_fits(airport, slot, aircraft_type):
+    if airport.slot_version == 1:
+        return True
+
+    # Version 2 slots carry dimensions, mirrors Airport._free_parking_slots_resolve_v2
+    if aircraft_type.helicopter and not slot.helicopter:
+        return False
+    if not aircraft_type.helicopter and not slot.airplanes:
+        return False
+    return (aircraft_type.width < slot.width
+            and aircraft_type.height < (slot.height or 1000)
+            and aircraft_type.length < slot.length)
+
+
+class _AirportSlots:
+    def __init__(self, airport):
+        self.airport = airport
+        self._counter = itertools.count()
+        self._queued = set()
+        self.buckets = {}
+        for slot in airport.parking_slots:
+            if slot.unit_id is None:
+                self.push(slot)
+
+    def push(self, slot):
+        if id(slot) in self._queued:
+            return
+
+        self._queued.add(id(slot))
+        bucket = self.buckets.setdefault(slot_class(self.airport, slot), [])
+        heapq.heappush(bucket, (slot.slot_name or '', next(self._counter), slot))
+
+    def pop(self, aircraft_type):
+        for name in _bucket_order(self.airport, aircraft_type):
+            bucket = self.buckets.get(name)
+            skipped = []
+            found = None
+            while bucket:
+                entry = heapq.heappop(bucket)
+                slot = entry[2]
+                if slot.unit_id is not None:
+                    # Occupied outside the allocator, drop it until it is released
+                    self._queued.discard(id(slot))
+                    continue
+                if _slot_fits(self.airport, slot, aircraft_type):
+                    self._queued.discard(id(slot))
+                    found = slot
+                    break
+                skipped.append(entry)
+
+            for entry in skipped:
+                heapq.heappush(bucket, entry)
+
+            if found is not None:
+                return found
+
+        return None
+
+
+class ParkingAllocator:
+    """Free parking slots per airport, bucketed by slot class.
+
+    Airports are indexed on first use from the slots that are still free in the terrain.
+    """
+
+    def __init__(self):
+        self._airports = {}
+
+    def _slots(self, airport):
+        slots = self._airports.get(airport.id)
+        if slots is None:
+            slots = self._airports[airport.id] = _AirportSlots(airport)
+        return slots
+
+    def allocate(self, airport, aircraft_type, count):
+        """Reserves count slots for aircraft_type, raises NoParkingSlotError if they do not all fit."""
+        slots = self._slots(airport)
+        allocated = []
+        for _ in range(count):
+            slot = slots.pop(aircraft_type)
+            if slot is None:
+                self.release(airport, allocated)
+                raise dcs.terrain.NoParkingSlotError(
+                    f"No free parking slot at {airport.name} for {aircraft_type.id}")
+            allocated.append(slot)
+
+        return allocated
+
+    def release(self, airport, parking_slots):
+        slots = self._slots(airport)
+        for slot in parking_slots:
+            slot.unit_id = None
+            slots.push(slot)
+
+    def reset(self):
+        self._airports = {}
@@ -0,0 +1,84 @@
+"""
+Presence of the planners: map cursor and selected unit per session.
+
+Presence is lossy and latest-value-wins. Updates are packed into fixed binary
+records and flushed at most every interval seconds; a client still busy sending
+gets the newer record of a session in place of the older one, nothing queues up.
+"""
+
+import asyncio
+import itertools
+import logging
+import math
+import struct
+
+# Client to server: latitude, longitude, selected unit id, NaN/-1 for none
+CLIENT_RECORD = struct.Struct('<ffi')
+# Server to client: session id followed by the client record
+PRESENCE_RECORD = struct.Struct('<Iffi')
+
+
+class PresenceClient:
+    def __init__(self, send):
+        self._send = send
+        self._pending = {}
+        self._wakeup = asyncio.Event()
+
+    def offer(self, records):
+        self._pending.update(records)
+        self._wakeup.set()
+
+    async def run(self):
+        while True:
+            await self._wakeup.wait()
+            self._wakeup.clear()
+            frame = b''.join(self._pending.values())
+            self._pending.clear()
+            await self._send(frame)
+
+
+class PresenceHub:
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self._records = {}
+        self._dirty = {}
+        self._clients = {}
+        self._client_ids = itertools.count()
+        self._flush_handle = None
+
+    def connect(self, client):
+        client_id = next(self._client_ids)
+        self._clients[client_id] = client
+        if self._records:
+            client.offer(self._records)
+        return client_id
+
+    def disconnect(self, client_id):
+        self._clients.pop(client_id, None)
+
+    def update(self, session_id, payload):
+        if not isinstance(payload, bytes) or len(payload) != CLIENT_RECORD.size:
+            logging.debug(f"Ignoring malformed presence update of session {session_id}")
+            return
+
+        record = PRESENCE_RECORD.pack(session_id, *CLIENT_RECORD.unpack(payload))
+        self._records[session_id] = record
+        self._dirty[session_id] = record
+        self._schedule_flush()
+
+    def leave(self, session_id):
+        if self._records.pop(session_id, None) is None:
+            return
+
+        self._dirty[session_id] = PRESENCE_RECORD.pack(session_id, math.nan, math.nan, -1)
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_handle is None:
+            self._flush_handle = asyncio.get_event_loop().call_later(self.interval, self._flush)
+
+    def _flush(self):
+        self._flush_handle = None
+        records, self._dirty = self._dirty, {}
+        for client in self._clients.values():
+            client.offer(records)
@@ -0,0 +1,153 @@
+"""
+An edge worker: holds client websockets for the state process, see fanout.py.
+"""
+
+import asyncio
+import itertools
+import logging
+from collections import defaultdict
+
+from quart import Quart, websocket
+
+from hypercorn.config import Config
+from hypercorn.asyncio import serve
+
+from tauntaun_live_editor.server import fanout
+from tauntaun_live_editor.server.room import DEFAULT_ROOM
+
+# Frames waiting for a client before it is disconnected, it resumes from the replay buffer
+# when it reconnects
+MAX_OUTBOX = 512
+
+
+class EdgeClient:
+    """A client websocket, frames are sent in order without holding up the channel."""
+
+    def __init__(self, ws, max_outbox=MAX_OUTBOX):
+        self.ws = ws
+        self.outbox = asyncio.Queue(max_outbox + 1)
+        self.max_outbox = max_outbox
+        self.closing = False
+
+    def push(self, frame):
+        if self.closing:
+            return
+        if self.outbox.qsize() >= self.max_outbox:
+            logging.warning(f"Client fell {self.max_outbox} frames behind, disconnecting it")
+            self.close(1013)
+            return
+        self.outbox.put_nowait(frame)
+
+    def close(self, code=1000):
+        """Closes the websocket once the frames queued before are sent, or at once for a
+        client that fell behind."""
+        if self.closing:
+            return
+        self.closing = True
+        if code != 1000:
+            while not self.outbox.empty():
+                self.outbox.get_nowait()
+        self.outbox.put_nowait(code)
+
+    async def run(self):
+        while True:
+            frame = await self.outbox.get()
+            if isinstance(frame, int):
+                await self.ws.close(frame)
+                return
+            await self.ws.send(frame)
+
+
+class EdgeWorker:
+    def __init__(self, channel):
+        self.channel = channel
+        self.clients = {}
+        self.rooms = defaultdict(set)
+        self._conn_ids = itertools.count()
+
+    def create_app(self):
+        app = Quart(__name__)
+
+        @app.websocket('/ws/message')
+        async def client_ws():
+            await self.serve_client(DEFAULT_ROOM)
+
+        @app.websocket('/room/<room_id>/ws/message')
+        async def room_client_ws(room_id):
+            await self.serve_client(room_id)
+
+        return app
+
+    async def serve_client(self, room_id):
+        conn = next(self._conn_ids)
+        client = EdgeClient(websocket._get_current_object())
+        self.clients[conn] = client
+        sender = asyncio.ensure_future(client.run())
+        self.channel.send(fanout.OPEN, {'conn': conn, 'room': room_id, 'args': websocket.args.to_dict()})
+        try:
+            while True:
+                data = await websocket.receive()
+                if isinstance(data, str):
+                    data = data.encode('utf-8')
+                self.channel.send(fanout.MESSAGE, {'conn': conn}, data)
+                # Stop reading the client while the state process is behind
+                await self.channel.drain()
+        finally:
+            sender.cancel()
+            self._remove(conn)
+            self.channel.send(fanout.CLOSE, {'conn': conn})
+
+    def _remove(self, conn):
+        self.clients.pop(conn, None)
+        for room_id, conns in list(self.rooms.items()):
+            conns.discard(conn)
+            if not conns:
+                del self.rooms[room_id]
+
+    async def run(self):
+        """Handles the frames of the state process until the channel is closed."""
+        while True:
+            frame = await self.channel.receive()
+            if frame is None:
+                break
+
+            kind, header, payload = frame
+            if kind == fanout.BROADCAST:
+                for conn in self.rooms.get(header['room'], ()):
+                    self.clients[conn].push(payload)
+            elif kind == fanout.SEND:
+                client = self.clients.get(header['conn'])
+                if client is not None:
+                    client.push(payload)
+            elif kind == fanout.ATTACH:
+                if header['conn'] in self.clients:
+                    self.rooms[header['room']].add(header['conn'])
+            elif kind == fanout.DETACH:
+                self.rooms.get(header['room'], set()).discard(header['conn'])
+            elif kind == fanout.DROP:
+                client = self.clients.get(header['conn'])
+                if client is not None:
+                    client.close()
+
+        # Without the state process there is nothing to serve, the clients reconnect
+        for client in self.clients.values():
+            client.close()
+
+
+async def _run_edge(address, token, port):
+    channel = await fanout.connect(address)
+    channel.send(fanout.HELLO, {'token': token, 'port': port})
+    worker = EdgeWorker(channel)
+
+    config = Config()
+    config.bind = ["0.0.0.0:" + str(port)]
+    await serve(worker.create_app(), config, shutdown_trigger=worker.run)
+
+
+def run_edge(address, token, port):
+    """Entry point of an edge worker process, runs until the state process is gone."""
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(_run_edge(address, token, port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,286 @@
+"""
+Fan-out of websocket clients to edge worker processes.
+
+The state process owns the rooms and applies every operation. Edge workers hold the
+client websockets: they forward what clients send and copy the broadcast frames, encoded
+and compressed once by the state process, to their clients. Both ends talk over a
+channel, a local socket between processes or LocalChannel within one process.
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import secrets
+import struct
+import tempfile
+
+from tauntaun_live_editor.util import is_posix
+
+# Edge to state
+HELLO = 1
+OPEN = 2
+MESSAGE = 3
+CLOSE = 4
+# State to edge
+SEND = 5
+ATTACH = 6
+DETACH = 7
+BROADCAST = 8
+DROP = 9
+
+# kind, header length, payload length
+_FRAME = struct.Struct('<BII')
+
+# Bytes buffered for the other end of a channel before it is given up on, an edge this far
+# behind is cut off and its clients resume on reconnecting
+MAX_BUFFERED = 64 * 1024 * 1024
+
+
+def pack_frame(kind, header, payload=b''):
+    header = json.dumps(header).encode('utf-8')
+    return _FRAME.pack(kind, len(header), len(payload)) + header + payload
+
+
+def unpack_frame(data):
+    kind, header_length, _ = _FRAME.unpack_from(data)
+    header_end = _FRAME.size + header_length
+    return kind, json.loads(data[_FRAME.size:header_end]), data[header_end:]
+
+
+class StreamChannel:
+    """A channel over an asyncio stream, a UNIX socket or a loopback TCP connection."""
+
+    def __init__(self, reader, writer, max_buffered=MAX_BUFFERED):
+        self.reader = reader
+        self.writer = writer
+        self.max_buffered = max_buffered
+
+    def send(self, kind, header, payload=b''):
+        # Buffered in order, a frame is never interleaved with another
+        if self.writer.is_closing():
+            return
+
+        self.writer.write(pack_frame(kind, header, payload))
+        if self.writer.transport.get_write_buffer_size() > self.max_buffered:
+            logging.warning("The other end of a channel fell behind, closing it")
+            # Dropped, not flushed, the buffer is what it does not read
+            self.writer.transport.abort()
+
+    async def drain(self):
+        """Waits while the other end is behind, senders that can wait call it after send."""
+        if not self.writer.is_closing():
+            try:
+                await self.writer.drain()
+            except ConnectionError:
+                pass
+
+    async def receive(self):
+        """The next (kind, header, payload), None once the other end is gone."""
+        try:
+            prefix = await self.reader.readexactly(_FRAME.size)
+            _, header_length, payload_length = _FRAME.unpack(prefix)
+            rest = await self.reader.readexactly(header_length + payload_length)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return None
+        return unpack_frame(prefix + rest)
+
+    def close(self):
+        self.writer.close()
+
+
+class LocalChannel:
+    """One end of an in-process channel, frames are packed the same as on a socket."""
+
+    def __init__(self, incoming, outgoing):
+        self._incoming = incoming
+        self._outgoing = outgoing
+        self._closed = False
+
+    @classmethod
+    def pair(cls):
+        a, b = asyncio.Queue(), asyncio.Queue()
+        return cls(a, b), cls(b, a)
+
+    def send(self, kind, header, payload=b''):
+        if not self._closed:
+            self._outgoing.put_nowait(pack_frame(kind, header, payload))
+
+    async def receive(self):
+        data = await self._incoming.get()
+        return unpack_frame(data) if data is not None else None
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        if not self._closed:
+            self._closed = True
+            self._outgoing.put_nowait(None)
+            self._incoming.put_nowait(None)
+
+
+async def connect(address):
+    """Opens a StreamChannel to an address returned by EdgeHub.listen."""
+    scheme, _, location = address.partition(':')
+    if scheme == 'unix':
+        reader, writer = await asyncio.open_unix_connection(location)
+    else:
+        host, _, port = location.rpartition(':')
+        reader, writer = await asyncio.open_connection(host, int(port))
+    return StreamChannel(reader, writer)
+
+
+class RemoteSocket:
+    """Stands in for the websocket of a client held by an edge worker."""
+
+    def __init__(self, edge, conn):
+        self.edge = edge
+        self.conn = conn
+
+    async def send(self, data):
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        self.edge.channel.send(SEND, {'conn': self.conn}, data)
+
+
+class EdgeLink:
+    """The state process end of the channel to one edge worker."""
+
+    def __init__(self, channel, port):
+        self.channel = channel
+        self.port = port
+        self._inboxes = {}
+
+    @property
+    def connections(self):
+        return len(self._inboxes)
+
+    def open(self, conn, room_id, args, open_client):
+        inbox = asyncio.Queue()
+        self._inboxes[conn] = inbox
+        asyncio.ensure_future(self._serve(conn, room_id, args, open_client, inbox))
+
+    async def _serve(self, conn, room_id, args, open_client, inbox):
+        try:
+            await open_client(room_id, RemoteSocket(self, conn), args, inbox.get)
+        except Exception:
+            logging.exception(f"Edge client {conn} failed")
+        finally:
+            # The edge closes its websocket if the state process ended the session
+            if self._inboxes.pop(conn, None) is not None:
+                self.channel.send(DROP, {'conn': conn})
+
+    def message(self, conn, data):
+        inbox = self._inboxes.get(conn)
+        if inbox is not None:
+            inbox.put_nowait(data)
+
+    def close(self, conn):
+        inbox = self._inboxes.pop(conn, None)
+        if inbox is not None:
+            inbox.put_nowait(None)
+
+    def close_all(self):
+        for conn in list(self._inboxes):
+            self.close(conn)
+
+    def attach(self, room_id, conn):
+        self.channel.send(ATTACH, {'room': room_id, 'conn': conn})
+
+    def detach(self, room_id, conn):
+        self.channel.send(DETACH, {'room': room_id, 'conn': conn})
+
+    def broadcast(self, room_id, frame):
+        # One copy per edge, the edge copies it to each of its clients in the room
+        self.channel.send(BROADCAST, {'room': room_id}, frame)
+
+
+class EdgeHub:
+    """Accepts edge workers and serves their clients.
+
+    open_client(room_id, ws, args, receive) serves one client until it disconnects,
+    ws.send sends to it and receive() returns its next message or None once it is gone.
+    """
+
+    def __init__(self, open_client, token=None):
+        self.open_client = open_client
+        self.token = token if token is not None else secrets.token_urlsafe(16)
+        self.edges = set()
+        self._server = None
+        self._socket_dir = None
+
+    async def serve(self, channel):
+        hello = await channel.receive()
+        if hello is None or hello[0] != HELLO or hello[1].get('token') != self.token:
+            logging.warning("Rejected an edge worker without the token")
+            channel.close()
+            return
+
+        edge = EdgeLink(channel, hello[1].get('port'))
+        self.edges.add(edge)
+        logging.info(f"Edge worker on port {edge.port} connected")
+        try:
+            while True:
+                frame = await channel.receive()
+                if frame is None:
+                    break
+
+                kind, header, payload = frame
+                if kind == OPEN:
+                    edge.open(header['conn'], header['room'], header['args'], self.open_client)
+                elif kind == MESSAGE:
+                    edge.message(header['conn'], payload.decode('utf-8'))
+                elif kind == CLOSE:
+                    edge.close(header['conn'])
+        finally:
+            self.edges.discard(edge)
+            edge.close_all()
+            channel.close()
+            logging.warning(f"Edge worker on port {edge.port} disconnected")
+
+    def pick_edge(self):
+        """The edge with the fewest clients, None without edges."""
+        return min(self.edges, key=lambda edge: edge.connections, default=None)
+
+    async def listen(self):
+        """Listens for edge workers and returns the address to connect them to."""
+        async def accept(reader, writer):
+            await self.serve(StreamChannel(reader, writer))
+
+        if is_posix():
+            self._socket_dir = tempfile.mkdtemp(prefix='tauntaun-')
+            path = os.path.join(self._socket_dir, 'state.sock')
+            self._server = await asyncio.start_unix_server(accept, path)
+            return f'unix:{path}'
+
+        self._server = await asyncio.start_server(accept, '127.0.0.1', 0)
+        return f'tcp:127.0.0.1:{self._server.sockets[0].getsockname()[1]}'
+
+    def close(self):
+        if self._server is not None:
+            self._server.close()
+        for edge in list(self.edges):
+            edge.channel.close()
+        if self._socket_dir is not None:
+            try:
+                os.unlink(os.path.join(self._socket_dir, 'state.sock'))
+                os.rmdir(self._socket_dir)
+            except OSError:
+                pass
+
+
+def start_edge_workers(address, token, ports):
+    """Starts an edge worker process per port."""
+    from tauntaun_live_editor.server.edge import run_edge
+
+    # Spawned on every platform, a fork would copy the campaigns and the running loop
+    context = multiprocessing.get_context('spawn')
+    processes = []
+    for port in ports:
+        process = context.Process(target=run_edge, args=(address, token, port), daemon=True,
+                                          name=f'edge-{port}')
+        process.start()
+        processes.append(process)
+    return processes
@@ -1,21 +1,14 @@
 import inspect
 import json
 
-from dcs import Mission, Point
-from dcs.coalition import Coalition
-from dcs.country import Country
-from dcs.flyingunit import FlyingUnit
-from dcs.planes import PlaneType
-from dcs.point import StaticPoint, PointAction, MovingPoint
-from dcs.terrain import Terrain, Airport
-from dcs.translation import String
-from dcs.unit import Unit
-from dcs.unitgroup import Group
-
 from tauntaun_live_editor.coord import xz_to_lat_lon
+from tauntaun_live_editor.startup import lazy_import
 
 from datetime import datetime
 
+dcs = lazy_import('dcs')
+
+
 class MissionEncoder(json.JSONEncoder):
     def __init__(self, terrain, convert_coords=False, add_sidc=False, *args, **kws):
         self.dcs_terrain = terrain
@@ -35,7 +28,7 @@ class MissionEncoder(json.JSONEncoder):
 
     def coalition(self, obj):
         bullseye = obj.bullseye if not None else {'x': 0, 'y': 0}
-        bullseye = Point(bullseye['x'], bullseye['y'], self.dcs_terrain)
+        bullseye = dcs.Point(bullseye['x'], bullseye['y'], self.dcs_terrain)
         return {
             'name': obj.name,
             'bullseye': self.point(bullseye),
@@ -60,6 +53,7 @@ class MissionEncoder(json.JSONEncoder):
             'name': obj.name,
             'units': self.default(obj.units),
             'points': self.default(obj.points),
+            'route_revision': getattr(obj, 'route_revision', 0),
             'hidden': self.default(obj.hidden) if obj.hidden is not None else 'false',
             'dead': self.default(obj.dead) if hasattr(obj, 'dead') else 'false',
             'hidden_on_planner': self.default(obj.hidden_on_planner) if obj.hidden_on_planner is not None else 'false',
@@ -108,6 +102,10 @@ class MissionEncoder(json.JSONEncoder):
             'action': obj.action
         }
 
+    def points(self, obj):
+        # The index identifies the waypoint when the client edits the route
+        return [{**self.default(p), 'index': index} for index, p in enumerate(obj)]
+
     def moving_point(self, obj):
         return {
             **self.static_point(obj),
@@ -164,6 +162,8 @@ class MissionEncoder(json.JSONEncoder):
             return {k: self.default(v) for k, v in obj.items()}
 
         if isinstance(obj, list):
+            if obj and isinstance(obj[0], dcs.point.StaticPoint):
+                return self.points(obj)
             return [self.default(v) for v in obj]
 
         if isinstance(obj, float):
@@ -175,46 +175,46 @@ class MissionEncoder(json.JSONEncoder):
         if isinstance(obj, datetime):
             return self.datetime(obj)
 
-        if isinstance(obj, Mission):
+        if isinstance(obj, dcs.Mission):
             return self.mission(obj)
 
-        if isinstance(obj, Coalition):
+        if isinstance(obj, dcs.coalition.Coalition):
             return self.coalition(obj)
 
-        if isinstance(obj, Country):
+        if isinstance(obj, dcs.country.Country):
             return self.country(obj)
 
-        if isinstance(obj, Group):
+        if isinstance(obj, dcs.unitgroup.Group):
             return self.group(obj)
 
-        if isinstance(obj, FlyingUnit):
+        if isinstance(obj, dcs.flyingunit.FlyingUnit):
             return self.flying_unit(obj)
 
-        if isinstance(obj, Unit):
+        if isinstance(obj, dcs.unit.Unit):
             return self.unit(obj)
 
-        if isinstance(obj, MovingPoint):
+        if isinstance(obj, dcs.point.MovingPoint):
             return self.moving_point(obj)
 
-        if isinstance(obj, StaticPoint):
+        if isinstance(obj, dcs.point.StaticPoint):
             return self.static_point(obj)
 
-        if isinstance(obj, Point):
+        if isinstance(obj, dcs.Point):
             return self.point(obj)
 
-        if isinstance(obj, String):
+        if isinstance(obj, dcs.translation.String):
             return self.translation_string(obj)
 
-        if isinstance(obj, PointAction):
+        if isinstance(obj, dcs.point.PointAction):
             return self.point_action(obj)
 
-        if isinstance(obj, Terrain):
+        if isinstance(obj, dcs.terrain.Terrain):
             return self.terrain(obj)
 
-        if isinstance(obj, Airport):
+        if isinstance(obj, dcs.terrain.Airport):
             return self.airport(obj)
 
-        if inspect.isclass(obj) and issubclass(obj, PlaneType):
+        if inspect.isclass(obj) and issubclass(obj, dcs.planes.PlaneType):
             return self.plane_type(obj)
 
         return json.JSONEncoder.default(self, obj)
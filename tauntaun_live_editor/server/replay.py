@@ -0,0 +1,40 @@
+import collections
+import itertools
+
+
+class ReplayBuffer:
+    """The most recent broadcast frames by sequence number.
+
+    Bounded by frame count and total size, a reconnecting client gets the frames
+    it missed as long as they are still here and a full sync otherwise.
+    """
+
+    def __init__(self, max_frames=512, max_bytes=16 * 1024 * 1024):
+        self.max_frames = max_frames
+        self.max_bytes = max_bytes
+        self.seq = 0
+        self._frames = collections.deque()
+        self._size = 0
+
+    def next_seq(self):
+        self.seq += 1
+        return self.seq
+
+    def append(self, seq, frame):
+        self._frames.append((seq, frame))
+        self._size += len(frame)
+        while len(self._frames) > self.max_frames or (self._size > self.max_bytes and len(self._frames) > 1):
+            _, dropped = self._frames.popleft()
+            self._size -= len(dropped)
+
+    def since(self, seq):
+        """Frames after seq in order, None if some of them are no longer buffered."""
+        if seq > self.seq or seq < 0:
+            return None
+        if seq == self.seq:
+            return []
+
+        # Frames are consecutive, the ones dropped from the front leave a gap
+        if not self._frames or self._frames[0][0] > seq + 1:
+            return None
+        return list(itertools.islice(self._frames, seq + 1 - self._frames[0][0], None))
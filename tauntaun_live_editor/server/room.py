@@ -0,0 +1,284 @@
+import asyncio
+import hmac
+import json
+import logging
+import re
+import secrets
+import time
+import zlib
+
+from tauntaun_live_editor.sessions import SessionManager, SessionsEncoder
+from tauntaun_live_editor.presence import PresenceHub
+from tauntaun_live_editor.server.mission_encoder import MissionEncoder
+from tauntaun_live_editor.server.replay import ReplayBuffer
+from tauntaun_live_editor.miz import MizExporter
+from tauntaun_live_editor.metrics import SIZE_BUCKETS, registry
+
+DEFAULT_ROOM = 'default'
+
+# How long a disconnected client keeps its session to resume it
+RESUME_GRACE_SECONDS = 30
+
+_ROOM_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+broadcasts_total = registry.counter('tauntaun_broadcasts_total', 'Broadcasts by message key.', ['key'])
+broadcast_encode_seconds = registry.histogram('tauntaun_broadcast_encode_seconds',
+                                              'Time to encode and compress a broadcast.', ['key'])
+broadcast_encoded_bytes = registry.histogram('tauntaun_broadcast_encoded_bytes', 'Size of a broadcast as JSON.',
+                                             ['key'], SIZE_BUCKETS)
+broadcast_compressed_bytes = registry.histogram('tauntaun_broadcast_compressed_bytes',
+                                                'Size of a broadcast as sent, compressed.', ['key'], SIZE_BUCKETS)
+broadcast_fanout_seconds = registry.histogram('tauntaun_broadcast_fanout_seconds',
+                                              'Time to send a broadcast to the clients, an edge worker counts as one.')
+mission_encode_seconds = registry.histogram('tauntaun_mission_encode_seconds',
+                                            'Time to encode mission data with MissionEncoder.')
+
+
+def zlib_message(message):
+    message_zlib = zlib.compress(message.encode("utf-8"))
+    return message_zlib
+
+
+class Room:
+    """A planning room: one campaign with its sessions, websocket clients and broadcasts."""
+
+    def __init__(self, room_id, campaign, session_manager=None):
+        self.id = room_id
+        self.campaign = campaign
+        self.session_manager = session_manager if session_manager is not None else SessionManager()
+        self.ws_clients = {}
+        # Edge workers holding clients of the room, by their number of clients
+        self.edges = {}
+        self.presence_hub = PresenceHub()
+        self.replay_buffer = ReplayBuffer()
+        self.miz_exporter = MizExporter(campaign)
+        self.last_active = time.monotonic()
+        self._resume_tokens = {}
+        self._session_tokens = {}
+        self._pending_disconnects = {}
+        self._id_counter = 0
+
+    def is_idle(self):
+        return not self.ws_clients and not self._pending_disconnects
+
+    def mission_json(self, data):
+        with mission_encode_seconds.time():
+            return json.dumps(data, terrain=self.campaign.mission.terrain, convert_coords=True, add_sidc=True,
+                              cls=MissionEncoder)
+
+    def claim_session(self, token):
+        # A known token resumes its session, anything else starts a new one
+        id = self._resume_tokens.get(token)
+        if id is not None and id in self.session_manager.sessions:
+            return id, token, True
+
+        id = self._id_counter
+        self._id_counter += 1
+        token = secrets.token_urlsafe(16)
+        self._resume_tokens[token] = id
+        self._session_tokens[id] = token
+        return id, token, False
+
+    def is_session_token(self, id, token):
+        """Whether token is the resume token of session id, other sockets of a client prove with
+        it that the session is theirs."""
+        expected = self._session_tokens.get(id)
+        if expected is None or not token:
+            return False
+        return hmac.compare_digest(expected.encode('utf-8'), token.encode('utf-8'))
+
+    def _expire_session(self, id):
+        self._pending_disconnects.pop(id, None)
+        self._resume_tokens.pop(self._session_tokens.pop(id, None), None)
+        logging.debug(f"ws client {id:03d} did not resume")
+        asyncio.ensure_future(self.on_disconnect(id))
+
+    def _detach(self, ws):
+        edge = getattr(ws, 'edge', None)
+        if edge is not None:
+            edge.detach(self.id, ws.conn)
+            self.edges[edge] -= 1
+            if not self.edges[edge]:
+                del self.edges[edge]
+
+    def release_session(self, id, ws):
+        """Detaches ws, unless a resumed connection took over the session is held for a while."""
+        if self.ws_clients.get(id) is ws:
+            del self.ws_clients[id]
+            self._detach(ws)
+        self.last_active = time.monotonic()
+        if id not in self.ws_clients and id not in self._pending_disconnects:
+            self._pending_disconnects[id] = asyncio.get_event_loop().call_later(
+                RESUME_GRACE_SECONDS, self._expire_session, id)
+
+    async def attach_client(self, id, ws, token, resumed, last_seq):
+        # Frames the client missed are replayed before it joins the broadcasts, a gap
+        # too large for the replay buffer is bridged by sending the whole mission
+        missed = self.replay_buffer.since(last_seq) if resumed and last_seq is not None else None
+        resync = missed is None and last_seq is not None
+        sent = last_seq if missed is not None else self.replay_buffer.seq
+        await ws.send(zlib_message(json.dumps({
+            'key': 'welcome',
+            'id': id,
+            'resume_token': token,
+            'seq': sent,
+            'resumed': resumed,
+            'resync': resync
+        })))
+        if resync:
+            await ws.send(zlib_message(self.mission_json({'key': 'mission_updated', 'value': self.campaign.mission})))
+
+        while True:
+            frames = self.replay_buffer.since(sent)
+            if frames is None:
+                sent = self.replay_buffer.seq
+                await ws.send(zlib_message(self.mission_json({'key': 'mission_updated',
+                                                              'value': self.campaign.mission})))
+                continue
+            if not frames:
+                break
+            for seq, frame in frames:
+                await ws.send(frame)
+                sent = seq
+
+        # Nothing left to replay, from here on the client gets the broadcasts
+        handle = self._pending_disconnects.pop(id, None)
+        if handle is not None:
+            handle.cancel()
+        previous = self.ws_clients.get(id)
+        if previous is not None:
+            self._detach(previous)
+        self.ws_clients[id] = ws
+        # A client held by an edge worker gets the broadcasts through its edge
+        edge = getattr(ws, 'edge', None)
+        if edge is not None:
+            edge.attach(self.id, ws.conn)
+            self.edges[edge] = self.edges.get(edge, 0) + 1
+        self.last_active = time.monotonic()
+
+    def on_connect(self, id):
+        asyncio.ensure_future(self.broadcast_session_delta(self.session_manager.register(id)))
+
+    async def on_disconnect(self, id):
+        self.presence_hub.leave(id)
+        await self.broadcast_session_delta(self.session_manager.deregister(id))
+
+    async def broadcast(self, data, encode=json.dumps):
+        # Every broadcast is numbered and kept for replay to reconnecting clients
+        key = data['key']
+        start = time.perf_counter()
+        seq = self.replay_buffer.next_seq()
+        message = encode(dict(data, seq=seq))
+        message_zlib = zlib_message(message)
+        broadcast_encode_seconds.labels(key).observe(time.perf_counter() - start)
+        broadcasts_total.labels(key).inc()
+        broadcast_encoded_bytes.labels(key).observe(len(message))
+        broadcast_compressed_bytes.labels(key).observe(len(message_zlib))
+        self.replay_buffer.append(seq, message_zlib)
+        for edge in self.edges:
+            edge.broadcast(self.id, message_zlib)
+        ws_clients = self.ws_clients
+
+        async def _broadcast():
+            start = time.perf_counter()
+
+            async def broadcast_id(ws_id, message):
+                if ws_id not in ws_clients.keys():
+                    logging.debug("Client was removed, continue.")
+                    return
+
+                ws = ws_clients[ws_id]
+                if getattr(ws, 'edge', None) is not None:
+                    return
+
+                try:
+                    await ws.send(message)
+                except ConnectionAbortedError:
+                    logging.warning("Client disconnected during iteration, ignoring ConnectionAbortedError error!")
+
+            await asyncio.gather(
+                *(broadcast_id(ws_id, message_zlib) for ws_id in list(ws_clients))
+            )
+            broadcast_fanout_seconds.observe(time.perf_counter() - start)
+
+        asyncio.ensure_future(_broadcast())
+
+    async def broadcast_session_delta(self, delta):
+        if delta is not None:
+            await self.broadcast(delta, lambda data: json.dumps(data, cls=SessionsEncoder))
+
+    async def broadcast_mission_update(self):
+        await self.broadcast({'key': 'mission_updated', 'value': self.campaign.mission}, self.mission_json)
+
+    async def broadcast_load_progress(self, progress):
+        await self.broadcast({'key': 'load_progress', 'value': progress})
+
+    def close(self):
+        for handle in self._pending_disconnects.values():
+            handle.cancel()
+        self._pending_disconnects = {}
+        self.campaign.close()
+
+
+class RoomManager:
+    """Rooms by id, created on first use by create_campaign(room_id).
+
+    Rooms without clients are unloaded after idle_timeout seconds, except the
+    default room which holds the campaign the server was started with.
+    """
+
+    def __init__(self, default_room, create_campaign=None, idle_timeout=600, max_rooms=16):
+        self.rooms = {default_room.id: default_room}
+        self.create_campaign = create_campaign
+        self.idle_timeout = idle_timeout
+        self.max_rooms = max_rooms
+        self._creating = {}
+
+    @staticmethod
+    def is_valid_id(room_id):
+        return bool(_ROOM_ID.match(room_id))
+
+    async def get(self, room_id):
+        """The room, loaded if needed, or None if room_id is invalid or no room can be added."""
+        room = self.rooms.get(room_id)
+        if room is not None:
+            return room
+
+        if self.create_campaign is None or not self.is_valid_id(room_id):
+            return None
+
+        # Concurrent first requests share one load
+        creating = self._creating.get(room_id)
+        if creating is None:
+            if len(self.rooms) + len(self._creating) >= self.max_rooms:
+                logging.warning(f"Unable to open room {room_id}, {self.max_rooms} rooms are open")
+                return None
+            creating = asyncio.ensure_future(self._create(room_id))
+            self._creating[room_id] = creating
+        return await asyncio.shield(creating)
+
+    async def _create(self, room_id):
+        try:
+            campaign = await self.create_campaign(room_id)
+            room = Room(room_id, campaign)
+            self.rooms[room_id] = room
+            logging.info(f"Room {room_id} opened")
+            return room
+        except Exception:
+            logging.exception(f"Unable to open room {room_id}")
+            return None
+        finally:
+            del self._creating[room_id]
+
+    def unload_idle(self, now=None):
+        now = time.monotonic() if now is None else now
+        for room_id, room in list(self.rooms.items()):
+            if room_id != DEFAULT_ROOM and room.is_idle() and now - room.last_active > self.idle_timeout:
+                del self.rooms[room_id]
+                room.close()
+                logging.info(f"Room {room_id} unloaded after being idle")
+
+    async def poll(self, interval=30):
+        while True:
+            await asyncio.sleep(interval)
+            self.unload_idle()
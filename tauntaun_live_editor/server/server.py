@@ -2,165 +2,267 @@ import os
 import signal
 import json
 import asyncio
+import hashlib
+import hmac
 import logging
-import zlib
+import math
 import shutil
 from functools import wraps
-from werkzeug.utils import secure_filename
 
-from quart import Quart, send_from_directory, make_response, request, send_file
+from quart import Blueprint, Quart, Response, abort, make_response, request, send_file
 from quart import websocket
 
 from hypercorn.config import Config
 from hypercorn.asyncio import serve
 
 from tauntaun_live_editor.sessions import SessionsEncoder
+from tauntaun_live_editor.presence import PresenceClient
+from tauntaun_live_editor.server.room import DEFAULT_ROOM, Room, RoomManager, zlib_message
+from tauntaun_live_editor.server.fanout import EdgeHub, start_edge_workers
 from tauntaun_live_editor.util import get_data_path, is_posix, get_miz_path
 import tauntaun_live_editor.config as config
-from tauntaun_live_editor.static_data import get_static_json
+from tauntaun_live_editor.static_data import get_static_body, get_static_section, get_static_type
 from tauntaun_live_editor.server.mission_encoder import MissionEncoder
-from tauntaun_live_editor.coord import is_map_supported, get_supported_maps, get_map_display_name
-from dcs import Point
+from tauntaun_live_editor.library import MissionLibrary
+from tauntaun_live_editor.web_assets import WebAssets
+from tauntaun_live_editor.metrics import CONTENT_TYPE, registry
+from tauntaun_live_editor.upload import UploadError, UploadStore, receive_mission_upload
+from tauntaun_live_editor.coord import get_supported_maps, get_map_display_name, lat_lon_to_xz, xz_to_lat_lon
+from tauntaun_live_editor.startup import lazy_import, timeline
+
+dcs = lazy_import('dcs')
 
 logger = logging.basicConfig(level=logging.DEBUG)
 
+messages_total = registry.counter('tauntaun_messages_total', 'Websocket messages handled by type.', ['update_type'])
+message_handler_seconds = registry.histogram('tauntaun_message_handler_seconds',
+                                             'Time to handle a websocket message by type.', ['update_type'])
+
 def json_response(data, status=200):
     return make_response(json.dumps(data), status, {'Content-Type': 'application/json'})
 
 def plain_text_response(x):
     return make_response(x, 200, {'Content-Type': 'text/plain'})
 
-def create_app(campaign, session_manager):
+def is_admin_password(password):
+    # The UI sends the SHA256 of the password, scrapers send the password itself
+    # Compared as bytes, compare_digest rejects str holding anything but ASCII
+    expected = config.config.admin_password.encode('utf-8')
+    password = password.encode('utf-8')
+    digest = hashlib.sha256(password).hexdigest().encode('ascii')
+    return hmac.compare_digest(digest, expected) or hmac.compare_digest(password, expected)
+
+def create_app(campaign, session_manager, on_startup=None, create_room_campaign=None, edge_ports=()):
+    """campaign and session_manager make up the default room, create_room_campaign(room_id)
+    returns the campaign of a new room, without it there are no other rooms. An edge worker
+    process is started for each of edge_ports."""
     data_dir = get_data_path()
-    ws_clients = {}
 
-    app = Quart(__name__, static_folder=os.path.join(data_dir, 'web', 'static'),
-                template_folder=os.path.join(data_dir, 'web'))
-    
-    def zlib_message(message):
-        message_zlib = zlib.compress(message.encode("utf-8"))
-        return message_zlib
+    # static/ is served by send_static, precompressed, not by Quart's static route
+    app = Quart(__name__, static_folder=None, template_folder=os.path.join(data_dir, 'web'))
+    # Mission uploads are capped while streaming, leave room for the multipart framing
+    app.config['MAX_CONTENT_LENGTH'] = (config.config.max_upload_size_mb + 1) * 1024 * 1024
+    # The UI files are served precompressed, the hashed bundles under static/ are cached for good
+    web_assets = WebAssets(os.path.join(data_dir, 'web'))
+    upload_store = UploadStore(os.path.join(data_dir, 'uploads'))
+    mission_library = MissionLibrary({'missions': get_miz_path(), 'uploads': upload_store.uploads_dir},
+                                     config.get_datadir() / "mission_library.json", exclude=[upload_store.blobs_dir])
+    rooms = RoomManager(Room(DEFAULT_ROOM, campaign, session_manager), create_room_campaign,
+                        config.config.room_idle_timeout_minutes * 60, config.config.max_rooms)
+    # The room routes are served for the default room and under /room/<room_id>
+    room_routes = Blueprint('room', __name__)
+    background_tasks = []
+    edge_processes = []
+    startup_task = None
+
+    @app.before_serving
+    async def start_background_tasks():
+        nonlocal startup_task
+        timeline.mark('server starting', 0)
+        # Heavy startup work runs once the port is bound, the pages are served meanwhile
+        if on_startup is not None:
+            startup_task = asyncio.ensure_future(on_startup())
+        background_tasks.append(asyncio.ensure_future(mission_library.poll()))
+        background_tasks.append(asyncio.ensure_future(rooms.poll()))
+        if edge_ports:
+            address = await edge_hub.listen()
+            edge_processes.extend(start_edge_workers(address, edge_hub.token, edge_ports))
+
+    async def wait_for_startup():
+        if startup_task is not None and not startup_task.done():
+            await asyncio.shield(startup_task)
+
+    @app.before_request
+    async def gate_request():
+        if request.path.startswith(('/game/', '/room/')):
+            await wait_for_startup()
+
+    @app.before_websocket
+    async def gate_websocket():
+        await wait_for_startup()
+
+    @app.after_serving
+    async def stop_background_tasks():
+        for task in background_tasks:
+            task.cancel()
+        edge_hub.close()
+        for process in edge_processes:
+            process.terminate()
+
+    def with_room(func):
+        @wraps(func)
+        async def wrapper(*args, room_id=DEFAULT_ROOM, **kwargs):
+            room = await rooms.get(room_id)
+            if room is None:
+                return await json_response({'error': f'Unknown room {room_id}'}, 404)
+            return await func(room, *args, **kwargs)
+
+        return wrapper
+
+    def any_room(func):
+        # Served the same for every room
+        @wraps(func)
+        async def wrapper(*args, room_id=DEFAULT_ROOM, **kwargs):
+            return await func(*args, **kwargs)
+
+        return wrapper
+
+    async def web_asset_response(path):
+        asset = await web_assets.fetch(path)
+        if asset is None:
+            abort(404)
+
+        headers = {'Vary': 'Accept-Encoding', 'ETag': f'"{asset.etag}"', 'Cache-Control': asset.cache_control}
+        if asset.etag in request.if_none_match:
+            return Response(b'', status=304, headers=headers)
+
+        encoding = next((encoding for encoding in ('br', 'gzip')
+                         if encoding in asset.variants and request.accept_encodings[encoding]), 'identity')
+        if encoding != 'identity':
+            headers['Content-Encoding'] = encoding
+        body = asset.variants[encoding]
+        if isinstance(body, bytes):
+            return Response(body, mimetype=asset.mimetype, headers=headers)
+
+        response = await send_file(body, mimetype=asset.mimetype, add_etags=False)
+        response.headers.update(headers)
+        return response
+
+    registry.gauge('tauntaun_connected_clients', 'Connected websocket clients in all rooms.',
+                   function=lambda: sum(len(room.ws_clients) for room in rooms.rooms.values()))
+    registry.gauge('tauntaun_rooms', 'Open rooms.', function=lambda: len(rooms.rooms))
+    registry.gauge('tauntaun_edge_workers', 'Connected edge worker processes.', function=lambda: len(edge_hub.edges))
+
+    @app.route('/metrics')
+    async def send_metrics():
+        # Scraped with the admin password, as a basic auth password or a bearer token
+        auth = request.authorization
+        password = None
+        if auth is not None:
+            password = auth.token if auth.type == 'bearer' else auth.password
+        if not password or not is_admin_password(password):
+            return Response('Unauthorized\n', status=401, headers={'WWW-Authenticate': 'Basic realm="metrics"'})
+        return Response(registry.render(), content_type=CONTENT_TYPE)
 
     @app.route('/', defaults={'path': 'index.html'})
     async def send_root(path):
-        return await send_from_directory(os.path.join(data_dir, 'web'), path)
+        return await web_asset_response(path)
 
     @app.route('/editor')
     async def send_editor():
         # Serve the original React app for the editor
-        return await send_from_directory(os.path.join(data_dir, 'web'), 'editor.html')
+        return await web_asset_response('editor.html')
 
     @app.route('/<path:path>')
     async def send_static_root(path):
-        return await send_from_directory(os.path.join(data_dir, 'web'), path)
+        return await web_asset_response(path)
 
     @app.route('/static/<path:path>')
     async def send_static(path):
-        return await send_from_directory(os.path.join(data_dir, 'web', 'static'), path)
+        return await web_asset_response(f'static/{path}')
+
+    @app.route('/room/<room_id>/')
+    async def send_room(room_id):
+        return await web_asset_response('index.html')
 
-    @app.route('/game/upload_mission', methods=['POST'])
-    async def upload_mission():
+    @room_routes.route('/game/upload_mission', methods=['POST'])
+    @with_room
+    async def upload_mission(room):
+        campaign = room.campaign
+        if request.mimetype != 'multipart/form-data' or 'boundary' not in request.mimetype_params:
+            return json.dumps({'success': False, 'error': 'No mission file provided'})
+
+        # Stream the file to disk while hashing it, nothing is buffered in memory
+        max_bytes = config.config.max_upload_size_mb * 1024 * 1024
         try:
-            # Check if file was uploaded
-            if 'mission' not in (await request.files):
-                return json.dumps({'success': False, 'error': 'No mission file provided'})
-            
-            file = (await request.files)['mission']
-            
-            # Validate file extension
-            if not file.filename.lower().endswith('.miz'):
-                return json.dumps({'success': False, 'error': 'Invalid file type. Please upload a .miz file'})
-            
-            # Secure the filename
-            filename = secure_filename(file.filename)
-            
-            # Create uploads directory if it doesn't exist
-            uploads_dir = os.path.join(data_dir, 'uploads')
-            os.makedirs(uploads_dir, exist_ok=True)
-            
-            # Save the uploaded file
-            file_path = os.path.join(uploads_dir, filename)
-            await file.save(file_path)
-            
-            # Try to load the mission to check map support
-            try:
-                # Import dcs here to avoid circular imports
-                import dcs
-                mission = dcs.Mission()
-                mission.load_file(file_path)
-                
-                # Check if the map is supported
-                terrain_name = mission.terrain.name
-                if not is_map_supported(terrain_name):
-                    supported_maps = get_supported_maps()
-                    supported_display_names = [get_map_display_name(map_name) for map_name in supported_maps]
-                    
-                    error_message = f"Unsupported map: {get_map_display_name(terrain_name)}. "
-                    error_message += f"Supported maps: {', '.join(supported_display_names)}"
-                    
-                    # Clean up the uploaded file
-                    try:
-                        os.remove(file_path)
-                    except:
-                        pass
-                    
-                    return json.dumps({
-                        'success': False, 
-                        'error': error_message,
-                        'error_type': 'unsupported_map',
-                        'unsupported_map': terrain_name,
-                        'supported_maps': supported_maps
-                    })
-                
-                # Map is supported, load it into the campaign
-                campaign.load_mission(file_path)
-                logging.info(f"Mission uploaded and loaded: {filename} (Map: {get_map_display_name(terrain_name)})")
-                return json.dumps({
-                    'success': True, 
-                    'filename': filename,
-                    'map': terrain_name,
-                    'map_display_name': get_map_display_name(terrain_name)
-                })
-                
-            except KeyError as e:
-                # This usually indicates a missing aircraft/vehicle mod
-                error_key = str(e).strip("'")
-                error_message = f"Missing aircraft/vehicle mod: {error_key}. "
-                error_message += "This mission contains units from a mod that is not installed or not supported."
-                
-                # Clean up the uploaded file
-                try:
-                    os.remove(file_path)
-                except:
-                    pass
-                
-                logging.error(f"Missing mod in uploaded mission: {error_key}")
-                return json.dumps({
-                    'success': False, 
-                    'error': error_message,
-                    'error_type': 'missing_mod',
-                    'missing_mod': error_key
-                })
-                
-            except Exception as e:
-                # Clean up the uploaded file
-                try:
-                    os.remove(file_path)
-                except:
-                    pass
-                
-                logging.error(f"Failed to load uploaded mission: {e}")
-                return json.dumps({
-                    'success': False, 
-                    'error': f'Failed to load mission: {str(e)}',
-                    'error_type': 'load_error'
-                })
-                
+            upload = await receive_mission_upload(request.body, request.mimetype_params['boundary'],
+                                                  'mission', upload_store.blobs_dir, max_bytes)
+        except UploadError as e:
+            logging.warning(f"Upload rejected: {e}")
+            return json.dumps(e.response())
         except Exception as e:
             logging.error(f"Upload error: {e}")
             return json.dumps({'success': False, 'error': 'Upload failed'})
 
-    @app.route('/game/supported_maps')
+        if upload is None:
+            return json.dumps({'success': False, 'error': 'No mission file provided'})
+
+        file_path = upload_store.store(upload)
+        filename = os.path.basename(file_path)
+
+        async def reject(response, error):
+            # Clean up the uploaded file
+            upload_store.remove(upload.sha256, file_path)
+            await room.broadcast_load_progress({'filename': filename, 'stage': 'failed', 'error': error})
+            return json.dumps(response)
+
+        # Check the theatre and unit types before parsing, identical uploads share one parse
+        generation = campaign.begin_load()
+        try:
+            await room.broadcast_load_progress({'filename': filename, 'stage': 'parsing'})
+            mission = await upload_store.load(upload.sha256, file_path, campaign.mission_cache)
+        except UploadError as e:
+            logging.error(f"Rejected uploaded mission {filename}: {e}")
+            return await reject(e.response(), e.message)
+        except KeyError as e:
+            # This usually indicates a missing aircraft/vehicle mod
+            error_key = str(e).strip("'")
+            error_message = f"Missing aircraft/vehicle mod: {error_key}. "
+            error_message += "This mission contains units from a mod that is not installed or not supported."
+
+            logging.error(f"Missing mod in uploaded mission: {error_key}")
+            return await reject({
+                'success': False,
+                'error': error_message,
+                'error_type': 'missing_mod',
+                'missing_mod': error_key
+            }, error_message)
+        except Exception as e:
+            logging.error(f"Failed to load uploaded mission: {e}")
+            return await reject({
+                'success': False,
+                'error': f'Failed to load mission: {str(e)}',
+                'error_type': 'load_error'
+            }, str(e))
+
+        terrain_name = mission.terrain.name
+        if not campaign.finish_load(generation, file_path, mission):
+            await room.broadcast_load_progress({'filename': filename, 'stage': 'superseded'})
+            return json.dumps({'success': False, 'error': 'A newer mission load replaced this upload',
+                               'error_type': 'superseded'})
+
+        await room.broadcast_load_progress({'filename': filename, 'stage': 'done'})
+        await room.broadcast_mission_update()
+        logging.info(f"Mission uploaded and loaded: {filename} (Map: {get_map_display_name(terrain_name)})")
+        return json.dumps({
+            'success': True,
+            'filename': filename,
+            'map': terrain_name,
+            'map_display_name': get_map_display_name(terrain_name)
+        })
+
+    @room_routes.route('/game/supported_maps')
+    @any_room
     async def get_supported_maps_endpoint():
         """Get list of supported maps for the frontend."""
         supported_maps = get_supported_maps()
@@ -172,187 +274,263 @@ def create_app(campaign, session_manager):
             })
         return json.dumps({'maps': maps_info})
 
-    @app.route('/game/mission')
-    async def render_mission():
-        return json.dumps(campaign.mission, terrain=campaign.mission.terrain, convert_coords=True, add_sidc=True, cls=MissionEncoder)
-
-    @app.route('/game/sessions')
-    async def render_sessions():
-        return json.dumps(session_manager.sessions, cls=SessionsEncoder)
-
-    @app.route('/game/auth_admin/<password>')
+    @room_routes.route('/game/mission')
+    @with_room
+    async def render_mission(room):
+        return room.mission_json(room.campaign.mission)
+
+    @room_routes.route('/game/sessions')
+    @with_room
+    async def render_sessions(room):
+        session_manager = room.session_manager
+        # The version lets clients line up the session deltas broadcast after this snapshot
+        return await make_response(json.dumps(session_manager.sessions, cls=SessionsEncoder), 200,
+                                   {'Content-Type': 'application/json',
+                                    'X-Sessions-Version': str(session_manager.version)})
+
+    @room_routes.route('/game/auth_admin/<password>')
+    @any_room
     async def render_auth_admin_password(password):
         return 'true' if config.config.admin_password == password else 'false'
 
-    @app.route('/game/static_data')
-    async def render_static_data():
-        return get_static_json()
+    async def static_body_response(body):
+        if body is None:
+            return await json_response({'error': 'Unknown static data'}, 404)
 
-    @app.route('/game/mission_dir')
+        headers = {'Content-Type': 'application/json', 'Vary': 'Accept-Encoding', 'ETag': f'"{body.etag}"',
+                   'Cache-Control': 'no-cache'}
+        if body.etag in request.if_none_match:
+            return Response(b'', status=304, headers=headers)
+
+        # Served precompressed, the variants are encoded once per body
+        for encoding in ('br', 'gzip'):
+            if encoding in body.variants and request.accept_encodings[encoding]:
+                headers['Content-Encoding'] = encoding
+                return Response(body.variants[encoding], headers=headers)
+        return Response(body.variants['identity'], headers=headers)
+
+    @room_routes.route('/game/static_data')
+    @any_room
+    async def render_static_data():
+        return await static_body_response(get_static_body())
+
+    @room_routes.route('/game/static_data/<category>')
+    @any_room
+    async def render_static_section(category):
+        # ids=a,b limits the section to the types the client needs
+        ids = request.args.get('ids')
+        type_ids = [type_id for type_id in ids.split(',') if type_id] if ids is not None else None
+        return await static_body_response(get_static_section(category, type_ids))
+
+    @room_routes.route('/game/static_data/<category>/<path:type_id>')
+    @any_room
+    async def render_static_type(category, type_id):
+        return await static_body_response(get_static_type(category, type_id))
+
+    @room_routes.route('/game/edge')
+    @any_room
+    async def render_edge():
+        # Clients open /ws/message on the least busy edge worker, on this port without edges
+        edge = edge_hub.pick_edge()
+        return await json_response({'port': edge.port if edge is not None else None})
+
+    @room_routes.route('/game/mission_dir')
+    @any_room
     async def render_mission_dir():
         return json_response(get_miz_path())
 
-    @app.route('/game/download_mission')
-    async def download_mission():
-        """Download the current mission as a .miz file"""
+    @room_routes.route('/game/missions')
+    @any_room
+    async def render_missions():
         try:
-            # Get the current mission path
-            if campaign.loaded_mission_path:
-                mission_path = campaign.loaded_mission_path
-            else:
-                # If no mission is loaded, save to a temporary file
-                mission_path = os.path.join(get_miz_path(), "tauntaun_mission.miz")
-                campaign.save_mission(mission_path)
-            
-            # Check if the file exists
-            if not os.path.exists(mission_path):
-                return json_response({"error": "Mission file not found"}, status=404)
-            
-            # Return the file for download
-            directory = os.path.dirname(mission_path)
-            filename = os.path.basename(mission_path)
-            return await send_from_directory(
-                directory,
-                filename,
-                as_attachment=True,
-                mimetype='application/octet-stream'
-            )
-            
-        except Exception as e:
-            logging.error(f"Error downloading mission: {e}")
-            return json_response({"error": "Failed to download mission"}, status=500)
-
-    def collect_websocket(on_connect, on_disconnect):
-        def wrapper_0(func):
-            @wraps(func)
-            async def wrapper(*args, **kwargs):
-                id = wrapper.id_counter
-                ws_clients[id] = websocket._get_current_object()
-                logging.debug(f"adding ws client {id:3d}")
-                on_connect(id)
-                wrapper.id_counter += 1
-
-                try:
-                    return await func(*args, **kwargs)
-                except asyncio.CancelledError as error:
-                    logging.debug(f"ws client disconnected {id:03d}")
-                    raise error
-                finally:
-                    logging.debug(f"removing ws client {id:03d}")
-                    del ws_clients[id]
-                    await on_disconnect(id)
-
-            wrapper.id_counter = 0
-
-            return wrapper
-        return wrapper_0
-
-    async def broadcast(message):
-        async def _broadcast():
-            async def broadcast_id(ws_id, message):
-                if ws_id not in ws_clients.keys():
-                    logging.debug("Client was removed, continue.")
-                    return
-
-                ws = ws_clients[ws_id]
+            page = int(request.args.get('page', 0))
+            page_size = int(request.args.get('page_size', 50))
+        except ValueError:
+            return await json_response({"error": "page and page_size must be integers"}, status=400)
 
-                try:
-                    await ws.send(message)
-                except ConnectionAbortedError:
-                    logging.warning("Client disconnected during iteration, ignoring ConnectionAbortedError error!")
+        if page < 0 or not 0 < page_size <= 500:
+            return await json_response({"error": "page must be >= 0 and page_size between 1 and 500"}, status=400)
 
-            message_zlib = zlib_message(message)
+        return await json_response(mission_library.page(page, page_size, request.args.get('source')))
 
-            await asyncio.gather(
-                *(broadcast_id(ws_id, message_zlib) for ws_id in list(ws_clients))
-            )
-
-        asyncio.ensure_future(_broadcast())
+    @room_routes.route('/game/query/nearby')
+    @with_room
+    async def query_nearby(room):
+        campaign = room.campaign
+        try:
+            lat = float(request.args['lat'])
+            lon = float(request.args['lon'])
+            radius = float(request.args.get('radius', 10000))
+        except (KeyError, ValueError):
+            return await json_response({"error": "lat, lon and radius must be numbers"}, status=400)
+        if not (math.isfinite(lat) and math.isfinite(lon) and math.isfinite(radius) and radius > 0):
+            return await json_response({"error": "lat and lon must be finite and radius a positive number"},
+                                       status=400)
+
+        kind = request.args.get('kind')
+        if kind not in (None, 'unit', 'group', 'airport'):
+            return await json_response({"error": f"Unknown kind {kind}"}, status=400)
+
+        terrain_name = campaign.mission.terrain.name
+        x, z = lat_lon_to_xz(terrain_name, lat, lon)
+
+        result = []
+        for side, item_kind, item, distance in campaign.query_nearby(x, z, radius, kind, request.args.get('coalition')):
+            position = item.position
+            item_lat, item_lon = xz_to_lat_lon(terrain_name, position.x, position.y)
+            result.append({
+                'kind': item_kind,
+                'coalition': side,
+                'id': item.id,
+                'name': str(item.name),
+                'distance': distance,
+                'position': {'lat': item_lat, 'lon': item_lon}
+            })
 
-    async def broadcast_session_update():
-        broadcast_data = {'key': 'sessions_updated', 'value': session_manager.sessions}
-        await broadcast(json.dumps(broadcast_data, cls=SessionsEncoder))
+        return await json_response(result)
 
-    async def on_ws_disconnect(id):
-        session_manager.deregister(id)
-        await broadcast_session_update()
+    @room_routes.route('/game/download_mission')
+    @with_room
+    async def download_mission(room):
+        """Download the current mission as a .miz file"""
+        campaign = room.campaign
+        try:
+            # Built in memory from the live mission, shared by every download of the same revision
+            data = await room.miz_exporter.export()
+        except Exception as e:
+            logging.error(f"Error downloading mission: {e}")
+            return await json_response({"error": "Failed to download mission"}, status=500)
+
+        if campaign.loaded_mission_path:
+            filename = os.path.basename(campaign.loaded_mission_path)
+        else:
+            filename = "tauntaun_mission.miz"
+
+        return Response(data, mimetype='application/octet-stream', headers={
+            'Content-Disposition': f'attachment; filename="{filename}"',
+            'Content-Length': str(len(data)),
+            'Cache-Control': 'no-cache'
+        })
+
+    async def serve_client(room, ws, args, receive):
+        """Serves a client of room until it disconnects, receive() returns its next message
+        or None once it is gone."""
+        try:
+            last_seq = int(args['seq']) if 'seq' in args else None
+        except ValueError:
+            last_seq = None
+        id, token, resumed = room.claim_session(args.get('resume'))
+        logging.debug(f"{'resuming' if resumed else 'adding'} ws client {id:3d}")
+        if not resumed:
+            room.on_connect(id)
 
-    async def process_message_request(ws, ws_id, data):
+        try:
+            await room.attach_client(id, ws, token, resumed, last_seq)
+            while True:
+                data = await receive()
+                if data is None:
+                    logging.debug(f"ws client disconnected {id:03d}")
+                    return
+                await process_message_request(room, ws, id, data)
+        except asyncio.CancelledError as error:
+            logging.debug(f"ws client disconnected {id:03d}")
+            raise error
+        finally:
+            logging.debug(f"removing ws client {id:03d}")
+            room.release_session(id, ws)
+
+    async def open_edge_client(room_id, ws, args, receive):
+        room = await rooms.get(room_id)
+        if room is None:
+            logging.warning(f"Edge client for unknown room {room_id}")
+            return
+        await serve_client(room, ws, args, receive)
+
+    # Clients of edge worker processes are served here, the edges only hold their sockets
+    edge_hub = EdgeHub(open_edge_client)
+    app.extensions['edge_hub'] = edge_hub
+
+    async def process_message_request(room, ws, ws_id, data):
         logging.info(f"$Client_id: {ws_id}, Data: ${data}")
         data = json.loads(data)
         update_type = data['key']
-        game_service = campaign.game_service
-        group_route_request_handler = game_service.group_route_request_handler
-
-        async def broadcast_mission_update():
-            broadcast_data = {'key': 'mission_updated', 'value': campaign.mission}
-
-            await broadcast(
-                json.dumps(broadcast_data, terrain=campaign.mission.terrain, convert_coords=True, add_sidc=True,
-                           cls=MissionEncoder))
+        campaign = room.campaign
+        session_manager = room.session_manager
+        broadcast = room.broadcast
+        mission_json = room.mission_json
+        broadcast_mission_update = room.broadcast_mission_update
+        broadcast_session_delta = room.broadcast_session_delta
 
         async def broadcast_route_update(group):
+            encoder = MissionEncoder(campaign.mission.terrain, convert_coords=True, add_sidc=True)
             broadcast_data = {'key': 'route_update',
                               'group_id': group.id,
-                              'points': group.points}
+                              'route_revision': getattr(group, 'route_revision', 0),
+                              'points': encoder.points(group.points)}
 
-            await broadcast(
-                json.dumps(broadcast_data, terrain=campaign.mission.terrain, convert_coords=True, add_sidc=True,
-                           cls=MissionEncoder))
+            await broadcast(broadcast_data, mission_json)
 
         async def broadcast_bullseye_update(coalition, bullseye):
             broadcast_data = {'key': 'bullseye_update',
                               'coalition': coalition,
                               'bullseye': bullseye}
 
-            await broadcast(
-                json.dumps(broadcast_data, terrain=campaign.mission.terrain, convert_coords=True, add_sidc=True,
-                           cls=MissionEncoder))
+            await broadcast(broadcast_data, mission_json)
 
         async def broadcast_unit_update(unit):
             broadcast_data = {'key': 'unit_update',
                               'id': unit.id,
                               'unit': unit}
 
-            await broadcast(
-                json.dumps(broadcast_data, terrain=campaign.mission.terrain, convert_coords=True, add_sidc=True,
-                           cls=MissionEncoder))
+            await broadcast(broadcast_data, mission_json)
 
 
         async def group_route_insert_at(group_data):
-            group = group_route_request_handler.insert_at(
-                group_data['id'], group_data['new'], group_data['at'])
+            group = campaign.apply_operation('group_route_insert_at', group_data)
 
             await broadcast_route_update(group)
 
         async def group_route_remove(group_data):
-            group = group_route_request_handler.remove(
-                group_data['id'], group_data['point'])
+            group = campaign.apply_operation('group_route_remove', group_data)
 
             await broadcast_route_update(group)
 
         async def group_route_modify(group_data):
-            group = group_route_request_handler.modify(
-                group_data['id'], group_data['old'], group_data['new'])
+            group = campaign.apply_operation('group_route_modify', group_data)
 
             await broadcast_route_update(group)
 
         async def add_flight(group_data):
-            game_service.add_flight(
-                group_data['coalition'],
-                group_data['country'],
-                group_data['location'],
-                group_data['airport'],
-                group_data['plane'],
-                group_data['number_of_planes'])
+            campaign.apply_operation('add_flight', group_data)
 
             await broadcast_mission_update()
 
+        async def add_flights(flights_data):
+            if not isinstance(flights_data, list):
+                await ws.send(zlib_message(json.dumps({
+                    'key': 'add_flights_result',
+                    'value': [],
+                    'error': 'add_flights expects a list of flights'
+                })))
+                return
+
+            results = campaign.apply_operation('add_flights', flights_data)
+
+            added = [{'coalition': r['coalition'], 'country': r['country'], 'group': r['group']}
+                     for r in results if r['success']]
+            if added:
+                await broadcast({'key': 'flights_added', 'flights': added}, mission_json)
+
+            response = [{'index': index, 'success': True, 'group_id': r['group'].id} if r['success'] else
+                        {'index': index, 'success': False, 'error': r['error']}
+                        for index, r in enumerate(results)]
+            await ws.send(zlib_message(json.dumps({
+                'key': 'add_flights_result',
+                'value': response
+            })))
+
         async def add_jtac(group_data):
-            game_service.add_jtac(
-                group_data['coalition'],
-                group_data['country'],
-                group_data['location'])
+            campaign.apply_operation('add_jtac', group_data)
 
             await broadcast_mission_update()
 
@@ -363,22 +541,31 @@ def create_app(campaign, session_manager):
 
         async def load_mission(data):
             mission_path = os.path.join(get_miz_path(), data)
-            campaign.load_mission(mission_path)
-
-            await broadcast_mission_update()
+            if await campaign.load_mission_async(mission_path, room.broadcast_load_progress):
+                await broadcast_mission_update()
 
         async def unit_loadout_update(unit_data):
-            unit = game_service.update_unit_loadout(
-                unit_data['id'], unit_data['pylons'], unit_data['chaff'], unit_data['flare'], unit_data['gun'],
-                unit_data['fuel'])
+            unit = campaign.apply_operation('unit_loadout_update', unit_data)
 
             await broadcast_unit_update(unit)
 
         async def session_data_update(data):
-            session_manager.update_session(
-                data['id'], data['session_data'])
+            session_id = data['id']
+            delta = session_manager.update_session(session_id, data['session_data'])
+            if delta is not None:
+                await broadcast_session_delta(delta)
+                return
 
-            await broadcast_session_update()
+            # Only the sender has to roll back a rejected update, nothing changed for the others
+            session = session_manager.sessions.get(session_id)
+            requested = data['session_data']
+            if session is not None and (session.name, session.selected_unit_id, session.coalition) != \
+                    (requested['name'], requested['selected_unit_id'], requested['coalition']):
+                await ws.send(zlib_message(json.dumps({
+                    'key': 'session_rejected',
+                    'id': session_id,
+                    'value': session
+                }, cls=SessionsEncoder)))
 
         async def request_session_id(data):
             await ws.send(zlib_message(json.dumps({
@@ -387,13 +574,11 @@ def create_app(campaign, session_manager):
             })))
 
         async def set_bullseye(data):
-            bulls = game_service.set_bullseye(
-                data['coalition'],
-                data['bullseye'])
+            bulls = campaign.apply_operation('set_bullseye', data)
 
             await broadcast_bullseye_update(
                 data['coalition'],
-                Point(bulls['x'], bulls['y'], campaign.mission.terrain))
+                dcs.Point(bulls['x'], bulls['y'], campaign.mission.terrain))
 
         dispatch_map = {
             'group_route_insert_at': group_route_insert_at,
@@ -402,6 +587,7 @@ def create_app(campaign, session_manager):
             'save_mission': save_mission,
             'load_mission': load_mission,
             'add_flight': add_flight,
+            'add_flights': add_flights,
             'add_jtac': add_jtac,
             'unit_loadout_update': unit_loadout_update,
             'session_data_update': session_data_update,
@@ -409,26 +595,51 @@ def create_app(campaign, session_manager):
             'set_bullseye': set_bullseye
         }
 
-        await dispatch_map[update_type](data['value'])
-
-    @app.websocket('/ws/message')
-    @collect_websocket(session_manager.register, on_ws_disconnect)
-    async def client_update_ws():
-        while True:
-            ws = websocket._get_current_object()
-            ws_id = next(key for key, value in ws_clients.items() if value == ws)
-            if ws_id == -1:
-                logging.warning("Invalid client request")
-                return
+        handler = dispatch_map[update_type]
+        messages_total.labels(update_type).inc()
+        with message_handler_seconds.labels(update_type).time():
+            await handler(data['value'])
+
+    @room_routes.websocket('/ws/message')
+    @with_room
+    async def client_update_ws(room):
+        await serve_client(room, websocket._get_current_object(), websocket.args, websocket.receive)
+
+    @room_routes.websocket('/ws/presence/<int:session_id>')
+    @with_room
+    async def presence_ws(room, session_id):
+        # Cursors and selections travel apart from /ws/message, never behind a mission payload
+        session_manager = room.session_manager
+        presence_hub = room.presence_hub
+        if session_id not in session_manager.sessions:
+            logging.warning(f"Presence for unknown session {session_id}")
+            return
+        # Only the client holding the session may publish its cursor and selection
+        if not room.is_session_token(session_id, websocket.args.get('token')):
+            logging.warning(f"Presence for session {session_id} without its resume token")
+            return 'Forbidden', 403
+
+        ws = websocket._get_current_object()
+        client = PresenceClient(ws.send)
+        client_id = presence_hub.connect(client)
+        sender = asyncio.ensure_future(client.run())
+        try:
+            while session_id in session_manager.sessions:
+                presence_hub.update(session_id, await ws.receive())
+        finally:
+            sender.cancel()
+            presence_hub.disconnect(client_id)
+            presence_hub.leave(session_id)
 
-            data = await websocket.receive()
-            await process_message_request(ws, ws_id, data)
+    app.register_blueprint(room_routes)
+    app.register_blueprint(room_routes, url_prefix='/room/<room_id>', name='rooms')
 
     return app
 
 
-def run(campaign, session_manager, port=80):
-    app = create_app(campaign, session_manager)
+def run(campaign, session_manager, port=80, on_startup=None, create_room_campaign=None):
+    edge_ports = [port + 1 + index for index in range(config.config.edge_workers)]
+    app = create_app(campaign, session_manager, on_startup, create_room_campaign, edge_ports)
 
     shutdown_event = asyncio.Event()
 
@@ -446,9 +657,9 @@ def run(campaign, session_manager, port=80):
         loop.add_signal_handler(signal.SIGINT, _signal_handler)
         loop.add_signal_handler(signal.SIGTERM, _signal_handler)
 
-    config = Config()
-    config.bind = ["0.0.0.0:" + str(port)]
+    server_config = Config()
+    server_config.bind = ["0.0.0.0:" + str(port)]
 
     loop.run_until_complete(
-        serve(app, config, shutdown_trigger=shutdown_event.wait)
+        serve(app, server_config, shutdown_trigger=shutdown_event.wait)
     )
@@ -4,6 +4,10 @@ import logging
 
 import tauntaun_live_editor.config as config
 
+SESSION_JOINED = 'session_joined'
+SESSION_LEFT = 'session_left'
+SESSION_CHANGED = 'session_changed'
+
 class SessionsEncoder(JSONEncoder):
         def session_data(self, obj):
             return {
@@ -25,35 +29,86 @@ class SessionData:
         self.coalition = ""
 
 class SessionManager:
+    """Sessions by client id.
+
+    Names and selected units are unique, both are indexed for the conflict checks.
+    Every change bumps version and is returned as a delta message, clients apply
+    the deltas in version order and refetch the sessions when they miss one.
+    """
+
     def __init__(self):
         self.sessions = {}
+        self.version = 0
+        self._ids_by_name = {}
+        self._ids_by_unit = {}
+
+    def _delta(self, key, id):
+        self.version += 1
+        delta = {'key': key, 'version': self.version, 'id': id}
+        if key != SESSION_LEFT:
+            delta['value'] = self.sessions[id]
+        return delta
+
+    def _index(self, id, session):
+        self._ids_by_name[session.name] = id
+        if session.selected_unit_id != -1:
+            self._ids_by_unit[session.selected_unit_id] = id
+
+    def _unindex(self, id, session):
+        if self._ids_by_name.get(session.name) == id:
+            del self._ids_by_name[session.name]
+        if self._ids_by_unit.get(session.selected_unit_id) == id:
+            del self._ids_by_unit[session.selected_unit_id]
 
     def register(self, id):
-        self.sessions[id] = SessionData()
-        self.sessions[id].coalition = config.config.default_coalition
-        self.sessions[id].name = "Pilot " + str(id)
+        session = SessionData()
+        session.coalition = config.config.default_coalition
+        session.name = "Pilot " + str(id)
+        suffix = 1
+        while session.name in self._ids_by_name:
+            suffix += 1
+            session.name = f"Pilot {id} ({suffix})"
+
+        self.sessions[id] = session
+        self._index(id, session)
+        return self._delta(SESSION_JOINED, id)
 
     def deregister(self, id):
-        del self.sessions[id]
+        session = self.sessions.pop(id, None)
+        if session is None:
+            return None
+
+        self._unindex(id, session)
+        return self._delta(SESSION_LEFT, id)
 
     def update_session(self, id, sessionData):
+        """Returns the delta to broadcast, None if the update was rejected or changed nothing."""
+        session = self.sessions.get(id)
+        if session is None:
+            logging.warning(f"Session update rejected: unknown session {id}")
+            return None
+
         name = sessionData['name']
         selected_unit_id = sessionData['selected_unit_id']
+        coalition = sessionData['coalition']
 
         # Reject update if name or unit is occupied
-        for session_id in self.sessions:
-            session = self.sessions[session_id]
-            if session_id != id:
-                if name == session.name:
-                    logging.warning("Session update rejected: name occupied")
-                    return
+        if self._ids_by_name.get(name, id) != id:
+            logging.warning("Session update rejected: name occupied")
+            return None
+
+        if selected_unit_id != -1 and self._ids_by_unit.get(selected_unit_id, id) != id:
+            logging.warning("Session update rejected: unit is occupied")
+            return None
 
-                if selected_unit_id != -1 and selected_unit_id == session.selected_unit_id:
-                    logging.warning("Session update rejected: unit is occupied")
-                    return
+        if (name, selected_unit_id, coalition) == (session.name, session.selected_unit_id, session.coalition):
+            return None
 
-        self.sessions[id].name = name
-        self.sessions[id].selected_unit_id = selected_unit_id
-        self.sessions[id].coalition = sessionData['coalition']
+        self._unindex(id, session)
+        session.name = name
+        session.selected_unit_id = selected_unit_id
+        session.coalition = coalition
+        self._index(id, session)
 
         logging.info("Session updated")
+        return self._delta(SESSION_CHANGED, id)
@@ -0,0 +1,60 @@
+import math
+
+
+class SpatialGrid:
+    """Uniform grid over DCS x/y coordinates for radius queries."""
+
+    def __init__(self, cell_size=10000):
+        self._cell_size = cell_size
+        self._cells = {}
+        self._entries = {}
+
+    def _cell(self, x, y):
+        return int(math.floor(x / self._cell_size)), int(math.floor(y / self._cell_size))
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries
+
+    def insert(self, key, x, y, item):
+        if key in self._entries:
+            self.remove(key)
+
+        cell = self._cell(x, y)
+        self._entries[key] = (x, y, item, cell)
+        self._cells.setdefault(cell, set()).add(key)
+
+    def remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+
+        cell = entry[3]
+        keys = self._cells[cell]
+        keys.discard(key)
+        if not keys:
+            del self._cells[cell]
+
+    def query(self, x, y, radius):
+        """Returns (key, item, distance) tuples within radius of x/y, nearest first."""
+        min_cx, min_cy = self._cell(x - radius, y - radius)
+        max_cx, max_cy = self._cell(x + radius, y + radius)
+
+        # Large radii would visit mostly empty cells, walk the occupied ones instead
+        if (max_cx - min_cx + 1) * (max_cy - min_cy + 1) > len(self._cells):
+            cells = [c for c in self._cells if min_cx <= c[0] <= max_cx and min_cy <= c[1] <= max_cy]
+        else:
+            cells = [(cx, cy) for cx in range(min_cx, max_cx + 1) for cy in range(min_cy, max_cy + 1)]
+
+        result = []
+        for cell in cells:
+            for key in self._cells.get(cell, ()):
+                ex, ey, item, _ = self._entries[key]
+                distance = math.hypot(ex - x, ey - y)
+                if distance <= radius:
+                    result.append((key, item, distance))
+
+        result.sort(key=lambda r: r[2])
+        return result
@@ -0,0 +1,56 @@
+import contextlib
+import importlib.util
+import logging
+import sys
+import time
+
+
+def lazy_import(name):
+    """Registers module name so it is only executed on first attribute access.
+
+    Modules share the handle by calling lazy_import again, a plain `import name`
+    statement reads __spec__ of the module and with that loads it right away.
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    spec = importlib.util.find_spec(name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+class StartupTimeline:
+    """Durations of the startup phases, measured from the first import of this module."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.verbose = False
+        self.phases = []
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        begin = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.mark(name, time.perf_counter() - begin)
+
+    def mark(self, name, duration):
+        self.phases.append((name, duration, time.perf_counter() - self.start))
+        if self.verbose:
+            logging.info(f"Startup: {name} took {duration:.3f} s")
+
+    def report(self):
+        total = time.perf_counter() - self.start
+        if self.verbose:
+            for name, duration, at in self.phases:
+                logging.info(f"Startup timeline: {at:7.3f} s  {duration:7.3f} s  {name}")
+        logging.info(f"Startup finished after {total:.3f} s")
+
+
+timeline = StartupTimeline()
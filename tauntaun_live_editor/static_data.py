@@ -1,10 +1,26 @@
-import dcs
 import json
+import gzip
+import hashlib
 import inspect
+import logging
 import os
 import sys
+import tempfile
+from dataclasses import dataclass
 sys.path.append(f"{os.path.dirname(os.path.realpath(__file__))}/dcs")
 
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+import tauntaun_live_editor.config as config
+from tauntaun_live_editor.mission_cache import FINGERPRINT_FILENAME, pydcs_fingerprint, pydcs_version
+from tauntaun_live_editor.util import get_data_path
+from tauntaun_live_editor.startup import lazy_import
+
+dcs = lazy_import('dcs')
+
 
 sidc_overrides = {
     'E-3A': 'SFAPMFRW--*****',
@@ -119,11 +135,16 @@ def _map_ships():
     return result
 
 
+def _weapon_ids_by_clsid():
+    # First weapon id wins when several share a CLSID
+    index = {}
+    for weapon_id, weapon in dcs.weapons_data.weapon_ids.items():
+        index.setdefault(weapon['clsid'], weapon_id)
+    return index
+
+
 def _map_weapons():
-    def get_weapon_id(value):
-        weapon_ids = dcs.weapons_data.weapon_ids
-        weapon_id = (x for x in weapon_ids if weapon_ids[x]['clsid'] == value)
-        return next(iter(weapon_id))
+    weapon_ids = _weapon_ids_by_clsid()
 
     weapons_data = dcs.weapons_data.Weapons
     weapons = {}
@@ -132,7 +153,7 @@ def _map_weapons():
             weapons[name] = {
                 'name': obj['name'],
                 'weight': obj['weight'],
-                'weapon_id': get_weapon_id(obj['clsid'])
+                'weapon_id': weapon_ids[obj['clsid']]
             }
 
     return weapons
@@ -220,14 +241,172 @@ def _generate_sidc(mapped_vehicles):
     return {**sidc_map, **sidc_overrides}
 
 
-_static_json = None
+# Bump when the generated data changes, files of other versions are then generated again
+STATIC_DATA_FORMAT = 1
+
+_VARIANT_SUFFIXES = (('identity', ''), ('gzip', '.gz'), ('br', '.br'))
+
+STATIC_CATEGORIES = ('planes', 'helicopters', 'weapons', 'vehicles', 'ships', 'sidc')
+
+# Pylon lists are left out of these listings, the loadout editor fetches them per airframe
+_AIRFRAME_CATEGORIES = ('planes', 'helicopters')
+
+# Smaller bodies are not worth compressing
+_MIN_COMPRESS_SIZE = 1024
+
+_static_data = None
+_static_dict = None
+_bodies = {}
+
+
+@dataclass
+class StaticBody:
+    """Encoded response body, variants maps a content encoding to the bytes sent."""
+    variants: dict
+    etag: str
+
+
+def static_data_filename():
+    # Keyed by the pydcs build, its version stays the same between the git commits it is installed from
+    version = ''.join(c if c.isalnum() or c in '.-' else '_' for c in pydcs_fingerprint())
+    return f"static_data-{version}-{STATIC_DATA_FORMAT}.json"
+
+
+def _read_variants(path):
+    variants = {}
+    for encoding, suffix in _VARIANT_SUFFIXES:
+        try:
+            with open(path + suffix, 'rb') as fp:
+                variants[encoding] = fp.read()
+        except OSError:
+            continue
+    return variants
+
+
+def _generate_variants():
+    data = gen_static_json().encode('utf-8')
+    variants = {'identity': data, 'gzip': gzip.compress(data, 9)}
+    if brotli is not None:
+        variants['br'] = brotli.compress(data)
+    return variants
+
+
+def write_static_data(directory, variants=None):
+    """Writes the static data into directory with its gzip and brotli variants, returns them."""
+    if variants is None:
+        variants = _generate_variants()
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, static_data_filename())
+    for encoding, suffix in _VARIANT_SUFFIXES:
+        if encoding not in variants:
+            continue
+        fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+        with os.fdopen(fd, 'wb') as fp:
+            fp.write(variants[encoding])
+        os.replace(tmp_path, path + suffix)
+
+    return variants
+
+
+def load_static_data(directories, cache_dir):
+    """Reads the pregenerated static data of the installed pydcs build from the first of
+    directories holding it, or generates it into cache_dir when none does."""
+    global _static_data, _static_dict
+    _static_dict = None
+    _bodies.clear()
+    for directory in directories:
+        variants = _read_variants(os.path.join(str(directory), static_data_filename()))
+        if 'identity' in variants:
+            _static_data = variants
+            return _static_data
+
+    logging.info(f"Generating static data for pydcs {pydcs_version()}")
+    _static_data = _generate_variants()
+    try:
+        write_static_data(str(cache_dir), _static_data)
+    except OSError as e:
+        logging.warning(f"Unable to store static data: {e}")
+    return _static_data
+
+
+def get_static_data():
+    """Static data as a dict of content encoding to body, identity is always present."""
+    if _static_data is None:
+        load_static_data([os.path.join(get_data_path(), 'static_data'), config.get_datadir()],
+                         config.get_datadir())
+    return _static_data
 
 
 def get_static_json():
-    global _static_json
-    if _static_json is None:
-        _static_json = gen_static_json()
-    return _static_json
+    return get_static_data()['identity'].decode('utf-8')
+
+
+def _get_static_dict():
+    global _static_dict
+    if _static_dict is None:
+        _static_dict = json.loads(get_static_data()['identity'])
+    return _static_dict
+
+
+def _encode(variants):
+    return StaticBody(variants, hashlib.sha256(variants['identity']).hexdigest()[:32])
+
+
+def _encode_json(value):
+    data = json.dumps(value).encode('utf-8')
+    variants = {'identity': data}
+    if len(data) >= _MIN_COMPRESS_SIZE:
+        variants['gzip'] = gzip.compress(data, 6)
+        if brotli is not None:
+            variants['br'] = brotli.compress(data)
+    return _encode(variants)
+
+
+def _without_pylons(airframe):
+    return {k: v for k, v in airframe.items() if k != 'pylons'}
+
+
+def get_static_body():
+    """All static data in one body, with the precompressed variants."""
+    if None not in _bodies:
+        _bodies[None] = _encode(get_static_data())
+    return _bodies[None]
+
+
+def get_static_section(category, type_ids=None):
+    """One category of the static data, limited to type_ids when given. Returns None for
+    unknown categories, unknown type ids are left out."""
+    if category not in STATIC_CATEGORIES:
+        return None
+
+    section = _get_static_dict()[category]
+    if type_ids is not None:
+        # Vehicles are keyed by pydcs class name, their DCS type is in the id field
+        wanted = set(type_ids)
+        return _encode_json({key: value for key, value in section.items()
+                             if key in wanted or (isinstance(value, dict) and value.get('id') in wanted)})
+
+    if category not in _bodies:
+        if category in _AIRFRAME_CATEGORIES:
+            section = {type_id: _without_pylons(airframe) for type_id, airframe in section.items()}
+        _bodies[category] = _encode_json(section)
+    return _bodies[category]
+
+
+def get_static_type(category, type_id):
+    """Static data of a single type, pylons included for airframes. None if unknown."""
+    if category not in STATIC_CATEGORIES:
+        return None
+
+    section = _get_static_dict()[category]
+    if type_id not in section:
+        return None
+
+    key = (category, type_id)
+    if key not in _bodies:
+        _bodies[key] = _encode_json(section[type_id])
+    return _bodies[key]
 
 
 def gen_static_json():
@@ -249,3 +428,14 @@ def gen_static_json():
     }
 
     return json.dumps(static_data)
+
+
+if __name__ == '__main__':
+    # Run at build time, the package then ships the static data of the pydcs build it was built with
+    out_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                                                 'data', 'static_data')
+    write_static_data(out_dir)
+    # A frozen build can not fingerprint the pydcs bundled into it, it reads the one it was built with
+    with open(os.path.join(out_dir, FINGERPRINT_FILENAME), 'w', encoding='utf-8') as fp:
+        fp.write(pydcs_fingerprint())
+    print(f"Static data written to {os.path.join(out_dir, static_data_filename())}")
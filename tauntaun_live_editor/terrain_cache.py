@@ -0,0 +1,176 @@
+import copy
+import io
+import logging
+import pickle
+import threading
+
+from tauntaun_live_editor.startup import lazy_import
+
+dcs = lazy_import('dcs')
+
+
+# Airport attributes holding terrain data, every other attribute is per-mission state
+_SHARED_AIRPORT_ATTRS = ('position', '_terrain', 'runways', 'parking_slots', 'beacons')
+
+
+def _terrain_classes():
+    return {cls.__name__: cls for cls in dcs.terrain.Terrain.__subclasses__()}
+
+
+class TerrainCache:
+    """Process-wide terrains by theatre name.
+
+    Each terrain is built once. checkout() hands out a copy sharing the projection,
+    runways and parking layout with it, while the state a mission changes (airport
+    coalition and warehouse, occupied parking slots, bullseyes) is its own.
+    """
+
+    def __init__(self):
+        self._templates = {}
+        self._lock = threading.Lock()
+
+    def is_supported(self, name):
+        return name in _terrain_classes()
+
+    def _template(self, name):
+        with self._lock:
+            template = self._templates.get(name)
+            if template is None:
+                logging.debug(f"Building terrain {name}")
+                template = _terrain_classes()[name]()
+                self._templates[name] = template
+            return template
+
+    def checkout(self, name):
+        template = self._template(name)
+
+        terrain = copy.copy(template)
+        terrain.center = dict(template.center)
+        terrain.bullseye_blue = dict(template.bullseye_blue)
+        terrain.bullseye_red = dict(template.bullseye_red)
+        terrain.airports = {}
+        for key, airport in template.airports.items():
+            mission_airport = copy.copy(airport)
+            for attr, value in vars(airport).items():
+                if attr not in _SHARED_AIRPORT_ATTRS and isinstance(value, (dict, list)):
+                    setattr(mission_airport, attr, copy.deepcopy(value))
+            mission_airport._terrain = terrain
+            mission_airport.parking_slots = [copy.copy(slot) for slot in airport.parking_slots]
+            terrain.airports[key] = mission_airport
+
+        return terrain
+
+    def prewarm(self, names):
+        for name in names:
+            if self.is_supported(name):
+                self._template(name)
+            else:
+                logging.warning(f"Unable to prewarm unknown terrain {name}")
+
+
+terrain_cache = TerrainCache()
+
+
+def _terrain_state(terrain):
+    return {
+        'center': terrain.center,
+        'bullseye_blue': terrain.bullseye_blue,
+        'bullseye_red': terrain.bullseye_red,
+        'airports': {
+            airport.name: {
+                'attrs': {k: v for k, v in vars(airport).items() if k not in _SHARED_AIRPORT_ATTRS},
+                'parking': [slot.unit_id for slot in airport.parking_slots],
+            }
+            for airport in terrain.airports.values()
+        },
+    }
+
+
+def _apply_terrain_state(terrain, state):
+    terrain.center = state['center']
+    terrain.bullseye_blue = state['bullseye_blue']
+    terrain.bullseye_red = state['bullseye_red']
+    for name, airport_state in state['airports'].items():
+        airport = terrain.airports.get(name)
+        if airport is None:
+            continue
+        for attr, value in airport_state['attrs'].items():
+            setattr(airport, attr, value)
+        for slot, unit_id in zip(airport.parking_slots, airport_state['parking']):
+            slot.unit_id = unit_id
+
+
+class _MissionPickler(pickle.Pickler):
+    # The terrain is replaced by its theatre name and the state of its airports. Objects
+    # of other terrain instances, e.g. positions shared with the cached terrain, only
+    # keep the theatre name.
+    def __init__(self, file, terrain):
+        super().__init__(file, protocol=pickle.HIGHEST_PROTOCOL)
+        self.terrain = terrain
+        self.slots = {}
+        if self._detached(terrain):
+            for airport in terrain.airports.values():
+                for index, slot in enumerate(airport.parking_slots):
+                    self.slots[id(slot)] = (airport.name, index)
+
+    @staticmethod
+    def _detached(terrain):
+        return isinstance(terrain, dcs.terrain.Terrain) and terrain_cache.is_supported(type(terrain).__name__)
+
+    def persistent_id(self, obj):
+        if self._detached(obj):
+            if obj is self.terrain:
+                return ('terrain', type(obj).__name__, _terrain_state(obj))
+            return ('terrain_ref', type(obj).__name__)
+
+        if isinstance(obj, dcs.terrain.Airport) and self._detached(obj._terrain):
+            return ('airport', type(obj._terrain).__name__, obj.name)
+
+        if isinstance(obj, dcs.terrain.terrain.ParkingSlot) and id(obj) in self.slots:
+            return ('parking_slot', type(self.terrain).__name__) + self.slots[id(obj)]
+
+        return None
+
+
+class _MissionUnpickler(pickle.Unpickler):
+    def __init__(self, file):
+        super().__init__(file)
+        self.terrains = {}
+
+    def _terrain(self, name):
+        if name not in self.terrains:
+            self.terrains[name] = terrain_cache.checkout(name)
+        return self.terrains[name]
+
+    def persistent_load(self, pid):
+        kind, name = pid[0], pid[1]
+        if kind == 'terrain':
+            terrain = self._terrain(name)
+            _apply_terrain_state(terrain, pid[2])
+            return terrain
+        if kind == 'terrain_ref':
+            return self._terrain(name)
+        if kind == 'airport':
+            return self._terrain(name).airports[pid[2]]
+        if kind == 'parking_slot':
+            return self._terrain(name).airports[pid[2]].parking_slots[pid[3]]
+        raise pickle.UnpicklingError(f"Unknown persistent id {kind}")
+
+
+def dump_mission(mission, fp):
+    """Pickles mission without its terrain data, load_mission attaches a cached terrain."""
+    _MissionPickler(fp, mission.terrain).dump(mission)
+
+
+def load_mission(fp):
+    return _MissionUnpickler(fp).load()
+
+
+def dumps_mission(mission):
+    buffer = io.BytesIO()
+    dump_mission(mission, buffer)
+    return buffer.getvalue()
+
+
+def loads_mission(data):
+    return load_mission(io.BytesIO(data))
@@ -0,0 +1,220 @@
+import asyncio
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import zipfile
+from dataclasses import dataclass
+
+from werkzeug.exceptions import RequestEntityTooLarge
+from werkzeug.sansio.multipart import Data, Epilogue, Field, File, MultipartDecoder, NeedData
+from werkzeug.utils import secure_filename
+
+from tauntaun_live_editor.coord import is_map_supported, get_supported_maps, get_map_display_name
+from tauntaun_live_editor.mission_info import read_mission_info
+from tauntaun_live_editor.mission_loader import run_in_worker, parse_mission_detached_in_worker
+from tauntaun_live_editor.startup import lazy_import
+from tauntaun_live_editor.terrain_cache import loads_mission
+
+dcs = lazy_import('dcs')
+
+
+def _unit_maps():
+    return {
+        'plane': dcs.planes.plane_map,
+        'helicopter': dcs.helicopters.helicopter_map,
+        'ship': dcs.ships.ship_map,
+    }
+
+
+class UploadError(Exception):
+    """Rejected upload, response() is the JSON body returned to the client."""
+
+    def __init__(self, message, error_type=None, details=None):
+        # All arguments go to Exception so the error survives pickling out of the worker process
+        super().__init__(message, error_type, details)
+        self.message = message
+        self.error_type = error_type
+        self.details = details or {}
+
+    def __str__(self):
+        return self.message
+
+    def response(self):
+        response = {'success': False, 'error': self.message}
+        if self.error_type:
+            response['error_type'] = self.error_type
+        response.update(self.details)
+        return response
+
+
+@dataclass
+class UploadedFile:
+    filename: str
+    path: str
+    sha256: str
+    size: int
+
+
+async def receive_mission_upload(body, boundary, field_name, dest_dir, max_bytes):
+    """Streams the .miz in field_name of a multipart body to a temporary file in dest_dir.
+
+    The content is hashed while it is written and the upload is rejected as soon as it
+    grows past max_bytes. Returns None when the form has no such file.
+    """
+    decoder = MultipartDecoder(boundary.encode('ascii'))
+    upload = None
+    fp = None
+    sha = hashlib.sha256()
+    size = 0
+
+    try:
+        async for chunk in body:
+            decoder.receive_data(chunk)
+            event = decoder.next_event()
+            while not isinstance(event, (NeedData, Epilogue)):
+                if isinstance(event, File) and event.name == field_name and upload is None:
+                    if not event.filename.lower().endswith('.miz'):
+                        raise UploadError('Invalid file type. Please upload a .miz file')
+
+                    fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=dest_dir)
+                    # mkstemp creates the file private, uploads are stored like any other mission file
+                    os.chmod(tmp_path, 0o644)
+                    fp = os.fdopen(fd, 'wb')
+                    upload = UploadedFile(event.filename, tmp_path, '', 0)
+                elif isinstance(event, (File, Field)):
+                    if fp is not None and not fp.closed:
+                        fp.close()
+                elif isinstance(event, Data) and fp is not None and not fp.closed:
+                    size += len(event.data)
+                    if size > max_bytes:
+                        raise UploadError(f'Mission file is larger than {max_bytes // (1024 * 1024)} MB',
+                                          'too_large')
+                    sha.update(event.data)
+                    fp.write(event.data)
+                    if not event.more_data:
+                        fp.close()
+
+                event = decoder.next_event()
+    except RequestEntityTooLarge:
+        _discard(fp, upload)
+        raise UploadError(f'Mission file is larger than {max_bytes // (1024 * 1024)} MB', 'too_large')
+    except BaseException:
+        _discard(fp, upload)
+        raise
+
+    if upload is None:
+        return None
+
+    if not fp.closed:
+        _discard(fp, upload)
+        raise UploadError('Upload failed, the mission file was truncated')
+
+    upload.sha256 = sha.hexdigest()
+    upload.size = size
+    return upload
+
+
+def _discard(fp, upload):
+    if fp is not None:
+        fp.close()
+    if upload is not None:
+        _remove(upload.path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def check_mission(filename):
+    """Raises UploadError if the theatre or a unit type of the .miz is not supported."""
+    try:
+        info = read_mission_info(filename)
+    except (zipfile.BadZipFile, KeyError) as e:
+        raise UploadError(f'Failed to load mission: {e}', 'load_error')
+
+    theatre = info['theatre']
+    if theatre is None:
+        raise UploadError('Failed to load mission: no theatre in mission file', 'load_error')
+
+    if not is_map_supported(theatre):
+        supported_maps = get_supported_maps()
+        supported_display_names = [get_map_display_name(map_name) for map_name in supported_maps]
+        message = f"Unsupported map: {get_map_display_name(theatre)}. "
+        message += f"Supported maps: {', '.join(supported_display_names)}"
+        raise UploadError(message, 'unsupported_map',
+                          {'unsupported_map': theatre, 'supported_maps': supported_maps})
+
+    missing = sorted(t for category, unit_map in _unit_maps().items() for t in info['unit_types'][category]
+                     if t not in unit_map)
+    if missing:
+        message = f"Missing aircraft/vehicle mod: {', '.join(missing)}. "
+        message += "This mission contains units from a mod that is not installed or not supported."
+        raise UploadError(message, 'missing_mod', {'missing_mod': missing[0], 'missing_mods': missing})
+
+    return theatre
+
+
+class UploadStore:
+    """Uploaded missions, stored once per content hash.
+
+    Each distinct upload is kept as blobs/<sha256>.miz and exposed under its own name
+    through a hard link. Saving a mission replaces its file, so the blob is never
+    modified. Identical uploads that arrive while one is being checked and parsed
+    share that work instead of starting their own, each still gets a mission of its own.
+    """
+
+    def __init__(self, uploads_dir):
+        self.uploads_dir = uploads_dir
+        self.blobs_dir = os.path.join(uploads_dir, 'blobs')
+        self._loading = {}
+        os.makedirs(self.blobs_dir, exist_ok=True)
+
+    def _blob_path(self, sha256):
+        return os.path.join(self.blobs_dir, sha256 + '.miz')
+
+    def store(self, upload):
+        """Moves a received upload into the store, returns the path it should be loaded from."""
+        blob_path = self._blob_path(upload.sha256)
+        if os.path.isfile(blob_path):
+            logging.info(f"Upload {upload.filename} matches stored mission {upload.sha256[:12]}")
+            _remove(upload.path)
+        else:
+            os.replace(upload.path, blob_path)
+
+        filename = secure_filename(upload.filename) or upload.sha256 + '.miz'
+        file_path = os.path.join(self.uploads_dir, filename)
+        if os.path.isfile(file_path) and os.path.samefile(file_path, blob_path):
+            return file_path
+
+        tmp_path = file_path + '.tmp'
+        _remove(tmp_path)
+        try:
+            os.link(blob_path, tmp_path)
+        except OSError:
+            shutil.copyfile(blob_path, tmp_path)
+        os.replace(tmp_path, file_path)
+        return file_path
+
+    def remove(self, sha256, file_path):
+        _remove(file_path)
+        _remove(self._blob_path(sha256))
+
+    async def load(self, sha256, file_path, mission_cache=None):
+        """Checks and parses a stored upload, joining a load of the same content already running."""
+        task = self._loading.get(sha256)
+        if task is None:
+            task = asyncio.ensure_future(self._load(sha256, file_path, mission_cache))
+            self._loading[sha256] = task
+            task.add_done_callback(lambda _: self._loading.pop(sha256, None))
+
+        # The parse is shared as bytes, rooms loading the same upload must not share its objects
+        return loads_mission(await asyncio.shield(task))
+
+    async def _load(self, sha256, file_path, mission_cache):
+        await run_in_worker(check_mission, file_path)
+        return await parse_mission_detached_in_worker(file_path, mission_cache, sha256)
@@ -2,6 +2,7 @@ import os
 import asyncio
 import logging
 import tauntaun_live_editor.config as config
+from tauntaun_live_editor.dcs_discovery import get_discovery
 from tauntaun_live_editor.first_time_setup import get_dcs_directory as get_local_dcs_dir, get_missions_directory as get_local_missions_dir
 
 
@@ -29,11 +30,6 @@ class Timer:
     def is_running(self):
         return self._running
 
-def get_saved_games_dir():
-    saved_games = os.path.abspath(os.path.join(os.environ['USERPROFILE'],
-                                               'Saved Games'))
-    return saved_games
-
 def get_dcs_dir():
     # First try local config (from first-time setup)
     local_dcs_dir = get_local_dcs_dir()
@@ -47,33 +43,11 @@ def get_dcs_dir():
         logging.debug(f"Using DCS directory from config: {dcs_dir}")
         return dcs_dir
 
-    # Fall back to Saved Games detection - prioritize regular DCS over OpenBeta
-    saved_games = get_saved_games_dir()
-    possible_paths = [
-        os.path.join(saved_games, "DCS"),  # Regular DCS World (prioritized)
-        os.path.join(saved_games, "DCS.openbeta"),  # DCS OpenBeta
-        os.path.join(saved_games, "DCS.openbeta_server")  # DCS Server
-    ]
-    
-    for path in possible_paths:
-        if os.path.exists(path):
-            logging.debug(f"Found DCS directory: {path}")
-            return path
-
-    # Also check common installation directories
-    common_install_paths = [
-        "C:\\Program Files\\Eagle Dynamics\\DCS World",
-        "C:\\Program Files (x86)\\Eagle Dynamics\\DCS World",
-        "C:\\Program Files\\Eagle Dynamics\\DCS World OpenBeta",
-        "C:\\Program Files (x86)\\Eagle Dynamics\\DCS World OpenBeta",
-        "I:\\DCS World",
-        "I:\\DCS World OpenBeta"
-    ]
-    
-    for path in common_install_paths:
-        if os.path.exists(path):
-            logging.debug(f"Found DCS installation: {path}")
-            return path
+    # Fall back to detection, Saved Games directories are preferred over installations
+    dcs_dir = get_discovery().dcs_dir()
+    if dcs_dir:
+        logging.debug(f"Found DCS directory: {dcs_dir}")
+        return dcs_dir
 
     logging.warning("No DCS directory found in common locations")
     return ""
@@ -0,0 +1,198 @@
+import asyncio
+import gzip
+import mimetypes
+import os
+import re
+import shutil
+import sys
+import tempfile
+from dataclasses import dataclass
+
+from werkzeug.security import safe_join
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Precompressed variants in order of preference, stored next to the file with the suffix
+_VARIANT_SUFFIXES = (('br', '.br'), ('gzip', '.gz'))
+
+_COMPRESSIBLE_EXTENSIONS = ('.html', '.js', '.css', '.json', '.map', '.svg', '.txt', '.ico')
+
+# Smaller files are not worth compressing
+_MIN_COMPRESS_SIZE = 1024
+
+# Files up to this size are served from memory, larger ones from their files. The main
+# bundle is a few MB and sent with every page load.
+MAX_CACHED_SIZE = 8 * 1024 * 1024
+
+# Compression levels of files compressed while serving, the build compresses with the best
+_RUNTIME_BROTLI_QUALITY = 5
+_RUNTIME_GZIP_LEVEL = 6
+
+# The build puts a content hash into the names of the bundles under static/
+_HASHED_NAME = re.compile(r'\.[0-9a-f]{8,}\.')
+
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def _encodings():
+    return [(encoding, suffix) for encoding, suffix in _VARIANT_SUFFIXES if encoding != 'br' or brotli is not None]
+
+
+def _compress(data, encoding, runtime=False):
+    if encoding == 'br':
+        return brotli.compress(data, quality=_RUNTIME_BROTLI_QUALITY) if runtime else brotli.compress(data)
+    return gzip.compress(data, _RUNTIME_GZIP_LEVEL if runtime else 9)
+
+
+def _is_compressible(path, size):
+    return path.endswith(_COMPRESSIBLE_EXTENSIONS) and size >= _MIN_COMPRESS_SIZE
+
+
+def _is_variant(path):
+    return path.endswith(tuple(suffix for _, suffix in _VARIANT_SUFFIXES))
+
+
+def _fresh_variant(path, mtime):
+    # A variant older than its file belongs to a previous build
+    try:
+        return os.stat(path).st_mtime >= mtime
+    except OSError:
+        return False
+
+
+def precompress(directory):
+    """Writes the brotli and gzip variants of the compressible files in directory, returns
+    the number of variants written. Variants newer than their file are kept."""
+    written = 0
+    for dir_path, _, filenames in os.walk(directory):
+        for filename in filenames:
+            path = os.path.join(dir_path, filename)
+            stat = os.stat(path)
+            if _is_variant(path) or not _is_compressible(path, stat.st_size):
+                continue
+
+            with open(path, 'rb') as fp:
+                data = fp.read()
+            for encoding, suffix in _encodings():
+                if _fresh_variant(path + suffix, stat.st_mtime):
+                    continue
+                fd, tmp_path = tempfile.mkstemp(suffix='.tmp', dir=dir_path)
+                with os.fdopen(fd, 'wb') as fp:
+                    fp.write(_compress(data, encoding))
+                shutil.copymode(path, tmp_path)
+                os.replace(tmp_path, path + suffix)
+                written += 1
+    return written
+
+
+@dataclass
+class WebAsset:
+    """A file of the web UI, variants maps a content encoding to its bytes when the file is
+    cached or else to the file holding it."""
+    mimetype: str
+    etag: str
+    cache_control: str
+    variants: dict
+    stat: tuple
+
+
+class WebAssets:
+    """The files of the web UI in root.
+
+    Small files are read and compressed once and then served from memory, larger ones are
+    sent from their file or its precompressed variant. A changed file is picked up again.
+    The server uses fetch(), it loads files on a thread instead of the event loop.
+    """
+
+    def __init__(self, root, max_cached_size=MAX_CACHED_SIZE):
+        self.root = root
+        self.max_cached_size = max_cached_size
+        self._assets = {}
+        self._loading = {}
+
+    def _find(self, path):
+        # (full path, stat, the asset if it is up to date), None if there is no such file
+        full_path = safe_join(self.root, path)
+        if full_path is None or _is_variant(full_path):
+            return None
+
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            return None
+        if not os.path.isfile(full_path):
+            return None
+
+        asset = self._assets.get(full_path)
+        if asset is not None and asset.stat != (stat.st_mtime_ns, stat.st_size):
+            asset = None
+        return full_path, stat, asset
+
+    def _store(self, path, full_path, stat):
+        asset = self._load(path, full_path, stat)
+        self._assets[full_path] = asset
+        return asset
+
+    def get(self, path):
+        """The asset at path relative to root, None if there is none."""
+        found = self._find(path)
+        if found is None:
+            return None
+
+        full_path, stat, asset = found
+        return asset if asset is not None else self._store(path, full_path, stat)
+
+    async def fetch(self, path):
+        """get() for the event loop, requests for a file being loaded wait for that load."""
+        found = self._find(path)
+        if found is None:
+            return None
+
+        full_path, stat, asset = found
+        if asset is not None:
+            return asset
+
+        key = (full_path, stat.st_mtime_ns, stat.st_size)
+        task = self._loading.get(key)
+        if task is None:
+            task = asyncio.get_event_loop().run_in_executor(None, self._store, path, full_path, stat)
+            self._loading[key] = task
+            task.add_done_callback(lambda _: self._loading.pop(key, None))
+        return await asyncio.shield(task)
+
+    def _load(self, path, full_path, stat):
+        cache_control = 'no-cache'
+        if path.startswith('static/') and _HASHED_NAME.search(os.path.basename(path)):
+            cache_control = IMMUTABLE
+
+        variants = {'identity': full_path}
+        for encoding, suffix in _VARIANT_SUFFIXES:
+            if _fresh_variant(full_path + suffix, stat.st_mtime):
+                variants[encoding] = full_path + suffix
+
+        if stat.st_size <= self.max_cached_size:
+            cached = {}
+            for encoding, variant_path in variants.items():
+                with open(variant_path, 'rb') as fp:
+                    cached[encoding] = fp.read()
+            if _is_compressible(full_path, stat.st_size):
+                for encoding, _ in _encodings():
+                    if encoding not in cached:
+                        cached[encoding] = _compress(cached['identity'], encoding, runtime=True)
+            variants = cached
+
+        return WebAsset(mimetype=mimetypes.guess_type(full_path)[0] or 'application/octet-stream',
+                        etag=f'{stat.st_mtime_ns:x}-{stat.st_size:x}',
+                        cache_control=cache_control,
+                        variants=variants,
+                        stat=(stat.st_mtime_ns, stat.st_size))
+
+
+if __name__ == '__main__':
+    # Run at build time, the server then sends the bundles compressed without compressing them
+    web_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(os.path.realpath(__file__)),
+                                                                 'data', 'web')
+    print(f"{precompress(web_dir)} compressed variants written to {web_dir}")
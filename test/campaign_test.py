@@ -0,0 +1,141 @@
+import asyncio
+import tempfile
+import unittest
+
+import os
+import sys
+sys.path.append(f"{os.path.dirname(os.path.realpath(__file__))}/../tauntaun_live_editor/dcs")
+
+import dcs
+
+import tauntaun_live_editor.config as config
+from tauntaun_live_editor.camp import Campaign
+from tauntaun_live_editor.sessions import SessionManager
+from tauntaun_live_editor.server.server import create_app
+from test.test_common import create_campaign, create_mission, airport_by_name
+
+
+class CampaignTestCase(unittest.TestCase):
+    def test_indexes_built_on_mission_set(self):
+        campaign = create_campaign()
+
+        self.assertEqual(campaign.check_indexes(), [])
+        for group in campaign.get_plane_groups('blue'):
+            self.assertIs(campaign.lookup_group(group.id), group)
+            for unit in group.units:
+                self.assertIs(campaign.lookup_unit(unit.id), unit)
+
+    def test_lookup_unknown_id(self):
+        campaign = create_campaign()
+
+        self.assertIsNone(campaign.lookup_group(-1))
+        self.assertIsNone(campaign.lookup_unit(-1))
+
+    def test_indexes_updated_by_add_flight_and_jtac(self):
+        campaign = create_campaign()
+        batumi = airport_by_name(campaign.mission.terrain, 'Batumi')
+        plane_group_count = len(list(campaign.get_plane_groups('blue')))
+
+        campaign.game_service.add_flight('blue', 'USA', {'lat': 42.0, 'lon': 42.0}, batumi.id, 'FA-18C_hornet', 2)
+        campaign.game_service.add_jtac('blue', 'USA', {'lat': 42.0, 'lon': 42.0})
+
+        self.assertEqual(campaign.check_indexes(), [])
+        self.assertEqual(len(list(campaign.get_plane_groups('blue'))), plane_group_count + 1)
+        jtac = next(g for g in campaign.get_vehicle_groups('blue') if g.name == 'jtac')
+        self.assertIs(campaign.lookup_group(jtac.id), jtac)
+        self.assertIs(campaign.lookup_unit(jtac.units[0].id), jtac.units[0])
+
+    def test_query_nearby(self):
+        campaign = create_campaign()
+        batumi = airport_by_name(campaign.mission.terrain, 'Batumi')
+
+        nearby = campaign.query_nearby(batumi.position.x, batumi.position.y, 5000, kind='airport')
+        self.assertEqual(nearby[0][:3], ('blue', 'airport', batumi))
+
+        awacs = next(g for g in campaign.get_plane_groups('blue') if g.name == 'AWACS')
+        nearby = campaign.query_nearby(awacs.position.x, awacs.position.y, 1, side='blue')
+        self.assertIn(('blue', 'group', awacs), [r[:3] for r in nearby])
+        self.assertIn(('blue', 'unit', awacs.units[0]), [r[:3] for r in nearby])
+
+    def test_airport_reindexed_on_coalition_change(self):
+        campaign = create_campaign()
+        batumi = airport_by_name(campaign.mission.terrain, 'Batumi')
+
+        campaign.set_airport_coalition(batumi, 'red')
+
+        nearby = campaign.query_nearby(batumi.position.x, batumi.position.y, 5000, kind='airport', side='red')
+        self.assertIn(batumi, [r[2] for r in nearby])
+        nearby = campaign.query_nearby(batumi.position.x, batumi.position.y, 5000, kind='airport', side='blue')
+        self.assertNotIn(batumi, [r[2] for r in nearby])
+
+
+class CampaignLoadTestCase(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.miz_path = os.path.join(self.tmp_dir.name, 'load.miz')
+        create_mission().save(self.miz_path)
+        config.load_config(os.path.join(self.tmp_dir.name, 'config.json'))
+        config.config.autosave = False
+
+    async def asyncTearDown(self):
+        self.tmp_dir.cleanup()
+
+    async def test_load_mission_async_swaps_on_success(self):
+        campaign = Campaign()
+        campaign.mission = dcs.Mission()
+        progress = []
+
+        async def on_progress(p):
+            progress.append(p['stage'])
+
+        self.assertTrue(await campaign.load_mission_async(self.miz_path, on_progress))
+
+        self.assertEqual(progress, ['parsing', 'done'])
+        self.assertEqual(campaign.loaded_mission_path, self.miz_path)
+        self.assertEqual(len(list(campaign.get_plane_groups('blue'))), 2)
+        self.assertEqual(campaign.check_indexes(), [])
+
+    async def test_load_mission_async_keeps_mission_on_failure(self):
+        campaign = create_campaign()
+        broken_path = os.path.join(self.tmp_dir.name, 'broken.miz')
+        with open(broken_path, 'wb') as fp:
+            fp.write(b'not a zip')
+        mission = campaign.mission
+        progress = []
+
+        async def on_progress(p):
+            progress.append(p['stage'])
+
+        self.assertFalse(await campaign.load_mission_async(broken_path, on_progress))
+
+        self.assertEqual(progress, ['parsing', 'failed'])
+        self.assertIs(campaign.mission, mission)
+
+    async def test_earlier_load_superseded(self):
+        campaign = create_campaign()
+        mission = campaign.mission
+        upload = campaign.begin_load()
+
+        self.assertTrue(await campaign.load_mission_async(self.miz_path))
+        self.assertFalse(campaign.finish_load(upload, self.miz_path, dcs.Mission()))
+        self.assertIsNot(campaign.mission, mission)
+        self.assertEqual(campaign.loaded_mission_path, self.miz_path)
+
+
+class QueryNearbyRouteTestCase(unittest.TestCase):
+    def setUp(self):
+        config.config = config.Config()
+
+    def test_invalid_radius_rejected(self):
+        async def run():
+            app = create_app(create_campaign(), SessionManager())
+            async with app.test_app() as test_app:
+                client = test_app.test_client()
+                for radius in ('inf', 'nan', '-5', '0', 'far'):
+                    response = await client.get(f'/game/query/nearby?lat=41.6&lon=41.6&radius={radius}')
+                    self.assertEqual(response.status_code, 400, radius)
+
+                response = await client.get('/game/query/nearby?lat=41.6&lon=41.6&radius=5000')
+                self.assertEqual(response.status_code, 200)
+
+        asyncio.run(run())
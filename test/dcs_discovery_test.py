@@ -0,0 +1,70 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import sys
+sys.path.append(f"{os.path.dirname(os.path.realpath(__file__))}/../tauntaun_live_editor/dcs")
+
+import tauntaun_live_editor.dcs_discovery as dcs_discovery
+from tauntaun_live_editor.dcs_discovery import DcsDiscovery, INSTALL, SAVED_GAMES, probe_concurrently
+
+
+class DcsDiscoveryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        root = self.tmp_dir.name
+        self.install = os.path.join(root, 'Eagle Dynamics', 'DCS World')
+        self.saved_games = os.path.join(root, 'Saved Games', 'DCS.openbeta')
+        os.makedirs(self.install)
+        os.makedirs(self.saved_games)
+        self.candidates = [
+            (INSTALL, self.install),
+            (INSTALL, os.path.join(root, 'Eagle Dynamics', 'DCS World OpenBeta')),
+            (SAVED_GAMES, os.path.join(root, 'Saved Games', 'DCS')),
+            (SAVED_GAMES, os.path.join(root, 'Saved Games', 'DCS.*')),
+        ]
+        self.cache_path = os.path.join(root, 'cache', 'dcs_installations.json')
+        patcher = mock.patch.object(dcs_discovery, 'candidate_paths', return_value=self.candidates)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_discover(self):
+        discovery = DcsDiscovery(self.cache_path)
+        self.assertEqual(discovery.installations(), [self.install, self.saved_games])
+        self.assertEqual(discovery.dcs_dir(), self.saved_games)
+
+    def test_cached_result_reused(self):
+        DcsDiscovery(self.cache_path).discover()
+
+        with mock.patch.object(dcs_discovery, '_existing_paths', wraps=dcs_discovery._existing_paths) as probe:
+            found = DcsDiscovery(self.cache_path).discover()
+            probe.assert_not_called()
+        self.assertEqual(found[INSTALL], [self.install])
+
+    def test_cache_invalidated_when_path_disappears(self):
+        DcsDiscovery(self.cache_path).discover()
+        os.rmdir(self.install)
+
+        found = DcsDiscovery(self.cache_path).discover()
+        self.assertEqual(found[INSTALL], [])
+        self.assertEqual(found[SAVED_GAMES], [self.saved_games])
+
+    def test_hung_probe_does_not_block(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        def probe(path):
+            if path == 'dead':
+                release.wait()
+            return path
+
+        start = time.monotonic()
+        results = probe_concurrently(['a', 'dead', 'b'], probe, timeout=0.2, workers=2)
+        self.assertLess(time.monotonic() - start, 2)
+        self.assertEqual(results, {'a': 'a', 'b': 'b'})
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import unittest
+import zlib
+
+import os
+import sys
+sys.path.append(f"{os.path.dirname(os.path.realpath(__file__))}/../tauntaun_live_editor/dcs")
+
+import tauntaun_live_editor.config as config
+from tauntaun_live_editor.sessions import SessionManager
+from tauntaun_live_editor.server import fanout
+from tauntaun_live_editor.server.edge import EdgeClient, EdgeWorker
+from tauntaun_live_editor.server.fanout import LocalChannel, StreamChannel, pack_frame, unpack_frame
+from tauntaun_live_editor.server.server import create_app
+from test.test_common import create_campaign
+
+
+class SlowSocket:
+    def __init__(self):
+        self.sent = []
+        self.closed = None
+        self.release = asyncio.Event()
+
+    async def send(self, frame):
+        await self.release.wait()
+        self.sent.append(frame)
+
+    async def close(self, code):
+        self.closed = code
+
+
+async def receive_key(ws, key):
+    while True:
+        message = json.loads(zlib.decompress(await asyncio.wait_for(ws.receive(), 5)))
+        if message['key'] == key:
+            return message
+
+
+class FanoutTestCase(unittest.TestCase):
+    def setUp(self):
+        config.config = config.Config()
+
+    def test_frames(self):
+        frame = pack_frame(fanout.BROADCAST, {'room': 'default'}, b'\x00frame')
+        self.assertEqual(unpack_frame(frame), (fanout.BROADCAST, {'room': 'default'}, b'\x00frame'))
+
+        async def over_local_channel():
+            a, b = LocalChannel.pair()
+            a.send(fanout.SEND, {'conn': 1}, b'data')
+            a.close()
+            return await b.receive(), await b.receive()
+
+        self.assertEqual(asyncio.run(over_local_channel()), ((fanout.SEND, {'conn': 1}, b'data'), None))
+
+    def test_edge_clients_share_broadcasts(self):
+        async def run():
+            app = create_app(create_campaign(), SessionManager())
+            hub = app.extensions['edge_hub']
+            state_channel, edge_channel = LocalChannel.pair()
+            worker = EdgeWorker(edge_channel)
+            edge_app = worker.create_app()
+            edge_channel.send(fanout.HELLO, {'token': hub.token, 'port': 8081})
+            tasks = [asyncio.ensure_future(hub.serve(state_channel)), asyncio.ensure_future(worker.run())]
+
+            async with app.test_app() as test_app, edge_app.test_app() as test_edge_app:
+                client = test_app.test_client()
+                edge_client = test_edge_app.test_client()
+                async with edge_client.websocket('/ws/message') as a, edge_client.websocket('/ws/message') as b, \
+                        client.websocket('/ws/message') as local:
+                    welcome_a = await receive_key(a, 'welcome')
+                    welcome_b = await receive_key(b, 'welcome')
+                    await receive_key(local, 'welcome')
+                    self.assertNotEqual(welcome_a['id'], welcome_b['id'])
+
+                    response = await client.get('/game/edge')
+                    self.assertEqual(json.loads(await response.get_data()), {'port': 8081})
+
+                    await a.send(json.dumps({'key': 'session_data_update', 'value': {
+                        'id': welcome_a['id'],
+                        'session_data': {'name': 'Maverick', 'selected_unit_id': None, 'coalition': 'blue'}
+                    }}))
+                    for ws in (a, b, local):
+                        changed = await receive_key(ws, 'session_changed')
+                        self.assertEqual(changed['value']['name'], 'Maverick')
+
+                    # Both clients are held by the one edge
+                    self.assertEqual(list(hub.edges)[0].connections, 2)
+
+            edge_channel.close()
+            await asyncio.gather(*tasks)
+            self.assertFalse(hub.edges)
+
+        asyncio.run(run())
+
+    def test_slow_client_disconnected(self):
+        async def run():
+            ws = SlowSocket()
+            client = EdgeClient(ws, max_outbox=4)
+            sender = asyncio.ensure_future(client.run())
+            client.push(b'frame 0')
+            await asyncio.sleep(0.01)
+            for index in range(1, 10):
+                client.push(b'frame %d' % index)
+            ws.release.set()
+            await asyncio.wait_for(sender, 5)
+            return ws
+
+        ws = asyncio.run(run())
+        self.assertEqual(ws.closed, 1013)
+        # The frame being sent when it fell behind, the queued ones are dropped
+        self.assertEqual(ws.sent, [b'frame 0'])
+
+    def test_stream_channel_gives_up_on_stalled_reader(self):
+        async def run():
+            accepted = asyncio.get_event_loop().create_future()
+
+            async def accept(reader, writer):
+                accepted.set_result(writer)
+
+            server = await asyncio.start_server(accept, '127.0.0.1', 0)
+            reader, writer = await asyncio.open_connection('127.0.0.1', server.sockets[0].getsockname()[1])
+            peer = await accepted
+            channel = StreamChannel(reader, writer, max_buffered=1024 * 1024)
+            # The other end never reads
+            for _ in range(512):
+                channel.send(fanout.BROADCAST, {'room': 'default'}, b'\0' * 65536)
+            closing = writer.is_closing()
+            peer.close()
+            server.close()
+            return closing
+
+        self.assertTrue(asyncio.run(run()))
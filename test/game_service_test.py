@@ -1,10 +1,17 @@
+import asyncio
+import json
 import unittest
 
 import os
 import sys
 sys.path.append(f"{os.path.dirname(os.path.realpath(__file__))}/../tauntaun_live_editor/dcs")
 
-from test.test_common import create_campaign
+import tauntaun_live_editor.config as config
+from tauntaun_live_editor.camp import route_revision
+from tauntaun_live_editor.sessions import SessionManager
+from tauntaun_live_editor.server.server import create_app
+from test.fanout_test import receive_key
+from test.test_common import create_campaign, airport_by_name
 
 
 class GameServiceTestCase(unittest.TestCase):
@@ -24,3 +31,105 @@ class GameServiceTestCase(unittest.TestCase):
         self.assertEqual(unit.flare, 30)
         self.assertEqual(unit.gun, 90)
         self.assertEqual(unit.fuel, 4000)
+
+    def test_group_route_modify_by_index(self):
+        campaign = create_campaign()
+        handler = campaign.game_service.group_route_request_handler
+        group = next(iter(campaign.get_plane_groups('blue')))
+        wp = group.points[1]
+
+        handler.modify(group.id, {'index': 1, 'revision': 0}, {
+            'alt': 1234,
+            'type': wp.type,
+            'name': 'renamed',
+            'position': {'lat': 42.0, 'lon': 42.0},
+            'speed': wp.speed,
+            'action': 'TurningPoint',
+            'alt_type': wp.alt_type
+        })
+
+        self.assertIs(group.points[1], wp)
+        self.assertEqual(wp.alt, 1234)
+        self.assertEqual(wp.name, 'renamed')
+        self.assertEqual(route_revision(group), 0)
+
+    def test_group_route_insert_and_remove_by_index(self):
+        campaign = create_campaign()
+        handler = campaign.game_service.group_route_request_handler
+        group = next(iter(campaign.get_plane_groups('blue')))
+        count = len(group.points)
+        last = group.points[-1]
+
+        handler.insert_at(group.id, {'lat': 42.0, 'lon': 42.0}, {'index': 1, 'revision': 0})
+        self.assertEqual(len(group.points), count + 1)
+        self.assertIs(group.points[-1], last)
+        self.assertEqual(route_revision(group), 1)
+
+        handler.remove(group.id, {'index': 1, 'revision': 1})
+        handler.remove(group.id, {'index': count + 5, 'revision': 2})
+        self.assertEqual(len(group.points), count)
+        self.assertIs(group.points[-1], last)
+        self.assertEqual(route_revision(group), 2)
+
+    def test_group_route_stale_revision_rejected(self):
+        campaign = create_campaign()
+        handler = campaign.game_service.group_route_request_handler
+        group = next(iter(campaign.get_plane_groups('blue')))
+        stale_index = len(group.points) - 1
+
+        # Another client inserted a waypoint before the one this client removes
+        handler.insert_at(group.id, {'lat': 42.0, 'lon': 42.0}, {'index': 1, 'revision': 0})
+        points = list(group.points)
+        handler.remove(group.id, {'index': stale_index, 'revision': 0})
+        handler.remove(group.id, {'index': stale_index})
+
+        self.assertEqual(group.points, points)
+
+    def test_add_flights_reports_each_flight(self):
+        campaign = create_campaign()
+        batumi = airport_by_name(campaign.mission.terrain, 'Batumi')
+        flight = {'coalition': 'blue', 'country': 'USA', 'location': {'lat': 42.0, 'lon': 42.0},
+                  'airport': batumi.id, 'plane': 'FA-18C_hornet', 'number_of_planes': 2}
+
+        results = campaign.game_service.add_flights([
+            flight,
+            {**flight, 'plane': 'not-a-plane'},
+            {k: v for k, v in flight.items() if k != 'airport'},
+            {**flight, 'number_of_planes': 4},
+            'not-a-flight'
+        ])
+
+        self.assertEqual([r['success'] for r in results], [True, False, False, True, False])
+        self.assertEqual(results[1]['error'], 'plane not found')
+        self.assertEqual(len(results[3]['group'].units), 4)
+        self.assertIs(campaign.lookup_group(results[0]['group'].id), results[0]['group'])
+
+    def test_add_flights_no_parking(self):
+        campaign = create_campaign()
+        batumi = airport_by_name(campaign.mission.terrain, 'Batumi')
+        flight = {'coalition': 'blue', 'country': 'USA', 'location': {'lat': 42.0, 'lon': 42.0},
+                  'airport': batumi.id, 'plane': 'FA-18C_hornet', 'number_of_planes': 4}
+
+        results = campaign.game_service.add_flights([flight] * 10)
+
+        self.assertFalse(results[-1]['success'])
+        self.assertIn('No free parking slot', results[-1]['error'])
+
+
+class AddFlightsMessageTestCase(unittest.TestCase):
+    def setUp(self):
+        config.config = config.Config()
+
+    def test_non_list_answered_with_error(self):
+        async def run():
+            app = create_app(create_campaign(), SessionManager())
+            async with app.test_app() as test_app:
+                async with test_app.test_client().websocket('/ws/message') as ws:
+                    await receive_key(ws, 'welcome')
+                    for value in ({'plane': 'FA-18C_hornet'}, 4):
+                        await ws.send(json.dumps({'key': 'add_flights', 'value': value}))
+                        result = await receive_key(ws, 'add_flights_result')
+                        self.assertEqual(result['value'], [])
+                        self.assertIn('list', result['error'])
+
+        asyncio.run(run())
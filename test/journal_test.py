@@ -0,0 +1,89 @@
+import json
+import os
+import tempfile
+import unittest
+
+import sys
+sys.path.append(f"{os.path.dirname(os.path.realpath(__file__))}/../tauntaun_live_editor/dcs")
+
+import tauntaun_live_editor.config as config
+from tauntaun_live_editor.camp import Campaign
+from tauntaun_live_editor.journal import Journal
+from test.test_common import create_mission, airport_by_name
+
+
+class JournalTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.miz_path = os.path.join(self.tmp_dir.name, 'journaled.miz')
+        create_mission().save(self.miz_path)
+        config.load_config(os.path.join(self.tmp_dir.name, 'config.json'))
+        config.config.autosave = False
+        self.campaigns = []
+
+    def tearDown(self):
+        for campaign in self.campaigns:
+            if campaign.journal:
+                campaign.journal.close()
+        self.tmp_dir.cleanup()
+
+    def _load(self):
+        campaign = Campaign()
+        campaign.load_mission(self.miz_path)
+        self.campaigns.append(campaign)
+        return campaign
+
+    def _edit(self, campaign):
+        batumi = airport_by_name(campaign.mission.terrain, 'Batumi')
+        campaign.apply_operation('add_flight', {'coalition': 'blue', 'country': 'USA',
+                                                'location': {'lat': 42.0, 'lon': 42.0}, 'airport': batumi.id,
+                                                'plane': 'FA-18C_hornet', 'number_of_planes': 2})
+        campaign.apply_operation('set_bullseye', {'coalition': 'red', 'bullseye': {'lat': 42.5, 'lon': 41.5}})
+
+    def test_edits_replayed_after_restart(self):
+        campaign = self._load()
+        self._edit(campaign)
+        expected_groups = [g.name for g in campaign.get_plane_groups('blue')]
+        expected_bullseye = campaign.mission.coalition['red'].bullseye
+
+        # No save and no close, as if the process died
+        restarted = self._load()
+
+        self.assertEqual([g.name for g in restarted.get_plane_groups('blue')], expected_groups)
+        self.assertEqual(restarted.mission.coalition['red'].bullseye, expected_bullseye)
+        self.assertEqual(restarted.check_indexes(), [])
+        self.assertEqual(restarted.journal.records, 2)
+
+    def test_snapshot_resets_journal(self):
+        campaign = self._load()
+        self._edit(campaign)
+        group_count = len(list(campaign.get_plane_groups('blue')))
+
+        campaign.save_mission()
+        self.assertEqual(campaign.journal.records, 0)
+
+        restarted = self._load()
+        self.assertEqual(len(list(restarted.get_plane_groups('blue'))), group_count)
+
+    def test_journal_of_other_file_version_discarded(self):
+        campaign = self._load()
+        self._edit(campaign)
+        campaign.journal.close()
+
+        # The snapshot was written but the journal was not reset before the crash
+        create_mission().save(self.miz_path)
+        restarted = self._load()
+
+        self.assertEqual(restarted.journal.records, 0)
+
+    def test_torn_record_ignored(self):
+        journal = Journal(self.miz_path)
+        journal.open()
+        journal.append('set_bullseye', {'coalition': 'red', 'bullseye': {'lat': 42.5, 'lon': 41.5}})
+        journal.close()
+        with open(journal.path, 'a') as fp:
+            fp.write(json.dumps({'key': 'set_bullseye'})[:10])
+
+        reopened = Journal(self.miz_path)
+        self.assertEqual(len(reopened.open()), 1)
+        reopened.close()
@@ -0,0 +1,100 @@
+import asyncio
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import sys
+sys.path.append(f"{os.path.dirname(os.path.realpath(__file__))}/../tauntaun_live_editor/dcs")
+
+import tauntaun_live_editor.library as library
+from tauntaun_live_editor.library import MissionLibrary
+from tauntaun_live_editor.mission_info import read_mission_info
+from test.test_common import create_mission
+
+
+class MissionLibraryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.missions_dir = os.path.join(self.tmp_dir.name, 'missions')
+        self.uploads_dir = os.path.join(self.tmp_dir.name, 'uploads')
+        os.makedirs(os.path.join(self.missions_dir, 'sub'))
+        os.makedirs(os.path.join(self.uploads_dir, 'blobs'))
+
+        mission = create_mission()
+        mission.save(os.path.join(self.missions_dir, 'b.miz'))
+        mission.save(os.path.join(self.missions_dir, 'sub', 'a.miz'))
+        mission.save(os.path.join(self.uploads_dir, 'uploaded.miz'))
+        mission.save(os.path.join(self.uploads_dir, 'blobs', 'hash.miz'))
+
+        self.cache_path = os.path.join(self.tmp_dir.name, 'library.json')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _library(self):
+        return MissionLibrary({'missions': self.missions_dir, 'uploads': self.uploads_dir}, self.cache_path,
+                              exclude=[os.path.join(self.uploads_dir, 'blobs')])
+
+    def test_read_mission_info(self):
+        info = read_mission_info(os.path.join(self.missions_dir, 'b.miz'))
+
+        self.assertEqual(info['theatre'], 'Caucasus')
+        self.assertEqual(info['start_time'], 43200)
+        self.assertEqual(info['coalitions']['blue'], {'groups': 2, 'units': 3})
+        self.assertEqual(info['unit_types']['plane'], {'E-3A', 'F/A-18C'})
+
+    def test_index_and_pages(self):
+        mission_library = self._library()
+        asyncio.run(mission_library.refresh())
+
+        first = mission_library.page(0, 2)
+        self.assertEqual(first['total'], 3)
+        self.assertEqual([m['name'] for m in first['missions']], ['b.miz', os.path.join('sub', 'a.miz')])
+        self.assertEqual(first['missions'][0]['info']['theatre'], 'Caucasus')
+
+        uploads = mission_library.page(0, 10, 'uploads')['missions']
+        self.assertEqual([m['name'] for m in uploads], ['uploaded.miz'])
+        self.assertEqual(uploads[0]['path'], os.path.join(os.path.abspath(self.uploads_dir), 'uploaded.miz'))
+
+    def test_refresh_reads_only_changed_files(self):
+        asyncio.run(self._library().refresh())
+
+        # A new instance starts from the cache file
+        mission_library = self._library()
+        with mock.patch.object(library, 'read_mission_info', wraps=read_mission_info) as read:
+            asyncio.run(mission_library.refresh())
+            self.assertEqual(read.call_count, 0)
+
+            changed = os.path.join(self.missions_dir, 'b.miz')
+            with open(changed, 'ab') as fp:
+                fp.write(b'\0')
+            asyncio.run(mission_library.refresh())
+
+            read.assert_called_once_with(os.path.abspath(changed))
+
+    def test_scan_runs_off_the_event_loop(self):
+        mission_library = self._library()
+        scan = mission_library.scan
+        threads = []
+
+        def recording_scan():
+            threads.append(threading.get_ident())
+            return scan()
+
+        with mock.patch.object(mission_library, 'scan', recording_scan):
+            asyncio.run(mission_library.refresh())
+
+        self.assertEqual(len(threads), 1)
+        self.assertNotEqual(threads[0], threading.get_ident())
+        self.assertEqual(mission_library.page(0, 10)['total'], 3)
+
+    def test_removed_file_dropped(self):
+        mission_library = self._library()
+        asyncio.run(mission_library.refresh())
+
+        os.remove(os.path.join(self.missions_dir, 'b.miz'))
+        asyncio.run(mission_library.refresh())
+
+        self.assertEqual(mission_library.page(0, 10, 'missions')['total'], 1)
@@ -0,0 +1,96 @@
+import asyncio
+import base64
+import json
+import unittest
+
+import os
+import sys
+sys.path.append(f"{os.path.dirname(os.path.realpath(__file__))}/../tauntaun_live_editor/dcs")
+
+import tauntaun_live_editor.config as config
+from tauntaun_live_editor.metrics import Registry
+from tauntaun_live_editor.sessions import SessionManager
+from tauntaun_live_editor.server.server import create_app
+from test.fanout_test import receive_key
+from test.test_common import create_campaign
+
+
+def basic_auth(password):
+    return {'Authorization': 'Basic ' + base64.b64encode(f'prometheus:{password}'.encode()).decode()}
+
+
+class RegistryTestCase(unittest.TestCase):
+    def test_render(self):
+        registry = Registry()
+        messages = registry.counter('messages_total', 'Messages.', ['type'])
+        messages.labels('add_flight').inc()
+        messages.labels('add_flight').inc(2)
+        messages.labels('say "hi"').inc()
+        registry.gauge('clients', 'Clients.', function=lambda: 3)
+        duration = registry.histogram('duration_seconds', 'Duration.', buckets=(0.1, 1))
+        duration.observe(0.05)
+        duration.observe(0.5)
+        duration.observe(5)
+
+        lines = registry.render().splitlines()
+        self.assertIn('# TYPE messages_total counter', lines)
+        self.assertIn('messages_total{type="add_flight"} 3', lines)
+        self.assertIn('messages_total{type="say \\"hi\\""} 1', lines)
+        self.assertIn('clients 3', lines)
+        self.assertIn('# TYPE duration_seconds histogram', lines)
+        self.assertIn('duration_seconds_bucket{le="0.1"} 1', lines)
+        self.assertIn('duration_seconds_bucket{le="1"} 2', lines)
+        self.assertIn('duration_seconds_bucket{le="+Inf"} 3', lines)
+        self.assertIn('duration_seconds_sum 5.55', lines)
+        self.assertIn('duration_seconds_count 3', lines)
+
+    def test_same_name_replaced(self):
+        registry = Registry()
+        registry.gauge('clients', 'Clients.', function=lambda: 1)
+        registry.gauge('clients', 'Clients.', function=lambda: 2)
+        self.assertEqual(registry.render().count('clients 2'), 1)
+        self.assertNotIn('clients 1', registry.render())
+
+
+class MetricsEndpointTestCase(unittest.TestCase):
+    def setUp(self):
+        config.config = config.Config()
+
+    def test_metrics_require_admin_password(self):
+        async def run():
+            app = create_app(create_campaign(), SessionManager())
+            async with app.test_app() as test_app:
+                client = test_app.test_client()
+                response = await client.get('/metrics')
+                self.assertEqual(response.status_code, 401)
+                self.assertIn('Basic', response.headers['WWW-Authenticate'])
+                response = await client.get('/metrics', headers=basic_auth('wrong'))
+                self.assertEqual(response.status_code, 401)
+                response = await client.get('/metrics', headers=basic_auth('pässword'))
+                self.assertEqual(response.status_code, 401)
+
+                async with client.websocket('/ws/message') as ws:
+                    welcome = await receive_key(ws, 'welcome')
+                    await ws.send(json.dumps({'key': 'session_data_update', 'value': {
+                        'id': welcome['id'],
+                        'session_data': {'name': 'Maverick', 'selected_unit_id': -1, 'coalition': 'blue'}
+                    }}))
+                    await receive_key(ws, 'session_changed')
+
+                    response = await client.get('/metrics', headers=basic_auth('1234'))
+                    self.assertEqual(response.status_code, 200)
+                    self.assertTrue(response.headers['Content-Type'].startswith('text/plain; version=0.0.4'))
+                    lines = (await response.get_data(as_text=True)).splitlines()
+                    self.assertIn('tauntaun_connected_clients 1', lines)
+                    self.assertIn('tauntaun_rooms 1', lines)
+                    self.assertIn('tauntaun_edge_workers 0', lines)
+                    self.assertTrue(any(line.startswith('tauntaun_messages_total{update_type="session_data_update"}')
+                                        for line in lines))
+                    self.assertTrue(any(line.startswith('tauntaun_broadcasts_total{key="session_changed"}')
+                                        for line in lines))
+
+                    bearer = {'Authorization': f'Bearer {config.config.admin_password}'}
+                    response = await client.get('/metrics', headers=bearer)
+                    self.assertEqual(response.status_code, 200)
+
+        asyncio.run(run())
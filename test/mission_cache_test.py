@@ -0,0 +1,85 @@
+import os
+import tempfile
+import unittest
+
+from unittest import mock
+
+import sys
+sys.path.append(f"{os.path.dirname(os.path.realpath(__file__))}/../tauntaun_live_editor/dcs")
+
+from tauntaun_live_editor.camp import Campaign
+from tauntaun_live_editor import mission_cache
+from tauntaun_live_editor.mission_cache import MissionCache
+from test.test_common import create_mission
+
+
+class MissionCacheTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.miz_path = os.path.join(self.tmp_dir.name, 'cached.miz')
+        create_mission().save(self.miz_path)
+        self.cache = MissionCache(os.path.join(self.tmp_dir.name, 'cache'), 64 * 1024 * 1024)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_parse_mission_uses_cache(self):
+        campaign = Campaign()
+        campaign.mission_cache = self.cache
+
+        first = campaign.parse_mission(self.miz_path)
+        self.assertIsNotNone(self.cache.get(self.cache.key(self.miz_path)))
+
+        second = campaign.parse_mission(self.miz_path)
+        self.assertIsNot(first, second)
+        self.assertEqual([g.name for g in second.coalition['blue'].countries['USA'].plane_group],
+                         [g.name for g in first.coalition['blue'].countries['USA'].plane_group])
+
+    def test_key_changes_with_content(self):
+        key = self.cache.key(self.miz_path)
+        with open(self.miz_path, 'ab') as fp:
+            fp.write(b'\0')
+
+        self.assertNotEqual(self.cache.key(self.miz_path), key)
+
+    def test_key_changes_with_pydcs_build(self):
+        key = self.cache.key(self.miz_path)
+        with mock.patch.object(mission_cache, '_pydcs_fingerprint', '0.15.0-other'):
+            cache = MissionCache(self.cache.cache_dir, 64 * 1024 * 1024)
+
+        self.assertNotEqual(cache.key(self.miz_path), key)
+
+    def test_pydcs_fingerprint_follows_files(self):
+        package_dir = os.path.join(self.tmp_dir.name, 'package')
+        os.makedirs(package_dir)
+        with open(os.path.join(package_dir, 'planes.py'), 'w') as fp:
+            fp.write('planes = {}\n')
+        files = list(mission_cache._package_files(package_dir))
+
+        with open(os.path.join(package_dir, 'planes.py'), 'a') as fp:
+            fp.write('planes["new"] = None\n')
+        self.assertNotEqual(list(mission_cache._package_files(package_dir)), files)
+
+    def test_frozen_build_uses_bundled_fingerprint(self):
+        static_dir = os.path.join(self.tmp_dir.name, 'data', 'static_data')
+        os.makedirs(static_dir)
+        with open(os.path.join(static_dir, mission_cache.FINGERPRINT_FILENAME), 'w') as fp:
+            fp.write('0.15.0-built\n')
+
+        with mock.patch.object(mission_cache, '_pydcs_fingerprint', None), \
+                mock.patch.object(mission_cache, 'get_data_path', lambda: os.path.join(self.tmp_dir.name, 'data')), \
+                mock.patch.object(sys, 'frozen', True, create=True):
+            self.assertEqual(mission_cache.pydcs_fingerprint(), '0.15.0-built')
+
+    def test_eviction_keeps_size_limit(self):
+        cache = MissionCache(os.path.join(self.tmp_dir.name, 'small'), 1)
+        cache.put('a', create_mission())
+
+        self.assertIsNone(cache.get('a'))
+
+    def test_unreadable_entry_dropped(self):
+        with open(os.path.join(self.cache.cache_dir, 'broken.pickle'), 'wb') as fp:
+            fp.write(b'not a pickle')
+
+        self.assertIsNone(self.cache.get('broken'))
+        self.assertFalse(os.path.exists(os.path.join(self.cache.cache_dir, 'broken.pickle')))
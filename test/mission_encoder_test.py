@@ -16,3 +16,11 @@ class MissionEncoderTestCase(unittest.TestCase):
         json.dumps(mission, terrain=mission.terrain,  convert_coords=True, add_sidc=True, cls=MissionEncoder)
         self.assertEqual(True, True)
 
+
+     def test_points_carry_index(self):
+        mission = create_mission()
+
+        encoded = json.loads(json.dumps(mission, terrain=mission.terrain, convert_coords=True, add_sidc=True, cls=MissionEncoder))
+        group = encoded['coalition']['blue']['countries']['USA']['plane_group'][0]
+        self.assertEqual([p['index'] for p in group['points']], list(range(len(group['points']))))
+        self.assertEqual(group['route_revision'], 0)
@@ -0,0 +1,126 @@
+import asyncio
+import io
+import os
+import tempfile
+import unittest
+import zipfile
+
+import sys
+sys.path.append(f"{os.path.dirname(os.path.realpath(__file__))}/../tauntaun_live_editor/dcs")
+
+import dcs
+
+from tauntaun_live_editor.camp import Campaign
+from tauntaun_live_editor.miz import MizExporter, save_incremental
+from test.test_common import create_campaign, create_mission
+
+
+class SaveIncrementalTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.source_path = os.path.join(self.tmp_dir.name, 'source.miz')
+        create_mission().save(self.source_path)
+        with zipfile.ZipFile(self.source_path, 'a', compression=zipfile.ZIP_DEFLATED) as miz:
+            miz.writestr('KNEEBOARD/IMAGES/page.bin', os.urandom(1024) * 64, compress_type=zipfile.ZIP_STORED)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _load(self, path):
+        mission = dcs.Mission()
+        mission.load_file(path)
+        return mission
+
+    def test_binary_members_copied_raw(self):
+        mission = self._load(self.source_path)
+        target_path = os.path.join(self.tmp_dir.name, 'target.miz')
+
+        save_incremental(mission, self.source_path, target_path)
+
+        with zipfile.ZipFile(self.source_path) as src, zipfile.ZipFile(target_path) as dst:
+            self.assertIsNone(dst.testzip())
+            src_info = src.getinfo('KNEEBOARD/IMAGES/page.bin')
+            dst_info = dst.getinfo('KNEEBOARD/IMAGES/page.bin')
+            # Recompressing would have deflated the stored member
+            self.assertEqual(dst_info.compress_type, zipfile.ZIP_STORED)
+            self.assertEqual((src_info.CRC, src_info.compress_size), (dst_info.CRC, dst_info.compress_size))
+            self.assertEqual(src.read('KNEEBOARD/IMAGES/page.bin'), dst.read('KNEEBOARD/IMAGES/page.bin'))
+            self.assertEqual(set(src.namelist()), set(dst.namelist()))
+
+    def test_overwrite_source_with_edits(self):
+        mission = self._load(self.source_path)
+        group = next(iter(mission.coalition['blue'].countries['USA'].plane_group))
+        group.points[-1].alt = 4321
+
+        save_incremental(mission, self.source_path, self.source_path)
+
+        reloaded = self._load(self.source_path)
+        group = next(iter(reloaded.coalition['blue'].countries['USA'].plane_group))
+        self.assertEqual(group.points[-1].alt, 4321)
+        with zipfile.ZipFile(self.source_path) as miz:
+            self.assertIn('KNEEBOARD/IMAGES/page.bin', miz.namelist())
+
+    def test_file_mode_kept(self):
+        mission = self._load(self.source_path)
+        os.chmod(self.source_path, 0o640)
+        target_path = os.path.join(self.tmp_dir.name, 'target.miz')
+        umask = os.umask(0o022)
+        try:
+            save_incremental(mission, self.source_path, self.source_path)
+            save_incremental(mission, self.source_path, target_path)
+        finally:
+            os.umask(umask)
+
+        self.assertEqual(os.stat(self.source_path).st_mode & 0o777, 0o640)
+        self.assertEqual(os.stat(target_path).st_mode & 0o777, 0o644)
+
+    def test_campaign_save_without_source(self):
+        campaign = Campaign()
+        campaign.mission = create_mission()
+        target_path = os.path.join(self.tmp_dir.name, 'new.miz')
+
+        campaign.save_mission(target_path)
+
+        self.assertEqual(campaign.loaded_mission_path, target_path)
+        self.assertEqual(len(list(self._load(target_path).coalition['blue'].countries['USA'].plane_group)), 2)
+
+
+class MizExporterTestCase(unittest.TestCase):
+    def test_export_cached_per_revision(self):
+        campaign = create_campaign()
+        exporter = MizExporter(campaign)
+
+        async def export_concurrently():
+            return await asyncio.gather(exporter.export(), exporter.export())
+
+        first, second = asyncio.run(export_concurrently())
+        self.assertIs(first, second)
+        self.assertIs(asyncio.run(exporter.export()), first)
+
+        campaign.apply_operation('set_bullseye', {'coalition': 'red', 'bullseye': {'lat': 42.5, 'lon': 41.5}})
+        updated = asyncio.run(exporter.export())
+        self.assertIsNot(updated, first)
+
+        mission = dcs.Mission()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'export.miz')
+            with open(path, 'wb') as fp:
+                fp.write(updated)
+            mission.load_file(path)
+        self.assertEqual(mission.coalition['red'].bullseye, campaign.mission.coalition['red'].bullseye)
+        with zipfile.ZipFile(io.BytesIO(updated)) as miz:
+            self.assertIsNone(miz.testzip())
+
+    def test_failed_export_retried(self):
+        campaign = create_campaign()
+        exporter = MizExporter(campaign)
+        missing_dir = os.path.join(tempfile.gettempdir(), 'missing-tauntaun-dir')
+        campaign.mission.map_resource.binary_files.append({'path': os.path.join(missing_dir, 'a.bin'),
+                                                           'respath': 'l10n/DEFAULT/a.bin'})
+
+        with self.assertRaises(OSError):
+            asyncio.run(exporter.export())
+
+        campaign.mission.map_resource.binary_files.pop()
+        with zipfile.ZipFile(io.BytesIO(asyncio.run(exporter.export()))) as miz:
+            self.assertIsNone(miz.testzip())
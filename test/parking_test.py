@@ -0,0 +1,73 @@
+import unittest
+
+import os
+import sys
+sys.path.append(f"{os.path.dirname(os.path.realpath(__file__))}/../tauntaun_live_editor/dcs")
+
+import dcs
+from dcs.terrain.terrain import NoParkingSlotError
+
+from tauntaun_live_editor.parking import ParkingAllocator
+from test.test_common import create_campaign, airport_by_name
+
+
+class ParkingAllocatorTestCase(unittest.TestCase):
+    def test_allocate_matches_pydcs_order(self):
+        campaign = create_campaign()
+        batumi = airport_by_name(campaign.mission.terrain, 'Batumi')
+        expected = batumi.free_parking_slot(dcs.planes.F_16C_50)
+
+        slots = ParkingAllocator().allocate(batumi, dcs.planes.F_16C_50, 1)
+
+        self.assertEqual(slots, [expected])
+
+    def test_large_airframes_and_helicopters_match_pydcs(self):
+        campaign = create_campaign()
+        for airport_name, aircraft_type in (('Kutaisi', dcs.planes.KC_135),
+                                            ('Kutaisi', dcs.planes.C_130),
+                                            ('Batumi', dcs.helicopters.UH_1H),
+                                            ('Senaki-Kolkhi', dcs.helicopters.CH_47D)):
+            with self.subTest(airport=airport_name, aircraft=aircraft_type.id):
+                airport = airport_by_name(campaign.mission.terrain, airport_name)
+                expected = airport.free_parking_slots(aircraft_type)
+                self.assertTrue(expected)
+
+                slots = ParkingAllocator().allocate(airport, aircraft_type, len(expected))
+
+                self.assertEqual(slots, expected)
+
+    def test_allocate_until_exhausted(self):
+        campaign = create_campaign()
+        batumi = airport_by_name(campaign.mission.terrain, 'Batumi')
+        free_count = len(batumi.free_parking_slots(dcs.planes.F_16C_50))
+        allocator = ParkingAllocator()
+
+        slots = allocator.allocate(batumi, dcs.planes.F_16C_50, free_count)
+        self.assertEqual(len(set(map(id, slots))), free_count)
+        with self.assertRaises(NoParkingSlotError):
+            allocator.allocate(batumi, dcs.planes.F_16C_50, 1)
+
+        allocator.release(batumi, slots[:2])
+        self.assertEqual(len(allocator.allocate(batumi, dcs.planes.F_16C_50, 2)), 2)
+
+    def test_failed_allocation_keeps_slots_free(self):
+        campaign = create_campaign()
+        batumi = airport_by_name(campaign.mission.terrain, 'Batumi')
+        free_count = len(batumi.free_parking_slots(dcs.planes.F_16C_50))
+        allocator = ParkingAllocator()
+
+        with self.assertRaises(NoParkingSlotError):
+            allocator.allocate(batumi, dcs.planes.F_16C_50, free_count + 1)
+
+        self.assertEqual(len(allocator.allocate(batumi, dcs.planes.F_16C_50, free_count)), free_count)
+
+    def test_add_flight_uses_distinct_slots(self):
+        campaign = create_campaign()
+        batumi = airport_by_name(campaign.mission.terrain, 'Batumi')
+
+        for _ in range(3):
+            campaign.game_service.add_flight('blue', 'USA', {'lat': 42.0, 'lon': 42.0}, batumi.id, 'FA-18C_hornet', 2)
+
+        parking = [u.parking for g in campaign.get_plane_groups('blue') for u in g.units if u.parking is not None]
+        self.assertGreaterEqual(len(parking), 6)
+        self.assertEqual(len(parking), len(set(parking)))
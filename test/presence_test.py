@@ -0,0 +1,117 @@
+import asyncio
+import math
+import unittest
+
+import os
+import sys
+sys.path.append(f"{os.path.dirname(os.path.realpath(__file__))}/../tauntaun_live_editor/dcs")
+
+from quart.testing import WebsocketResponseError
+
+import tauntaun_live_editor.config as config
+from tauntaun_live_editor.presence import CLIENT_RECORD, PRESENCE_RECORD, PresenceClient, PresenceHub
+from tauntaun_live_editor.sessions import SessionManager
+from tauntaun_live_editor.server.server import create_app
+from test.fanout_test import receive_key
+from test.test_common import create_campaign
+
+
+def records(frame):
+    return [PRESENCE_RECORD.unpack_from(frame, offset) for offset in range(0, len(frame), PRESENCE_RECORD.size)]
+
+
+class PresenceTestCase(unittest.TestCase):
+    def test_latest_update_wins(self):
+        async def run():
+            frames = []
+
+            async def send(frame):
+                frames.append(frame)
+
+            hub = PresenceHub(interval=0.01)
+            client = PresenceClient(send)
+            hub.connect(client)
+            sender = asyncio.ensure_future(client.run())
+
+            hub.update(1, CLIENT_RECORD.pack(42.0, 41.0, -1))
+            hub.update(1, CLIENT_RECORD.pack(42.5, 41.5, 7))
+            hub.update(2, CLIENT_RECORD.pack(43.0, 40.0, -1))
+            hub.update(2, b'garbage')
+            await asyncio.sleep(0.05)
+            sender.cancel()
+            return frames
+
+        frames = asyncio.run(run())
+        self.assertEqual(len(frames), 1)
+        self.assertEqual(len(frames[0]), 2 * PRESENCE_RECORD.size)
+        self.assertEqual(records(frames[0])[0], (1, 42.5, 41.5, 7))
+
+    def test_slow_client_gets_newest_records_only(self):
+        async def run():
+            frames = []
+            release = asyncio.Event()
+
+            async def send(frame):
+                frames.append(frame)
+                await release.wait()
+
+            hub = PresenceHub(interval=0.01)
+            client = PresenceClient(send)
+            hub.connect(client)
+            sender = asyncio.ensure_future(client.run())
+
+            for lat in range(10):
+                hub.update(1, CLIENT_RECORD.pack(float(lat), 0.0, -1))
+                await asyncio.sleep(0.02)
+            hub.leave(1)
+            await asyncio.sleep(0.02)
+            release.set()
+            await asyncio.sleep(0.02)
+            sender.cancel()
+            return frames
+
+        frames = asyncio.run(run())
+        self.assertEqual(len(frames), 2)
+        self.assertEqual(records(frames[0])[0][1], 0.0)
+        session_id, lat, lon, unit_id = records(frames[1])[0]
+        self.assertEqual((session_id, unit_id), (1, -1))
+        self.assertTrue(math.isnan(lat))
+
+    def test_new_client_receives_snapshot(self):
+        async def run():
+            hub = PresenceHub(interval=0.01)
+            hub.update(3, CLIENT_RECORD.pack(1.0, 2.0, 5))
+            hub.update(4, CLIENT_RECORD.pack(1.0, 2.0, -1))
+            hub.leave(4)
+
+            client = PresenceClient(None)
+            hub.connect(client)
+            return client._pending
+
+        self.assertEqual(list(asyncio.run(run())), [3])
+
+
+class PresenceRouteTestCase(unittest.TestCase):
+    def setUp(self):
+        config.config = config.Config()
+
+    def test_presence_requires_resume_token(self):
+        async def run():
+            app = create_app(create_campaign(), SessionManager())
+            async with app.test_app() as test_app:
+                client = test_app.test_client()
+                async with client.websocket('/ws/message') as ws:
+                    welcome = await receive_key(ws, 'welcome')
+                    path = f"/ws/presence/{welcome['id']}"
+
+                    with self.assertRaises(WebsocketResponseError):
+                        async with client.websocket(f'{path}?token=guessed') as presence:
+                            await presence.send(CLIENT_RECORD.pack(42.0, 41.0, -1))
+                            await asyncio.wait_for(presence.receive(), 5)
+
+                    async with client.websocket(f"{path}?token={welcome['resume_token']}") as presence:
+                        await presence.send(CLIENT_RECORD.pack(42.0, 41.0, -1))
+                        frame = await asyncio.wait_for(presence.receive(), 5)
+                        self.assertEqual(records(frame)[0][0], welcome['id'])
+
+        asyncio.run(run())
@@ -0,0 +1,39 @@
+import unittest
+
+import os
+import sys
+sys.path.append(f"{os.path.dirname(os.path.realpath(__file__))}/../tauntaun_live_editor/dcs")
+
+from tauntaun_live_editor.server.replay import ReplayBuffer
+
+
+def fill(buffer, count, size=1):
+    for _ in range(count):
+        seq = buffer.next_seq()
+        buffer.append(seq, bytes([seq % 256]) * size)
+
+
+class ReplayBufferTestCase(unittest.TestCase):
+    def test_frames_since(self):
+        buffer = ReplayBuffer(max_frames=10)
+        fill(buffer, 5)
+        self.assertEqual([seq for seq, _ in buffer.since(2)], [3, 4, 5])
+        self.assertEqual([seq for seq, _ in buffer.since(0)], [1, 2, 3, 4, 5])
+        self.assertEqual(buffer.since(5), [])
+        self.assertIsNone(buffer.since(6))
+
+    def test_gap_too_large(self):
+        buffer = ReplayBuffer(max_frames=3)
+        fill(buffer, 5)
+        self.assertIsNone(buffer.since(1))
+        self.assertEqual([seq for seq, _ in buffer.since(2)], [3, 4, 5])
+
+    def test_bounded_by_size(self):
+        buffer = ReplayBuffer(max_frames=100, max_bytes=250)
+        fill(buffer, 5, size=100)
+        self.assertEqual([seq for seq, _ in buffer.since(3)], [4, 5])
+        self.assertIsNone(buffer.since(2))
+
+        # A single frame larger than the limit is still kept
+        fill(buffer, 1, size=1000)
+        self.assertEqual([seq for seq, _ in buffer.since(5)], [6])
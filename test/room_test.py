@@ -0,0 +1,101 @@
+import asyncio
+import os
+import tempfile
+import unittest
+
+import sys
+sys.path.append(f"{os.path.dirname(os.path.realpath(__file__))}/../tauntaun_live_editor/dcs")
+
+import tauntaun_live_editor.config as config
+from tauntaun_live_editor.camp import Campaign
+from tauntaun_live_editor.server.room import DEFAULT_ROOM, Room, RoomManager
+from test.test_common import create_campaign, create_mission, airport_by_name
+
+
+class RoomManagerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.created = []
+
+    async def create_campaign(self, room_id):
+        self.created.append(room_id)
+        await asyncio.sleep(0.01)
+        return create_campaign()
+
+    def manager(self, **kwargs):
+        return RoomManager(Room(DEFAULT_ROOM, create_campaign()), self.create_campaign, **kwargs)
+
+    def test_room_created_once(self):
+        manager = self.manager()
+
+        async def open_concurrently():
+            return await asyncio.gather(manager.get('alpha'), manager.get('alpha'))
+
+        first, second = asyncio.run(open_concurrently())
+        self.assertIs(first, second)
+        self.assertEqual(self.created, ['alpha'])
+        self.assertIsNot(first.campaign, manager.rooms[DEFAULT_ROOM].campaign)
+
+    def test_invalid_and_too_many_rooms(self):
+        manager = self.manager(max_rooms=2)
+        self.assertIsNone(asyncio.run(manager.get('../etc')))
+        self.assertIsNotNone(asyncio.run(manager.get('alpha')))
+        self.assertIsNone(asyncio.run(manager.get('bravo')))
+        self.assertEqual(self.created, ['alpha'])
+
+    def test_idle_rooms_unloaded(self):
+        manager = self.manager(idle_timeout=60)
+        room = asyncio.run(manager.get('alpha'))
+        room.ws_clients[0] = object()
+
+        manager.unload_idle(room.last_active + 120)
+        self.assertIn('alpha', manager.rooms)
+
+        room.ws_clients.clear()
+        manager.unload_idle(room.last_active + 30)
+        self.assertIn('alpha', manager.rooms)
+        manager.unload_idle(room.last_active + 120)
+        self.assertNotIn('alpha', manager.rooms)
+        self.assertIn(DEFAULT_ROOM, manager.rooms)
+
+
+class RoomCampaignTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.miz_path = os.path.join(self.tmp_dir.name, 'shared.miz')
+        create_mission().save(self.miz_path)
+        config.load_config(os.path.join(self.tmp_dir.name, 'config.json'))
+        config.config.autosave = False
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _room_campaign(self, room_id):
+        campaign = Campaign()
+        campaign.working_dir = os.path.join(self.tmp_dir.name, 'rooms', room_id)
+        return campaign
+
+    def test_rooms_edit_their_own_copy(self):
+        alpha = self._room_campaign('alpha')
+        alpha.load_mission(self.miz_path)
+        bravo = self._room_campaign('bravo')
+        bravo.load_mission(self.miz_path)
+        self.assertNotEqual(alpha.loaded_mission_path, bravo.loaded_mission_path)
+
+        batumi = airport_by_name(alpha.mission.terrain, 'Batumi')
+        alpha.apply_operation('add_flight', {'coalition': 'blue', 'country': 'USA',
+                                             'location': {'lat': 42.0, 'lon': 42.0}, 'airport': batumi.id,
+                                             'plane': 'FA-18C_hornet', 'number_of_planes': 2})
+        groups = len(list(alpha.get_plane_groups('blue')))
+        alpha.close()
+        bravo.close()
+
+        reopened = self._room_campaign('alpha')
+        self.assertEqual(reopened.remembered_mission(), alpha.loaded_mission_path)
+        reopened.load_mission(reopened.remembered_mission())
+        self.assertEqual(len(list(reopened.get_plane_groups('blue'))), groups)
+        reopened.close()
+
+        shared = Campaign()
+        shared.load_mission(self.miz_path)
+        self.assertEqual(len(list(shared.get_plane_groups('blue'))), groups - 1)
+        shared.close()
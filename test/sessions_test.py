@@ -0,0 +1,64 @@
+import unittest
+from unittest import mock
+
+import os
+import sys
+sys.path.append(f"{os.path.dirname(os.path.realpath(__file__))}/../tauntaun_live_editor/dcs")
+
+import tauntaun_live_editor.config as config
+from tauntaun_live_editor.sessions import SessionManager
+
+
+def session_data(name, selected_unit_id=-1, coalition='blue'):
+    return {'name': name, 'selected_unit_id': selected_unit_id, 'coalition': coalition}
+
+
+class SessionManagerTestCase(unittest.TestCase):
+    def setUp(self):
+        patcher = mock.patch.object(config, 'config', config.Config())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.manager = SessionManager()
+
+    def test_deltas_carry_consecutive_versions(self):
+        joined = self.manager.register(0)
+        self.assertEqual((joined['key'], joined['id'], joined['version']), ('session_joined', 0, 1))
+        self.assertEqual(joined['value'].name, 'Pilot 0')
+
+        changed = self.manager.update_session(0, session_data('Viper', 5))
+        self.assertEqual((changed['key'], changed['version']), ('session_changed', 2))
+
+        left = self.manager.deregister(0)
+        self.assertEqual(left, {'key': 'session_left', 'version': 3, 'id': 0})
+        self.assertIsNone(self.manager.deregister(0))
+        self.assertEqual(self.manager.version, 3)
+
+    def test_conflicts_rejected(self):
+        self.manager.register(0)
+        self.manager.register(1)
+        self.manager.update_session(0, session_data('Viper', 5))
+        version = self.manager.version
+
+        self.assertIsNone(self.manager.update_session(1, session_data('Viper')))
+        self.assertIsNone(self.manager.update_session(1, session_data('Hornet', 5)))
+        self.assertIsNone(self.manager.update_session(0, session_data('Viper', 5)))
+        self.assertEqual(self.manager.version, version)
+        self.assertEqual(self.manager.sessions[1].name, 'Pilot 1')
+
+    def test_released_name_and_unit_can_be_taken(self):
+        self.manager.register(0)
+        self.manager.register(1)
+        self.manager.update_session(0, session_data('Viper', 5))
+        self.manager.update_session(0, session_data('Falcon', 6))
+
+        self.assertIsNotNone(self.manager.update_session(1, session_data('Viper', 5)))
+        self.assertIsNone(self.manager.update_session(1, session_data('Falcon')))
+
+        self.manager.deregister(0)
+        self.assertIsNotNone(self.manager.update_session(1, session_data('Falcon', 6)))
+
+    def test_default_name_stays_unique(self):
+        self.manager.register(0)
+        self.manager.update_session(0, session_data('Pilot 1'))
+        self.manager.register(1)
+        self.assertNotEqual(self.manager.sessions[1].name, 'Pilot 1')
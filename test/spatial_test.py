@@ -0,0 +1,33 @@
+import unittest
+
+from tauntaun_live_editor.spatial import SpatialGrid
+
+
+class SpatialGridTestCase(unittest.TestCase):
+    def test_query_radius(self):
+        grid = SpatialGrid(cell_size=1000)
+        grid.insert('a', 0, 0, 'A')
+        grid.insert('b', 1500, 0, 'B')
+        grid.insert('c', -5000, 5000, 'C')
+
+        self.assertEqual([r[0] for r in grid.query(100, 0, 2000)], ['a', 'b'])
+        self.assertEqual([r[0] for r in grid.query(0, 0, 100000)], ['a', 'b', 'c'])
+        self.assertEqual(grid.query(20000, 20000, 10), [])
+
+    def test_insert_moves_existing_key(self):
+        grid = SpatialGrid(cell_size=1000)
+        grid.insert('a', 0, 0, 'A')
+        grid.insert('a', 50000, 0, 'A')
+
+        self.assertEqual(len(grid), 1)
+        self.assertEqual(grid.query(0, 0, 1000), [])
+        self.assertEqual([r[0] for r in grid.query(50000, 0, 1000)], ['a'])
+
+    def test_remove(self):
+        grid = SpatialGrid(cell_size=1000)
+        grid.insert('a', 0, 0, 'A')
+        grid.remove('a')
+        grid.remove('missing')
+
+        self.assertNotIn('a', grid)
+        self.assertEqual(grid.query(0, 0, 1000), [])
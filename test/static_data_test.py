@@ -0,0 +1,75 @@
+import gzip
+import json
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import sys
+sys.path.append(f"{os.path.dirname(os.path.realpath(__file__))}/../tauntaun_live_editor/dcs")
+
+import dcs
+import tauntaun_live_editor.static_data as static_data
+
+
+class StaticDataTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.build_dir = os.path.join(self.tmp_dir.name, 'build')
+        self.cache_dir = os.path.join(self.tmp_dir.name, 'cache')
+
+    def tearDown(self):
+        static_data._static_data = None
+        self.tmp_dir.cleanup()
+
+    def test_weapon_ids_resolved_by_clsid(self):
+        weapons = json.loads(static_data.gen_static_json())['weapons']
+        for name, weapon in weapons.items():
+            clsid = getattr(dcs.weapons_data.Weapons, name)['clsid']
+            first_id = next(x for x in dcs.weapons_data.weapon_ids if dcs.weapons_data.weapon_ids[x]['clsid'] == clsid)
+            self.assertEqual(weapon['weapon_id'], first_id)
+
+    def test_generated_once_into_cache(self):
+        variants = static_data.load_static_data([self.build_dir, self.cache_dir], self.cache_dir)
+        path = os.path.join(self.cache_dir, static_data.static_data_filename())
+        self.assertTrue(os.path.isfile(path))
+        self.assertEqual(gzip.decompress(variants['gzip']), variants['identity'])
+
+        with mock.patch.object(static_data, 'gen_static_json') as gen:
+            reloaded = static_data.load_static_data([self.build_dir, self.cache_dir], self.cache_dir)
+            gen.assert_not_called()
+        self.assertEqual(reloaded['identity'], variants['identity'])
+
+    def test_build_output_preferred(self):
+        static_data.write_static_data(self.build_dir, {'identity': b'{"planes": {}}', 'gzip': gzip.compress(b'{}')})
+
+        with mock.patch.object(static_data, 'gen_static_json') as gen:
+            variants = static_data.load_static_data([self.build_dir, self.cache_dir], self.cache_dir)
+            gen.assert_not_called()
+        self.assertEqual(variants['identity'], b'{"planes": {}}')
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_sections(self):
+        static_data.load_static_data([self.cache_dir], self.cache_dir)
+        full = json.loads(static_data.get_static_json())
+
+        planes = json.loads(static_data.get_static_section('planes').variants['identity'])
+        self.assertEqual(set(planes), set(full['planes']))
+        self.assertNotIn('pylons', planes['FA-18C_hornet'])
+
+        hornet = static_data.get_static_type('planes', 'FA-18C_hornet')
+        self.assertEqual(json.loads(hornet.variants['identity']), full['planes']['FA-18C_hornet'])
+        self.assertIs(static_data.get_static_type('planes', 'FA-18C_hornet'), hornet)
+
+        vehicles = static_data.get_static_section('vehicles', ['M 818', 'no such vehicle'])
+        self.assertEqual([v['id'] for v in json.loads(vehicles.variants['identity']).values()], ['M 818'])
+
+        self.assertIsNone(static_data.get_static_section('liveries'))
+        self.assertIsNone(static_data.get_static_type('planes', 'no such plane'))
+
+    def test_section_etag_follows_content(self):
+        static_data.load_static_data([self.cache_dir], self.cache_dir)
+        weapons = static_data.get_static_section('weapons')
+        self.assertEqual(gzip.decompress(weapons.variants['gzip']), weapons.variants['identity'])
+        self.assertNotEqual(weapons.etag, static_data.get_static_section('ships').etag)
+        self.assertEqual(weapons.etag, static_data.get_static_section('weapons', None).etag)
@@ -0,0 +1,53 @@
+import pickle
+import unittest
+
+import os
+import sys
+sys.path.append(f"{os.path.dirname(os.path.realpath(__file__))}/../tauntaun_live_editor/dcs")
+
+import dcs
+from tauntaun_live_editor.terrain_cache import TerrainCache, dumps_mission, loads_mission, terrain_cache
+from test.test_common import airport_by_name, create_mission
+
+
+class TerrainCacheTestCase(unittest.TestCase):
+    def test_terrain_class_names_are_theatres(self):
+        for cls in dcs.terrain.Terrain.__subclasses__():
+            self.assertTrue(TerrainCache().is_supported(cls.__name__))
+        self.assertEqual(terrain_cache.checkout('Caucasus').name, 'Caucasus')
+
+    def test_checkouts_share_terrain_data(self):
+        first = terrain_cache.checkout('Caucasus')
+        second = terrain_cache.checkout('Caucasus')
+        first_batumi = airport_by_name(first, 'Batumi')
+        second_batumi = airport_by_name(second, 'Batumi')
+
+        self.assertIs(first_batumi.runways, second_batumi.runways)
+        self.assertIs(first_batumi._terrain, first)
+        self.assertIsNot(first_batumi.parking_slots, second_batumi.parking_slots)
+
+        first_batumi.set_blue()
+        first_batumi.parking_slots[0].unit_id = 42
+        self.assertEqual(first_batumi.coalition, 'BLUE')
+        self.assertNotEqual(second_batumi.coalition, 'BLUE')
+        self.assertIsNone(second_batumi.parking_slots[0].unit_id)
+
+    def test_mission_round_trip(self):
+        mission = create_mission()
+        data = dumps_mission(mission)
+        self.assertLess(len(data), len(pickle.dumps(mission, protocol=pickle.HIGHEST_PROTOCOL)))
+
+        loaded = loads_mission(data)
+        self.assertIsNot(loaded.terrain, mission.terrain)
+        self.assertEqual(airport_by_name(loaded.terrain, 'Batumi').coalition, 'BLUE')
+
+        group_names = [group.name for group in mission.country('USA').plane_group]
+        self.assertEqual([group.name for group in loaded.country('USA').plane_group], group_names)
+
+        occupied = [slot.unit_id for slot in airport_by_name(mission.terrain, 'Batumi').parking_slots]
+        loaded_batumi = airport_by_name(loaded.terrain, 'Batumi')
+        self.assertEqual([slot.unit_id for slot in loaded_batumi.parking_slots], occupied)
+
+        escort = loaded.country('USA').find_plane_group('Escort')
+        self.assertIs(loaded_batumi._terrain, loaded.terrain)
+        self.assertIs(escort.units[0].position._terrain, loaded.terrain)
@@ -0,0 +1,108 @@
+import asyncio
+import os
+import tempfile
+import unittest
+import zipfile
+
+import sys
+sys.path.append(f"{os.path.dirname(os.path.realpath(__file__))}/../tauntaun_live_editor/dcs")
+
+from tauntaun_live_editor.mission_cache import file_digest
+from tauntaun_live_editor.upload import UploadError, UploadStore, UploadedFile, check_mission, receive_mission_upload
+from test.test_common import create_mission
+
+
+def _multipart(boundary, filename, content):
+    return (f'--{boundary}\r\n'
+            f'Content-Disposition: form-data; name="mission"; filename="{filename}"\r\n'
+            'Content-Type: application/octet-stream\r\n\r\n').encode('utf-8') + content + \
+        f'\r\n--{boundary}--\r\n'.encode('utf-8')
+
+
+async def _chunks(data, size=1000):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+class UploadTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.miz_path = os.path.join(self.tmp_dir.name, 'upload.miz')
+        create_mission().save(self.miz_path)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _replace_mission_lua(self, old, new):
+        with zipfile.ZipFile(self.miz_path) as miz:
+            text = miz.read('mission').decode('utf-8')
+        path = os.path.join(self.tmp_dir.name, 'modified.miz')
+        with zipfile.ZipFile(path, 'w') as miz:
+            miz.writestr('mission', text.replace(old, new))
+        return path
+
+    def test_check_mission_missing_mod(self):
+        path = self._replace_mission_lua('"F/A-18C"', '"Some_Mod_Jet"')
+
+        with self.assertRaises(UploadError) as ctx:
+            check_mission(path)
+
+        self.assertEqual(ctx.exception.error_type, 'missing_mod')
+        self.assertEqual(ctx.exception.response()['missing_mod'], 'Some_Mod_Jet')
+
+    def test_check_mission_unsupported_map(self):
+        path = self._replace_mission_lua('["theatre"]="Caucasus"', '["theatre"]="Moon"')
+
+        with self.assertRaises(UploadError) as ctx:
+            check_mission(path)
+
+        self.assertEqual(ctx.exception.error_type, 'unsupported_map')
+
+    def test_receive_upload_hashes_content(self):
+        with open(self.miz_path, 'rb') as fp:
+            content = fp.read()
+
+        body = _multipart('xyz', 'My Mission.miz', content)
+        upload = asyncio.run(receive_mission_upload(_chunks(body), 'xyz', 'mission', self.tmp_dir.name, 1 << 30))
+
+        self.assertEqual(upload.filename, 'My Mission.miz')
+        self.assertEqual(upload.size, len(content))
+        self.assertEqual(upload.sha256, file_digest(self.miz_path))
+        self.assertEqual(file_digest(upload.path), upload.sha256)
+
+    def test_receive_upload_size_cap(self):
+        body = _multipart('xyz', 'big.miz', b'\0' * 5000)
+
+        with self.assertRaises(UploadError) as ctx:
+            asyncio.run(receive_mission_upload(_chunks(body), 'xyz', 'mission', self.tmp_dir.name, 4096))
+
+        self.assertEqual(ctx.exception.error_type, 'too_large')
+        self.assertEqual([n for n in os.listdir(self.tmp_dir.name) if n.endswith('.tmp')], [])
+
+    def test_store_deduplicates(self):
+        store = UploadStore(os.path.join(self.tmp_dir.name, 'uploads'))
+        sha256 = file_digest(self.miz_path)
+
+        paths = []
+        for name in ('a.miz', 'b.miz'):
+            copy_path = os.path.join(store.blobs_dir, name + '.tmp')
+            with open(self.miz_path, 'rb') as src, open(copy_path, 'wb') as dst:
+                dst.write(src.read())
+            paths.append(store.store(UploadedFile(name, copy_path, sha256, 0)))
+
+        self.assertEqual([os.path.basename(p) for p in paths], ['a.miz', 'b.miz'])
+        self.assertEqual(os.listdir(store.blobs_dir), [sha256 + '.miz'])
+        self.assertEqual(file_digest(paths[1]), sha256)
+
+    def test_concurrent_loads_share_parse(self):
+        store = UploadStore(os.path.join(self.tmp_dir.name, 'uploads'))
+        sha256 = file_digest(self.miz_path)
+
+        async def load_twice():
+            return await asyncio.gather(store.load(sha256, self.miz_path), store.load(sha256, self.miz_path))
+
+        first, second = asyncio.run(load_twice())
+        self.assertIsNot(first, second)
+        self.assertEqual(first.terrain.name, 'Caucasus')
+        self.assertEqual(second.terrain.name, 'Caucasus')
+        self.assertIsNot(first.coalition['blue'], second.coalition['blue'])
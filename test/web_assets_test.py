@@ -0,0 +1,82 @@
+import asyncio
+import gzip
+import os
+import tempfile
+import unittest
+
+from tauntaun_live_editor.web_assets import IMMUTABLE, WebAssets, precompress
+
+
+class WebAssetsTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = self.tmp_dir.name
+        os.makedirs(os.path.join(self.root, 'static', 'js'))
+        self.bundle = b'console.log("tauntaun");\n' * 1000
+        self._write('static/js/main.0123abcd.js', self.bundle)
+        self._write('index.html', b'<html>' + b' ' * 2000 + b'</html>')
+        self._write('logo.png', b'\x89PNG' * 1000)
+        self._write('robots.txt', b'User-agent: *')
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def _write(self, path, data):
+        with open(os.path.join(self.root, path), 'wb') as fp:
+            fp.write(data)
+
+    def test_precompress(self):
+        written = precompress(self.root)
+        self.assertGreaterEqual(written, 2)
+        with open(os.path.join(self.root, 'static', 'js', 'main.0123abcd.js.gz'), 'rb') as fp:
+            self.assertEqual(gzip.decompress(fp.read()), self.bundle)
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'logo.png.gz')))
+        self.assertFalse(os.path.exists(os.path.join(self.root, 'robots.txt.gz')))
+
+        # Up to date variants are kept
+        self.assertEqual(precompress(self.root), 0)
+
+    def test_small_files_cached(self):
+        assets = WebAssets(self.root)
+        index = assets.get('index.html')
+        self.assertEqual(index.cache_control, 'no-cache')
+        self.assertEqual(index.mimetype, 'text/html')
+        self.assertIsInstance(index.variants['identity'], bytes)
+        self.assertEqual(gzip.decompress(index.variants['gzip']), index.variants['identity'])
+        self.assertIs(assets.get('index.html'), index)
+        self.assertNotIn('gzip', assets.get('logo.png').variants)
+
+        self._write('index.html', b'<html>changed</html>')
+        os.utime(os.path.join(self.root, 'index.html'), ns=(0, 0))
+        changed = assets.get('index.html')
+        self.assertEqual(changed.variants['identity'], b'<html>changed</html>')
+        self.assertNotEqual(changed.etag, index.etag)
+
+    def test_large_files_sent_from_variants(self):
+        precompress(self.root)
+        assets = WebAssets(self.root, max_cached_size=1024)
+        bundle = assets.get('static/js/main.0123abcd.js')
+        self.assertEqual(bundle.cache_control, IMMUTABLE)
+        self.assertEqual(bundle.variants['gzip'], os.path.join(self.root, 'static', 'js', 'main.0123abcd.js.gz'))
+
+    def test_unknown_paths(self):
+        assets = WebAssets(self.root)
+        self.assertIsNone(assets.get('missing.js'))
+        self.assertIsNone(assets.get('../outside.js'))
+        self.assertIsNone(assets.get('static'))
+        precompress(self.root)
+        self.assertIsNone(assets.get('static/js/main.0123abcd.js.gz'))
+
+    def test_fetch_loads_once(self):
+        assets = WebAssets(self.root)
+
+        async def fetch_concurrently():
+            return await asyncio.gather(assets.fetch('static/js/main.0123abcd.js'),
+                                        assets.fetch('static/js/main.0123abcd.js'), assets.fetch('missing.js'))
+
+        first, second, missing = asyncio.run(fetch_concurrently())
+        self.assertIs(first, second)
+        self.assertIsNone(missing)
+        self.assertEqual(first.variants['identity'], self.bundle)
+        self.assertEqual(gzip.decompress(first.variants['gzip']), self.bundle)
+        self.assertIs(assets.get('static/js/main.0123abcd.js'), first)
@@ -0,0 +1,462 @@
+"""
+Load test of the websocket server, see README.md.
+
+Starts the server from create_app in a child process with a synthetic mission, connects
+the clients to it on localhost and runs a scripted mix of edits for a while.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import random
+import socket
+import sys
+import time
+import zlib
+
+_ROOT = os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..'))
+sys.path.append(_ROOT)
+sys.path.append(os.path.join(_ROOT, 'tauntaun_live_editor', 'dcs'))
+
+from wsproto import ConnectionType, WSConnection
+from wsproto.events import AcceptConnection, CloseConnection, Message, Ping, RejectConnection, Request, TextMessage
+
+OPERATIONS = ('group_route_modify', 'add_flight', 'unit_loadout_update', 'session_data_update')
+DEFAULT_MIX = 'group_route_modify=60,add_flight=5,unit_loadout_update=20,session_data_update=15'
+
+# Airports given to blue, flights added by the clients start from them
+_BLUE_AIRPORTS = ('Batumi', 'Kobuleti', 'Senaki-Kolkhi', 'Kutaisi')
+
+# The broadcast answering an operation, it carries the group, unit or session id but for
+# mission_updated
+_ANSWERS = {
+    'group_route_modify': 'route_update',
+    'add_flight': 'mission_updated',
+    'unit_loadout_update': 'unit_update',
+    'session_data_update': 'session_changed',
+}
+
+
+def _synthetic_campaign(flights):
+    import dcs
+    from tauntaun_live_editor.camp import Campaign
+    from tauntaun_live_editor.terrain_cache import terrain_cache
+
+    mission = dcs.Mission(terrain_cache.checkout('Caucasus'))
+    airports = [airport for airport in mission.terrain.airports.values() if airport.name in _BLUE_AIRPORTS]
+    for airport in airports:
+        airport.set_blue()
+
+    usa = mission.country('USA')
+    origin = airports[0].position
+    for index in range(flights):
+        position = origin.point_from_heading(index * 360 / max(flights, 1), 40000 + 500 * index)
+        group = mission.flight_group_inflight(usa, f'Load {index}', dcs.planes.FA_18C_hornet, position, 6000,
+                                              group_size=2)
+        for leg in range(3):
+            group.add_waypoint(position.point_from_heading(90 * leg, 30000), 6000)
+
+    campaign = Campaign()
+    campaign.mission = mission
+    groups = [{'id': group.id, 'units': [unit.id for unit in group.units], 'points': len(group.points)}
+              for group in campaign.get_plane_groups('blue')]
+    return campaign, groups, [airport.id for airport in airports]
+
+
+def _process_cpu(pid):
+    """CPU seconds of another process, None where /proc is not available."""
+    try:
+        with open(f'/proc/{pid}/stat') as fp:
+            # The fields after the command name, utime and stime are the 14th and 15th of the line
+            fields = fp.read().rpartition(')')[2].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf('SC_CLK_TCK')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def _edges_cpu():
+    # The edge workers are multiprocessing children of the server process
+    samples = [_process_cpu(process.pid) for process in multiprocessing.active_children()]
+    return None if None in samples else sum(samples)
+
+
+def _run_server(port, flights, edge_workers, log, pipe):
+    """Entry point of the server process."""
+    import tauntaun_live_editor.config as config
+    config.config = config.Config(autosave=False, journal=False, edge_workers=edge_workers)
+
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+    from tauntaun_live_editor.server.server import create_app
+    from tauntaun_live_editor.sessions import SessionManager
+
+    # Set after the imports, the server module configures logging on import
+    logging.getLogger().setLevel(logging.INFO if log else logging.WARNING)
+    # Sends to clients closing at the end of the run are expected
+    logging.getLogger('asyncio').setLevel(logging.ERROR)
+    if log:
+        logging.getLogger().addHandler(logging.FileHandler(log))
+
+    campaign, groups, airports = _synthetic_campaign(flights)
+    edge_ports = [port + 1 + index for index in range(edge_workers)]
+    app = create_app(campaign, SessionManager(), edge_ports=edge_ports)
+
+    async def control():
+        loop = asyncio.get_event_loop()
+        pipe.send({'groups': groups, 'airports': airports})
+        cpu = edges_cpu = None
+        while True:
+            command = await loop.run_in_executor(None, pipe.recv)
+            if command == 'mark':
+                cpu = time.process_time()
+                edges_cpu = _edges_cpu() if edge_workers else 0.0
+            elif command == 'stop':
+                state_cpu = time.process_time() - cpu if cpu is not None else 0.0
+                edges_end = _edges_cpu() if edge_workers else 0.0
+                pipe.send({'state': state_cpu,
+                           'edges': edges_end - edges_cpu if None not in (edges_cpu, edges_end) else None})
+                return
+
+    server_config = Config()
+    server_config.bind = [f'127.0.0.1:{port}']
+    asyncio.run(serve(app, server_config, shutdown_trigger=control))
+
+
+class WsClient:
+    """A minimal websocket client, frames are inflated and decoded like the web UI does."""
+
+    def __init__(self):
+        self.connection = WSConnection(ConnectionType.CLIENT)
+        self.reader = None
+        self.writer = None
+        self.bytes_received = 0
+        self._parts = []
+        # Events read along with the handshake response, e.g. the welcome frame
+        self._pending = []
+
+    async def connect(self, port, path, timeout=30):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                self.reader, self.writer = await asyncio.open_connection('127.0.0.1', port)
+                break
+            except OSError:
+                if time.monotonic() > deadline:
+                    raise
+                await asyncio.sleep(0.2)
+
+        self.writer.write(self.connection.send(Request(host='localhost', target=path)))
+        while True:
+            events = await self._events()
+            for index, event in enumerate(events):
+                if isinstance(event, AcceptConnection):
+                    self._pending = events[index + 1:]
+                    return
+                if isinstance(event, RejectConnection):
+                    raise ConnectionError(f'Websocket rejected with {event.status_code}')
+
+    async def _events(self):
+        if self._pending:
+            events, self._pending = self._pending, []
+            return events
+
+        data = await self.reader.read(65536)
+        self.connection.receive_data(data or None)
+        return list(self.connection.events())
+
+    async def messages(self):
+        """Yields the decoded messages until the connection is closed."""
+        while True:
+            events = await self._events()
+            for event in events:
+                if isinstance(event, Message):
+                    self._parts.append(event.data)
+                    if event.message_finished:
+                        data = b''.join(self._parts)
+                        self._parts = []
+                        self.bytes_received += len(data)
+                        yield json.loads(zlib.decompress(data))
+                elif isinstance(event, Ping):
+                    self.writer.write(self.connection.send(event.response()))
+                elif isinstance(event, CloseConnection):
+                    return
+            if not events and self.reader.at_eof():
+                return
+
+    def send(self, message):
+        self.writer.write(self.connection.send(TextMessage(data=json.dumps(message))))
+
+    def close(self):
+        self.writer.close()
+
+
+def percentile(samples, fraction):
+    if not samples:
+        return float('nan')
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class LoadTest:
+    def __init__(self, options, groups, airports):
+        self.options = options
+        self.groups = groups
+        self.airports = airports
+        self.mix = [(operation, weight) for operation, weight in options.mix.items() if weight > 0]
+        self.running = False
+        # Send time of the last operation by the broadcast answering it
+        self.sent_at = {}
+        self.sender_latencies = []
+        self.delivery_latencies = []
+        self.operations = 0
+        self.timeouts = 0
+        self.frames = 0
+        self.clients = []
+
+    def _client_port(self, index):
+        if self.options.edge_workers:
+            return self.options.port + 1 + index % self.options.edge_workers
+        return self.options.port
+
+    async def run_client(self, index, connected):
+        client = WsClient()
+        await client.connect(self._client_port(index), '/ws/message')
+        self.clients.append(client)
+        messages = client.messages()
+        welcome = await messages.__anext__()
+        assert welcome['key'] == 'welcome', f"Expected the welcome frame first, got {welcome['key']}"
+        session_id = welcome['id']
+        group = self.groups[index % len(self.groups)]
+        waiting = {}
+
+        async def receive():
+            async for message in messages:
+                # Operations sent before the end are still answered, only the frames
+                # of the run are counted
+                if self.running:
+                    self.frames += 1
+                answer = (message['key'], message.get('group_id', message.get('id')))
+                if message['key'] == 'mission_updated':
+                    answer = ('mission_updated', None)
+                sent = self.sent_at.get(answer)
+                if sent is not None:
+                    self.delivery_latencies.append(time.perf_counter() - sent)
+                future = waiting.pop(answer, None)
+                if future is not None and not future.done():
+                    future.set_result(time.perf_counter())
+
+        receiver = asyncio.ensure_future(receive())
+        connected.set_result(None)
+        rng = random.Random(index)
+        selected = -1
+        try:
+            while not self.running:
+                await asyncio.sleep(0.05)
+            while self.running:
+                await asyncio.sleep(rng.expovariate(self.options.rate))
+                if not self.running:
+                    break
+
+                operation = rng.choices([op for op, _ in self.mix], [weight for _, weight in self.mix])[0]
+                value, target = self._operation(operation, rng, session_id, group, selected)
+                if operation == 'session_data_update':
+                    selected = value['session_data']['selected_unit_id']
+
+                answer = (_ANSWERS[operation], target)
+                future = asyncio.get_event_loop().create_future()
+                waiting[answer] = future
+                sent = time.perf_counter()
+                self.sent_at[answer] = sent
+                client.send({'key': operation, 'value': value})
+                self.operations += 1
+                try:
+                    received = await asyncio.wait_for(future, self.options.timeout)
+                    self.sender_latencies.append(received - sent)
+                except asyncio.TimeoutError:
+                    self.timeouts += 1
+                    waiting.pop(answer, None)
+        finally:
+            receiver.cancel()
+            client.close()
+
+    def _operation(self, operation, rng, session_id, group, selected):
+        lat, lon = 41.5 + rng.random(), 41.8 + rng.random() * 2
+        if operation == 'group_route_modify':
+            # The load never inserts or removes waypoints, so routes stay at their first revision
+            old = {'index': rng.randrange(1, group['points']), 'revision': 0}
+            return {'id': group['id'], 'old': old, 'new': {
+                'alt': rng.randrange(1000, 10000),
+                'type': 'Turning Point',
+                'name': '',
+                'position': {'lat': lat, 'lon': lon},
+                'speed': 200,
+                'action': 'TurningPoint',
+                'alt_type': 'BARO'
+            }}, group['id']
+        if operation == 'add_flight':
+            return {'coalition': 'blue', 'country': 'USA', 'location': {'lat': lat, 'lon': lon},
+                    'airport': rng.choice(self.airports), 'plane': 'FA-18C_hornet', 'number_of_planes': 2}, None
+        if operation == 'unit_loadout_update':
+            unit_id = rng.choice(group['units'])
+            return {'id': unit_id, 'pylons': {'1': '{AIS_ASQ_T50}'}, 'chaff': rng.randrange(60),
+                    'flare': rng.randrange(60), 'gun': 100, 'fuel': 4900}, unit_id
+        # Alternates the selection, an unchanged session is not broadcast
+        unit_id = group['units'][0] if selected == -1 else -1
+        return {'id': session_id, 'session_data': {'name': f'Load {session_id}', 'selected_unit_id': unit_id,
+                                                   'coalition': 'blue'}}, session_id
+
+
+async def _run_clients(options, indices, mission, pipe):
+    test = LoadTest(options, mission['groups'], mission['airports'])
+    loop = asyncio.get_event_loop()
+    tasks = []
+    # Connected in batches, a burst of handshakes is not what is measured
+    for start in range(0, len(indices), 50):
+        batch = []
+        for index in indices[start:start + 50]:
+            future = loop.create_future()
+            batch.append(future)
+            tasks.append(asyncio.ensure_future(test.run_client(index, future)))
+        await asyncio.wait_for(asyncio.gather(*batch), 60)
+
+    pipe.send('connected')
+    await loop.run_in_executor(None, pipe.recv)
+    cpu = time.process_time()
+    start = time.perf_counter()
+    test.running = True
+    await asyncio.sleep(options.duration)
+    test.running = False
+    elapsed = time.perf_counter() - start
+    cpu = time.process_time() - cpu
+    # Operations in flight are waited for, the clients disconnect before the server stops
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return {
+        'operations': test.operations,
+        'timeouts': test.timeouts,
+        'frames': test.frames,
+        'bytes': sum(client.bytes_received for client in test.clients),
+        'sender': test.sender_latencies,
+        'delivery': test.delivery_latencies,
+        'elapsed': elapsed,
+        'cpu': cpu,
+    }
+
+
+def _run_client_process(options, indices, mission, pipe):
+    """Entry point of a load generator process."""
+    pipe.send(asyncio.run(_run_clients(options, indices, mission, pipe)))
+
+
+def report(options, results, server_cpu):
+    def total(key):
+        return sum(result[key] for result in results)
+
+    def latencies(key):
+        samples = [sample for result in results for sample in result[key]]
+        return '  '.join(f"p{int(fraction * 100)} {percentile(samples, fraction) * 1000:7.1f} ms"
+                         for fraction in (0.5, 0.95, 0.99))
+
+    elapsed = max(result['elapsed'] for result in results)
+    edges = f", {options.edge_workers} edge workers" if options.edge_workers else ""
+    print(f"clients            {options.clients} in {len(results)} processes{edges}")
+    print(f"duration           {elapsed:.1f} s")
+    print(f"operations         {total('operations')} ({total('operations') / elapsed:.1f}/s), "
+          f"{total('timeouts')} timed out")
+    print(f"frames received    {total('frames')} ({total('frames') / elapsed:.0f}/s, "
+          f"{total('bytes') / elapsed / 1024 / 1024:.2f} MB/s compressed)")
+    print(f"sender latency     {latencies('sender')}")
+    print(f"delivery latency   {latencies('delivery')}")
+    state_cpu, edges_cpu = server_cpu['state'], server_cpu['edges']
+    if not options.edge_workers:
+        print(f"server CPU         {state_cpu:.1f} s ({state_cpu / elapsed * 100:.0f}% of a core)")
+    elif edges_cpu is not None:
+        cpu = state_cpu + edges_cpu
+        print(f"server CPU         {cpu:.1f} s ({cpu / elapsed * 100:.0f}% of a core), "
+              f"state process {state_cpu:.1f} s, edge workers {edges_cpu:.1f} s")
+    else:
+        print(f"server CPU         {state_cpu:.1f} s ({state_cpu / elapsed * 100:.0f}% of a core), "
+              f"state process only, the edge workers are not measured here")
+    busiest = max(result['cpu'] / result['elapsed'] for result in results)
+    print(f"load generator CPU {total('cpu'):.1f} s, busiest process {busiest * 100:.0f}% of a core")
+    if busiest > 0.8 or elapsed > options.duration * 1.1:
+        print("A load generator process was saturated, the results understate what the server can do. "
+              "Run with more --processes.")
+
+
+def parse_mix(text):
+    mix = {}
+    for item in text.split(','):
+        operation, _, weight = item.partition('=')
+        if operation not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation {operation}, one of {', '.join(OPERATIONS)}")
+        mix[operation] = float(weight)
+    return mix
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test of the Tauntaun websocket server on localhost.')
+    parser.add_argument('--clients', type=int, default=50, help='websocket clients')
+    parser.add_argument('--duration', type=float, default=30, help='seconds to run the operations for')
+    parser.add_argument('--rate', type=float, default=0.5, help='operations per second of each client')
+    parser.add_argument('--flights', type=int, default=0, help='flights in the mission, one per client by default')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f'weights of the operations, default {DEFAULT_MIX}')
+    parser.add_argument('--processes', type=int, default=0,
+                        help='load generator processes, one per 100 clients by default')
+    parser.add_argument('--edge-workers', type=int, default=0, help='edge worker processes holding the clients')
+    parser.add_argument('--timeout', type=float, default=10, help='seconds to wait for the broadcast of an operation')
+    parser.add_argument('--port', type=int, default=0, help='server port, a free one by default')
+    parser.add_argument('--log', help='server log file, the server only logs warnings without it')
+    options = parser.parse_args()
+    options.port = options.port or _free_port()
+
+    context = multiprocessing.get_context('spawn')
+    pipe, child_pipe = context.Pipe()
+    server = context.Process(target=_run_server, args=(options.port, options.flights or options.clients,
+                                                       options.edge_workers, options.log, child_pipe))
+    server.start()
+    generators = []
+    try:
+        print(f"Building the mission, server on port {options.port}")
+        while not pipe.poll(0.5):
+            if not server.is_alive():
+                sys.exit("The server failed to start")
+        mission = pipe.recv()
+
+        processes = options.processes or max(1, min(os.cpu_count() // 2, -(-options.clients // 100)))
+        for offset in range(processes):
+            generator_pipe, generator_child_pipe = context.Pipe()
+            process = context.Process(target=_run_client_process, args=(
+                options, list(range(offset, options.clients, processes)), mission, generator_child_pipe))
+            process.start()
+            generators.append((process, generator_pipe))
+        for _, generator_pipe in generators:
+            generator_pipe.recv()
+        print(f"{options.clients} clients connected, running for {options.duration} s")
+
+        # Settle the session joins of the ramp up before measuring
+        time.sleep(1)
+        pipe.send('mark')
+        for _, generator_pipe in generators:
+            generator_pipe.send('go')
+        results = [generator_pipe.recv() for _, generator_pipe in generators]
+        pipe.send('stop')
+        report(options, results, pipe.recv())
+    finally:
+        for process, _ in generators:
+            process.join(10)
+        server.join(10)
+        if server.is_alive():
+            server.terminate()
+
+if __name__ == '__main__':
+    main()